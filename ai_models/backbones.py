@@ -0,0 +1,79 @@
+"""
+Backbones the disease model can be built on
+
+Every model built here takes [0, 1] RGB images, the input the backend
+feeds, at whatever resolution it was built for. A Rescaling layer in front
+of the backbone converts that to the range its ImageNet weights were
+trained on. The backend reads the input size from the exported model, so
+any variant can be deployed by replacing the .tflite file.
+
+Keras has no EfficientNet-Lite. The nearest edge-friendly choices are
+EfficientNetB0 and the "minimalistic" MobileNetV3, which drops squeeze-and-
+excitation and hard-swish just as the Lite variants do.
+"""
+
+from collections import namedtuple
+
+import tensorflow as tf
+from tensorflow.keras.layers import Dense, Dropout, GlobalAveragePooling2D, Input, Rescaling
+from tensorflow.keras.models import Model
+
+# application: tf.keras.applications constructor; scale/offset map [0, 1] to its expected input
+Backbone = namedtuple('Backbone', ['application', 'default_size', 'scale', 'offset', 'options'])
+
+BACKBONES = {
+    # [-1, 1] input
+    'inception_v3': Backbone('InceptionV3', 256, 2.0, -1.0, {}),
+    'mobilenet_v2': Backbone('MobileNetV2', 224, 2.0, -1.0, {}),
+    # These rescale [0, 255] input themselves
+    'mobilenet_v3_small': Backbone('MobileNetV3Small', 224, 255.0, 0.0, {}),
+    'mobilenet_v3_large': Backbone('MobileNetV3Large', 224, 255.0, 0.0, {}),
+    'mobilenet_v3_large_minimalistic': Backbone('MobileNetV3Large', 224, 255.0, 0.0, {"minimalistic": True}),
+    'efficientnet_b0': Backbone('EfficientNetB0', 224, 255.0, 0.0, {}),
+    'efficientnet_v2_b0': Backbone('EfficientNetV2B0', 224, 255.0, 0.0, {}),
+}
+
+
+def create_backbone(name, image_size, weights='imagenet'):
+    """Frozen feature extractor: [0, 1] images (image_size = (height, width)) -> feature maps"""
+    spec = BACKBONES[name]
+    inputs = Input(shape=(image_size[0], image_size[1], 3))
+    base_model = getattr(tf.keras.applications, spec.application)(
+        include_top=False,
+        weights=weights,
+        input_shape=(image_size[0], image_size[1], 3),
+        **spec.options
+    )
+    base_model.trainable = False
+    x = Rescaling(spec.scale, offset=spec.offset)(inputs)
+    return Model(inputs, base_model(x, training=False), name=name)
+
+
+def create_head(feature_dim, num_classes):
+    """Classifier on the pooled backbone features"""
+    features = Input(shape=(feature_dim,))
+    x = Dense(1024, activation='relu')(features)
+    x = Dropout(0.4)(x)
+    # Softmax in float32 even under mixed precision, for numerically stable probabilities
+    x = Dense(num_classes, activation='softmax', dtype='float32')(x)
+    return Model(inputs=features, outputs=x, name='classifier_head')
+
+
+def feature_extractor(backbone):
+    """The backbone with global average pooling: [0, 1] images -> feature vectors"""
+    return Model(backbone.input, GlobalAveragePooling2D()(backbone.output), name=backbone.name + '_pooled')
+
+
+def create_model(backbone, num_classes, head=None):
+    """Backbone, pooling and head as one model (uncompiled)"""
+    x = GlobalAveragePooling2D()(backbone.output)
+    if head is None:
+        head = create_head(x.shape[-1], num_classes)
+    return Model(inputs=backbone.input, outputs=head(x))
+
+
+def convert_to_tflite(model):
+    """TFLite flatbuffer with dynamic-range quantized weights, as train_model.py exports it"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = {tf.lite.Optimize.DEFAULT}
+    return converter.convert()
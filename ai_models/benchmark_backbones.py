@@ -0,0 +1,131 @@
+"""
+Compare backbones for the disease model: TFLite size, latency and accuracy
+
+For each variant (backbone@resolution) this builds the frozen backbone,
+trains the head on its cached features for --head-epochs epochs, and exports
+the whole model to TFLite the way train_model.py does. It then reports the
+file size, single-image latency and batched throughput on one core, and
+top-1 accuracy of the TFLite model on the validation split. The first
+variant is the baseline for the speedups. Backbone weights are ImageNet
+unless --weights none is given; the timings are the same either way, but
+accuracy is only meaningful with ImageNet weights and a real dataset.
+
+Usage:
+    python ai_models/benchmark_backbones.py --dataset path/to/PlantVillage
+    python ai_models/benchmark_backbones.py --synthetic 200 --weights none \
+        --variants inception_v3@160,mobilenet_v3_small@160 --json backbones.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+import tensorflow as tf
+
+from backbones import BACKBONES, convert_to_tflite, create_backbone, create_head, create_model, feature_extractor
+from benchmark_input_pipeline import write_synthetic_dataset
+from compare_models import batch_throughput, compare_models
+from data_pipeline import list_dataset, make_dataset
+from feature_cache import FeatureCache, backbone_version, compute_features
+
+DEFAULT_VARIANTS = ('inception_v3@256,mobilenet_v3_large_minimalistic@224,mobilenet_v3_large@224,'
+                    'mobilenet_v3_small@224,efficientnet_b0@224,mobilenet_v3_large@160')
+
+
+def parse_variant(variant):
+    """'name@size' (or just 'name' for the backbone's default size) -> (name, size)"""
+    name, _, size = variant.partition('@')
+    if name not in BACKBONES:
+        raise ValueError(f"unknown backbone {name!r}; choose from {', '.join(BACKBONES)}")
+    return name, int(size) if size else BACKBONES[name].default_size
+
+
+def images_and_labels(paths, labels, num_classes, image_size):
+    """All of a subset as [0, 1] images and class indices, in file order"""
+    images = [batch.numpy() for batch, _ in make_dataset(paths, labels, num_classes, image_size, 64)]
+    return np.concatenate(images), np.asarray(labels)
+
+
+def benchmark_variant(name, size, weights, dataset, cache_dir, output_dir, head_epochs, batch_size):
+    class_names, (train_paths, train_labels), (validation_paths, validation_labels) = dataset
+    num_classes = len(class_names)
+    image_size = (size, size)
+    backbone = create_backbone(name, image_size, weights=weights)
+    extractor = feature_extractor(backbone)
+
+    cache = FeatureCache(cache_dir, backbone_version(backbone, image_size))
+    features = cache.get(compute_features(cache, extractor, train_paths, 0, image_size))
+    head = create_head(features.shape[1], num_classes)
+    head.compile(optimizer='adam', loss='categorical_crossentropy')
+    head.fit(features, tf.keras.utils.to_categorical(train_labels, num_classes),
+             batch_size=128, epochs=head_epochs, verbose=0)
+
+    model_path = os.path.join(output_dir, f"{name}_{size}.tflite")
+    with open(model_path, 'wb') as f:
+        f.write(convert_to_tflite(create_model(backbone, num_classes, head)))
+
+    images, labels = images_and_labels(validation_paths, validation_labels, num_classes, image_size)
+    row = compare_models([model_path], images, labels)["models"][model_path]
+    row.update({
+        "backbone": name,
+        "input_size": size,
+        "parameters": backbone.count_params(),
+        "batch_images_per_second_per_core": batch_throughput(model_path, images, batch_size),
+        "model_path": model_path
+    })
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark disease model backbones as TFLite exports")
+    parser.add_argument('--dataset', help="Class-per-folder image dataset")
+    parser.add_argument('--synthetic', type=int, default=0, help="Generate this many random JPEGs instead")
+    parser.add_argument('--variants', default=DEFAULT_VARIANTS,
+                        help="Comma-separated backbone@size list; the first is the baseline")
+    parser.add_argument('--weights', choices=['imagenet', 'none'], default='imagenet')
+    parser.add_argument('--head-epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=16, help="Batch size for the throughput measurement")
+    parser.add_argument('--cache-dir', help="Feature cache directory (default: a temporary one)")
+    parser.add_argument('--output-dir', default=os.path.join('ai_models', 'backbones'))
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+    if not args.dataset and not args.synthetic:
+        parser.error("give --dataset or --synthetic")
+    try:
+        variants = [parse_variant(variant) for variant in args.variants.split(',')]
+    except ValueError as e:
+        parser.error(str(e))
+    dataset = list_dataset(args.dataset or write_synthetic_dataset(tempfile.mkdtemp(), args.synthetic))
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache_dir = args.cache_dir or tempfile.mkdtemp()
+
+    print("Backbone Benchmark")
+    print("=" * 30)
+    print(f"{len(dataset[1][0])} training images, {len(dataset[2][0])} validation images, "
+          f"{len(dataset[0])} classes")
+
+    results = {"weights": args.weights, "variants": {}}
+    for name, size in variants:
+        print(f"{name} @ {size}x{size}...")
+        results["variants"][f"{name}@{size}"] = benchmark_variant(
+            name, size, None if args.weights == 'none' else args.weights, dataset, cache_dir,
+            args.output_dir, args.head_epochs, args.batch_size)
+        tf.keras.backend.clear_session()
+
+    baseline = next(iter(results["variants"].values()))
+    print(f"{'variant':<38} {'MB':>6} {'ms/image':>9} {'batch img/s':>12} {'speedup':>8} {'accuracy':>9}")
+    for variant, row in results["variants"].items():
+        row["speedup"] = baseline["latency_ms"] / row["latency_ms"]
+        print(f"{variant:<38} {row['size_mb']:6.1f} {row['latency_ms']:9.1f} "
+              f"{row['batch_images_per_second_per_core']:12.1f} {row['speedup']:7.1f}x {row['accuracy']:9.4f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
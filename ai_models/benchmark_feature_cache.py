@@ -0,0 +1,120 @@
+"""
+Compare end-to-end and cached-feature training of the disease model head
+
+Times one epoch of end-to-end training, where every image goes through the
+frozen InceptionV3 backbone. Then times the one-off feature computation
+into a FeatureCache (the original plus --views augmented views per image),
+a second pass that finds everything cached, and one epoch of head training
+on the cached features. Finally it projects both approaches over --epochs
+epochs. Backbone weights are random unless --imagenet is given; the
+timings are the same either way.
+
+Usage:
+    python ai_models/benchmark_feature_cache.py --dataset path/to/PlantVillage
+    python ai_models/benchmark_feature_cache.py --synthetic 300 --image-size 128 --json feature_cache.json
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.applications.inception_v3 import InceptionV3
+from tensorflow.keras.layers import Dense, Dropout, GlobalAveragePooling2D, Input
+from tensorflow.keras.models import Model
+
+from benchmark_input_pipeline import write_synthetic_dataset
+from data_pipeline import list_dataset, make_dataset
+from feature_cache import FeatureCache, backbone_version, compute_features
+
+
+def create_head(feature_dim, num_classes):
+    """The head train_model.py puts on the backbone"""
+    features = Input(shape=(feature_dim,))
+    x = Dropout(0.4)(Dense(1024, activation='relu')(features))
+    return Model(features, Dense(num_classes, activation='softmax')(x))
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark head training on cached backbone features")
+    parser.add_argument('--dataset', help="Class-per-folder image dataset")
+    parser.add_argument('--synthetic', type=int, default=0, help="Generate this many random JPEGs instead")
+    parser.add_argument('--image-size', type=int, default=256)
+    parser.add_argument('--views', type=int, default=4, help="Augmented views cached per image")
+    parser.add_argument('--epochs', type=int, default=25, help="Epochs to project total training time for")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--imagenet', action='store_true', help="Load the ImageNet weights")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+    if not args.dataset and not args.synthetic:
+        parser.error("give --dataset or --synthetic")
+    dataset = args.dataset or write_synthetic_dataset(tempfile.mkdtemp(), args.synthetic)
+    image_size = (args.image_size, args.image_size)
+
+    print("Feature Cache Benchmark")
+    print("=" * 30)
+    class_names, (paths, labels), _ = list_dataset(dataset)
+    num_classes = len(class_names)
+    print(f"{len(paths)} training images, {num_classes} classes, {args.views} augmented views per image")
+
+    backbone = InceptionV3(include_top=False, weights='imagenet' if args.imagenet else None,
+                           input_shape=image_size + (3,))
+    backbone.trainable = False
+    pooled = GlobalAveragePooling2D()(backbone.output)
+    feature_extractor = Model(backbone.input, pooled)
+
+    # End to end: the backbone runs on every image in every epoch
+    head = create_head(pooled.shape[-1], num_classes)
+    model = Model(backbone.input, head(pooled))
+    model.compile(optimizer='adam', loss='categorical_crossentropy')
+    train_dataset = make_dataset(paths, labels, num_classes, image_size, args.batch_size, training=True, cache='')
+    model.fit(train_dataset.take(1), epochs=1, verbose=0)  # Build and warm up
+    _, end_to_end_epoch = timed(lambda: model.fit(train_dataset, epochs=1, verbose=0))
+
+    # Cached: the backbone runs once per image and view
+    cache = FeatureCache(tempfile.mkdtemp(), backbone_version(backbone, image_size))
+    feature_extractor.predict_on_batch(np.zeros((64,) + image_size + (3,), dtype=np.float32))  # Warm up
+    keys, feature_seconds = timed(lambda: compute_features(cache, feature_extractor, paths, args.views, image_size))
+    _, cached_pass_seconds = timed(lambda: compute_features(cache, feature_extractor, paths, args.views, image_size))
+    features = cache.get(keys)
+    targets = tf.keras.utils.to_categorical(np.repeat(labels, args.views + 1), num_classes)
+    head = create_head(features.shape[1], num_classes)
+    head.compile(optimizer='adam', loss='categorical_crossentropy')
+    head.fit(features[:128], targets[:128], epochs=1, verbose=0)  # Build and warm up
+    _, head_epoch = timed(lambda: head.fit(features, targets, batch_size=128, epochs=1, verbose=0))
+
+    results = {
+        "images": len(paths),
+        "views": args.views,
+        "end_to_end_epoch_seconds": end_to_end_epoch,
+        "feature_computation_seconds": feature_seconds,
+        "cached_lookup_seconds": cached_pass_seconds,
+        "head_epoch_seconds": head_epoch,
+        "epochs": args.epochs,
+        "end_to_end_total_seconds": end_to_end_epoch * args.epochs,
+        "cached_total_seconds": feature_seconds + head_epoch * args.epochs
+    }
+    print(f"End-to-end epoch            {end_to_end_epoch:9.2f} s  ({len(paths) / end_to_end_epoch:.1f} images/s)")
+    print(f"Feature computation (once)  {feature_seconds:9.2f} s  ({len(keys)} features)")
+    print(f"Second pass, all cached     {cached_pass_seconds:9.2f} s")
+    print(f"Head epoch on features      {head_epoch:9.2f} s  ({len(keys) / head_epoch:.0f} features/s)")
+    print(f"{args.epochs} epochs: end to end {results['end_to_end_total_seconds']:.0f} s, "
+          f"cached features {results['cached_total_seconds']:.0f} s "
+          f"({results['end_to_end_total_seconds'] / results['cached_total_seconds']:.1f}x faster)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare the training input pipelines: ImageDataGenerator vs tf.data
+
+Reads one epoch of augmented training batches the way train_model.py used
+to (flow_from_directory) and through data_pipeline.make_dataset: without a
+cache, then the first (cache-filling) and second (cached) epoch with a
+memory cache. No model runs, so this is the rate at which each pipeline can
+feed the accelerator. --synthetic writes a dataset of random JPEGs to a
+temporary directory for a quick run without PlantVillage.
+
+Usage:
+    python ai_models/benchmark_input_pipeline.py --dataset path/to/PlantVillage
+    python ai_models/benchmark_input_pipeline.py --synthetic 2000 --json input_pipeline.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from data_pipeline import list_dataset, make_dataset, measure_throughput
+
+
+def write_synthetic_dataset(root, images, classes=5, size=(256, 256), seed=0):
+    """Random-noise JPEGs in class-per-folder layout (noise is the slowest case for the decoder)"""
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    for i in range(images):
+        directory = os.path.join(root, f"class_{i % classes}")
+        os.makedirs(directory, exist_ok=True)
+        pixels = rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(os.path.join(directory, f"{i:06d}.jpg"), quality=90)
+    return root
+
+
+def generator_throughput(dataset, image_size, batch_size):
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+    generator = ImageDataGenerator(
+        rescale=1./255,
+        rotation_range=20,
+        width_shift_range=0.2,
+        height_shift_range=0.2,
+        horizontal_flip=True,
+        zoom_range=0.2,
+        shear_range=0.2,
+        validation_split=0.2
+    ).flow_from_directory(dataset, target_size=image_size, batch_size=batch_size,
+                          class_mode='categorical', subset='training', shuffle=True)
+    return measure_throughput(generator, max_batches=len(generator))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the training input pipelines")
+    parser.add_argument('--dataset', help="Class-per-folder image dataset")
+    parser.add_argument('--synthetic', type=int, default=0, help="Generate this many random JPEGs instead")
+    parser.add_argument('--image-size', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+    if not args.dataset and not args.synthetic:
+        parser.error("give --dataset or --synthetic")
+    dataset = args.dataset or write_synthetic_dataset(tempfile.mkdtemp(), args.synthetic)
+    image_size = (args.image_size, args.image_size)
+
+    print("Input Pipeline Benchmark")
+    print("=" * 30)
+    class_names, (train_paths, train_labels), _ = list_dataset(dataset)
+    print(f"{len(train_paths)} training images, {len(class_names)} classes, {os.cpu_count()} CPUs")
+
+    def pipeline(cache):
+        return make_dataset(train_paths, train_labels, len(class_names), image_size, args.batch_size,
+                            training=True, cache=cache)
+
+    results = {"images": len(train_paths), "images_per_second": {}}
+    rates = results["images_per_second"]
+    rates["ImageDataGenerator"] = generator_throughput(dataset, image_size, args.batch_size)
+    rates["tf.data"] = measure_throughput(pipeline(None))
+    cached = pipeline('')
+    rates["tf.data, filling cache"] = measure_throughput(cached)
+    rates["tf.data, cached"] = measure_throughput(cached)
+
+    baseline = rates["ImageDataGenerator"]
+    for name, rate in rates.items():
+        print(f"{name:<26} {rate:8.1f} images/s  ({rate / baseline:.1f}x)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Compare TFLite exports of the disease model (e.g. float vs int8)
+
+For each model this reports file size, single-image latency on one core and
+top-1 accuracy on the validation split, plus how often the models agree.
+Inputs are fed in each model's own dtype: [0, 1] floats, or integers
+quantized with the model's input scale and zero point, the same way the
+backend serves them.
+
+Usage:
+    python ai_models/compare_models.py backend/plant_disease_model.tflite \
+        backend/plant_disease_model_int8.tflite --dataset path/to/PlantVillage
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+
+def load_interpreter(model_path, num_threads=1):
+    interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def encode_input(images, input_details):
+    """[0, 1] float images in the dtype the model expects"""
+    dtype = input_details['dtype']
+    scale, zero_point = input_details['quantization']
+    if np.issubdtype(dtype, np.integer) and scale:
+        limits = np.iinfo(dtype)
+        return np.clip(np.rint(images / scale + zero_point), limits.min, limits.max).astype(dtype)
+    return images.astype(np.float32)
+
+
+def decode_output(output, output_details):
+    """Model output as float probabilities"""
+    scale, zero_point = output_details['quantization']
+    if np.issubdtype(output.dtype, np.integer) and scale:
+        return (output.astype(np.float32) - zero_point) * scale
+    return output
+
+
+def predict(interpreter, image):
+    """Probabilities for one [0, 1] image (height x width x 3)"""
+    input_details = interpreter.get_input_details()[0]
+    output_details = interpreter.get_output_details()[0]
+    interpreter.set_tensor(input_details['index'], encode_input(image[np.newaxis], input_details))
+    interpreter.invoke()
+    return decode_output(interpreter.get_tensor(output_details['index']), output_details)[0]
+
+
+def batch_throughput(model_path, images, batch_size=32, num_threads=1, runs=5):
+    """Images per second when the model is invoked on batches of [0, 1] images"""
+    interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+    input_details = interpreter.get_input_details()[0]
+    shape = list(input_details['shape'])
+    interpreter.resize_tensor_input(input_details['index'], [batch_size] + shape[1:])
+    interpreter.allocate_tensors()
+    batch = np.resize(images, (batch_size,) + images.shape[1:])
+    interpreter.set_tensor(input_details['index'], encode_input(batch, input_details))
+    interpreter.invoke()  # Warm up
+    started = time.perf_counter()
+    for _ in range(runs):
+        interpreter.set_tensor(input_details['index'], encode_input(batch, input_details))
+        interpreter.invoke()
+    return batch_size * runs / (time.perf_counter() - started)
+
+
+def compare_models(model_paths, images, labels=None, latency_runs=50):
+    """Size, latency and accuracy for each model on the same [0, 1] images"""
+    report = {"images": len(images), "models": {}}
+    predictions = {}
+    for model_path in model_paths:
+        interpreter = load_interpreter(model_path)
+        input_details = interpreter.get_input_details()[0]
+
+        predict(interpreter, images[0])  # Warm up
+        runs = min(latency_runs, len(images))
+        started = time.perf_counter()
+        for image in images[:runs]:
+            predict(interpreter, image)
+        latency = (time.perf_counter() - started) / runs
+
+        predicted = np.array([np.argmax(predict(interpreter, image)) for image in images])
+        predictions[model_path] = predicted
+        report["models"][model_path] = {
+            "size_mb": os.path.getsize(model_path) / (1024 * 1024),
+            "input_dtype": np.dtype(input_details['dtype']).name,
+            "latency_ms": latency * 1000,
+            "images_per_second_per_core": 1 / latency,
+            "accuracy": float(np.mean(predicted == labels)) if labels is not None else None
+        }
+
+    baseline = model_paths[0]
+    for model_path in model_paths[1:]:
+        report["models"][model_path]["agreement_with_" + os.path.basename(baseline)] = float(
+            np.mean(predictions[model_path] == predictions[baseline]))
+        report["models"][model_path]["speedup"] = (
+            report["models"][baseline]["latency_ms"] / report["models"][model_path]["latency_ms"])
+    return report
+
+
+def print_report(report):
+    print(f"Compared on {report['images']} validation images")
+    for model_path, row in report["models"].items():
+        accuracy = f"{row['accuracy']:.4f}" if row["accuracy"] is not None else "n/a"
+        line = (f"{os.path.basename(model_path)}: {row['size_mb']:.1f} MB, {row['input_dtype']} input, "
+                f"{row['latency_ms']:.1f} ms/image, accuracy {accuracy}")
+        if "speedup" in row:
+            line += f", {row['speedup']:.1f}x faster"
+        print(line)
+
+
+def validation_images(dataset, image_size, max_images, validation_split=0.2):
+    """[0, 1] images and class indices from the validation subset of a class-per-folder dataset"""
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+    generator = ImageDataGenerator(rescale=1./255, validation_split=validation_split).flow_from_directory(
+        dataset,
+        target_size=image_size,
+        batch_size=32,
+        class_mode='sparse',
+        subset='validation',
+        shuffle=True,
+        seed=42
+    )
+    images, labels = [], []
+    while sum(len(batch) for batch in images) < min(max_images, generator.samples):
+        batch_images, batch_labels = next(generator)
+        images.append(batch_images)
+        labels.append(batch_labels)
+    return np.concatenate(images)[:max_images], np.concatenate(labels)[:max_images].astype(int)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare TFLite disease models")
+    parser.add_argument('models', nargs='+', help="TFLite files; the first is the baseline")
+    parser.add_argument('--dataset', required=True, help="Class-per-folder image dataset")
+    parser.add_argument('--max-images', type=int, default=500)
+    parser.add_argument('--output', default='ai_models/quantization_report.json')
+    args = parser.parse_args()
+
+    input_shape = load_interpreter(args.models[0]).get_input_details()[0]['shape']
+    images, labels = validation_images(args.dataset, tuple(input_shape[1:3]), args.max_images)
+    report = compare_models(args.models, images, labels)
+    print_report(report)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
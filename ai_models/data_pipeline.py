@@ -0,0 +1,161 @@
+"""
+tf.data input pipeline for training the disease model
+
+Replaces ImageDataGenerator.flow_from_directory, which loads, resizes and
+augments one image at a time in a single Python thread. Here files are read,
+decoded and resized in parallel by tf.data's C++ workers. Decoded images are
+cached as uint8, in memory or in cache files on disk, so epochs after the
+first skip decoding entirely. Augmentation is vectorized: the random
+rotation, shift, zoom, shear and flip of every image in a batch are combined
+into one affine transform each and applied in a single resampling op. Batches
+are prefetched while the model trains on the previous one.
+
+The training/validation split is the one ImageDataGenerator(validation_split=...)
+makes: for each class, the first validation_split of its sorted files are
+the validation subset.
+"""
+
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+AUTOTUNE = tf.data.AUTOTUNE
+# Formats tf.io.decode_image reads
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_dataset(root, validation_split=0.2):
+    """Class names, then (paths, labels) for the training and validation subsets of a class-per-folder dataset"""
+    class_names = sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+    subsets = {"training": ([], []), "validation": ([], [])}
+    for label, class_name in enumerate(class_names):
+        files = []
+        for directory, _, names in sorted(os.walk(os.path.join(root, class_name)), key=lambda entry: entry[0]):
+            files.extend(os.path.join(directory, name) for name in sorted(names)
+                         if name.lower().endswith(IMAGE_EXTENSIONS))
+        boundary = int(validation_split * len(files))
+        for subset, chosen in (("validation", files[:boundary]), ("training", files[boundary:])):
+            subsets[subset][0].extend(chosen)
+            subsets[subset][1].extend([label] * len(chosen))
+    return class_names, subsets["training"], subsets["validation"]
+
+
+def load_image(path, image_size):
+    """Read, decode and resize one file to uint8 (height x width x 3)"""
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    image = tf.image.resize(image, image_size, antialias=True)
+    return tf.cast(tf.clip_by_value(tf.round(image), 0, 255), tf.uint8)
+
+
+# Uniform [0, 1) draws per image that random_affine turns into transform parameters
+AFFINE_DRAWS = 7
+
+
+def random_affine(images, rotation=20.0, shift=0.2, zoom=0.2, shear=0.2, flip=True, draws=None):
+    """ImageDataGenerator's augmentations for a whole batch in one resampling pass.
+
+    Each image gets its own random rotation (degrees), shift (fraction of the size),
+    zoom (1 +/- zoom per axis), shear (degrees, as ImageDataGenerator's shear_range)
+    and horizontal flip, combined into one affine transform; edges are filled with
+    the nearest pixel. Pass draws (batch x AFFINE_DRAWS values in [0, 1)) to repeat
+    a particular augmentation instead of drawing a new one."""
+    shape = tf.shape(images)
+    batch, height, width = shape[0], tf.cast(shape[1], tf.float32), shape[2]
+    width = tf.cast(width, tf.float32)
+    if draws is None:
+        draws = tf.random.uniform([batch, AFFINE_DRAWS])
+    draws = tf.unstack(tf.cast(draws, tf.float32), AFFINE_DRAWS, axis=1)
+
+    def uniform(i, limit):
+        return (2 * draws[i] - 1) * limit
+
+    theta = uniform(0, rotation * np.pi / 180)
+    shear_angle = uniform(1, shear * np.pi / 180)
+    zoom_x, zoom_y = 1 + uniform(2, zoom), 1 + uniform(3, zoom)
+    mirror = tf.where(draws[4] < 0.5, -1.0, 1.0) if flip else tf.ones([batch])
+
+    # Output -> input mapping around the image center: rotation . shear . zoom . flip
+    cos, sin = tf.cos(theta), tf.sin(theta)
+    shear_x, shear_y = -tf.sin(shear_angle), tf.cos(shear_angle)
+    a00 = cos * zoom_x * mirror
+    a01 = (cos * shear_x - sin * shear_y) * zoom_y
+    a10 = sin * zoom_x * mirror
+    a11 = (sin * shear_x + cos * shear_y) * zoom_y
+    center_x, center_y = (width - 1) / 2, (height - 1) / 2
+    offset_x = center_x - a00 * center_x - a01 * center_y + uniform(5, shift) * width
+    offset_y = center_y - a10 * center_x - a11 * center_y + uniform(6, shift) * height
+    zeros = tf.zeros([batch])
+    transforms = tf.stack([a00, a01, offset_x, a10, a11, offset_y, zeros, zeros], axis=1)
+
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=shape[1:3], fill_value=0.0,
+        interpolation='BILINEAR', fill_mode='NEAREST')
+
+
+def make_dataset(paths, labels, num_classes, image_size=(256, 256), batch_size=32, training=False,
+                 shuffle=None, cache=None, shuffle_buffer=1024, augment=True, seed=42):
+    """Batches of ([0, 1] float images, one-hot labels). Training data is shuffled and augmented.
+
+    shuffle: put the files in a random but fixed order (default: when training).
+    cache: None (decode every epoch), '' (keep decoded images in memory) or a file prefix
+    for an on-disk cache. Only one pipeline may use a given file prefix at a time."""
+    dataset = tf.data.Dataset.from_tensor_slices((list(paths), list(labels)))
+    if shuffle is None:
+        shuffle = training
+    if shuffle:
+        # The order is fixed, so a cache built in the first epoch is valid for all of them
+        dataset = dataset.shuffle(len(paths), seed=seed, reshuffle_each_iteration=False)
+    dataset = dataset.map(lambda path, label: (load_image(path, image_size), label),
+                          num_parallel_calls=AUTOTUNE, deterministic=not training)
+    if cache is not None:
+        if cache:
+            os.makedirs(os.path.dirname(cache) or '.', exist_ok=True)
+        dataset = dataset.cache(cache)
+    if training:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed)
+    dataset = dataset.batch(batch_size)
+
+    def prepare(images, labels):
+        images = tf.cast(images, tf.float32) / 255.0
+        if training and augment:
+            images = random_affine(images)
+        return images, tf.one_hot(labels, num_classes)
+
+    return dataset.map(prepare, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+
+def measure_throughput(dataset, max_batches=None):
+    """Images per second read from a dataset or a Keras generator (which never ends, so pass max_batches)"""
+    images = 0
+    started = time.perf_counter()
+    for i, (batch, _) in enumerate(dataset):
+        images += len(batch)
+        if max_batches is not None and i + 1 >= max_batches:
+            break
+    return images / (time.perf_counter() - started)
+
+
+class EpochThroughput(tf.keras.callbacks.Callback):
+    """Prints training images per second after each epoch (validation time excluded)"""
+
+    def __init__(self, images_per_epoch):
+        super().__init__()
+        self.images_per_epoch = images_per_epoch
+        self.rates = []
+        self._started = None
+        self._seconds = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._started = time.perf_counter()
+        self._seconds = None
+
+    def on_test_begin(self, logs=None):
+        if self._started is not None and self._seconds is None:
+            self._seconds = time.perf_counter() - self._started
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = self._seconds if self._seconds is not None else time.perf_counter() - self._started
+        self.rates.append(self.images_per_epoch / seconds)
+        print(f"Epoch {epoch + 1}: {self.rates[-1]:.1f} training images/s")
@@ -0,0 +1,153 @@
+"""
+Cached backbone features for training only the classifier head
+
+With the backbone frozen, its pooled output for an image never changes, yet
+end-to-end training recomputes it for every image in every epoch. This
+module computes the features once and keeps them on disk, so the Dense and
+Dropout head can be trained on them directly. That takes minutes instead of
+hours.
+
+FeatureCache stores one row per (image content hash, view) in .npy shards
+(float16, opened memory-mapped). The shards live in a directory named after
+the backbone version: a hash of the backbone's architecture, weights and
+input size. Editing or renaming an image, or changing the backbone, never
+reuses stale features. View 0 is the image itself. Views 1..N are
+augmentations whose parameters are derived from the image hash and the view
+number, so a cached augmented view can always be recomputed exactly. Each
+shard is written under a temporary name and then renamed, so an interrupted
+run keeps every shard it completed.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from data_pipeline import AFFINE_DRAWS, AUTOTUNE, load_image, random_affine
+
+
+def file_hash(path):
+    """Content hash of an image file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:32]
+
+
+def backbone_version(backbone, image_size):
+    """Hash of the backbone's architecture, weights and input size"""
+    digest = hashlib.sha256(f"{backbone.name}:{image_size[0]}x{image_size[1]}".encode())
+    digest.update(backbone.to_json().encode())
+    for weights in backbone.get_weights():
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return f"{backbone.name}-{digest.hexdigest()[:16]}"
+
+
+def view_draws(image_hash, view):
+    """The fixed random_affine draws of an augmented view (view >= 1)"""
+    rng = np.random.default_rng([int(image_hash[:16], 16), view])
+    return rng.random(AFFINE_DRAWS, dtype=np.float32)
+
+
+class FeatureCache:
+    """Pooled features on disk for one backbone version, one row per (image hash, view)"""
+
+    def __init__(self, directory, version, dtype=np.float16):
+        self.directory = os.path.join(directory, version)
+        self.version = version
+        self.dtype = np.dtype(dtype)
+        os.makedirs(self.directory, exist_ok=True)
+        self._shards = []
+        self._index = {}  # key -> (shard number, row)
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith('shard_') and name.endswith('.keys.json'):
+                self._open_shard(os.path.join(self.directory, name[:-len('.keys.json')]))
+
+    @staticmethod
+    def key(image_hash, view):
+        return f"{image_hash}:{view}"
+
+    def _open_shard(self, prefix):
+        with open(prefix + '.keys.json') as f:
+            keys = json.load(f)
+        number = len(self._shards)
+        self._shards.append(np.load(prefix + '.npy', mmap_mode='r'))
+        for row, key in enumerate(keys):
+            self._index[key] = (number, row)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def missing(self, keys):
+        return [key for key in keys if key not in self._index]
+
+    def get(self, keys):
+        """Features for the given keys as a float32 (len(keys) x dim) array"""
+        features = np.empty((len(keys), self._shards[0].shape[1]), dtype=np.float32)
+        for i, key in enumerate(keys):
+            shard, row = self._index[key]
+            features[i] = self._shards[shard][row]
+        return features
+
+    def add(self, keys, features):
+        """Store features for new keys as one shard"""
+        prefix = os.path.join(self.directory, f"shard_{len(self._shards):05d}")
+        np.save(prefix + '.tmp.npy', np.asarray(features, dtype=self.dtype))
+        os.replace(prefix + '.tmp.npy', prefix + '.npy')
+        # The key list is written last: a shard without one is ignored and overwritten
+        with open(prefix + '.keys.tmp', 'w') as f:
+            json.dump(list(keys), f)
+        os.replace(prefix + '.keys.tmp', prefix + '.keys.json')
+        self._open_shard(prefix)
+
+
+def compute_features(cache, backbone, paths, views=0, image_size=(256, 256), batch_size=64,
+                     shard_size=4096, hashes=None):
+    """Make sure the cache holds view 0..views of every image; returns the keys, image by image.
+
+    Only missing (image, view) pairs are run through the backbone."""
+    hashes = hashes or [file_hash(path) for path in paths]
+    keys, todo = [], []
+    for path, image_hash in zip(paths, hashes):
+        for view in range(views + 1):
+            key = FeatureCache.key(image_hash, view)
+            keys.append(key)
+            if key not in cache:
+                # View 0 is marked with NaN draws
+                draws = view_draws(image_hash, view) if view else np.full(AFFINE_DRAWS, np.nan, dtype=np.float32)
+                todo.append((path, key, draws))
+    if not todo:
+        return keys
+
+    print(f"Computing {len(todo)} backbone features ({len(cache)} cached)...")
+    todo_paths, todo_keys, draws = zip(*todo)
+    dataset = tf.data.Dataset.from_tensor_slices((list(todo_paths), np.stack(draws)))
+    dataset = dataset.map(lambda path, draw: (tf.cast(load_image(path, image_size), tf.float32) / 255.0, draw),
+                          num_parallel_calls=AUTOTUNE)
+
+    def augment(images, draws):
+        # View 0 (NaN draws) is the image as-is
+        original = tf.math.is_nan(draws[:, 0])
+        augmented = random_affine(images, draws=tf.where(tf.math.is_nan(draws), 0.5, draws))
+        return tf.where(original[:, tf.newaxis, tf.newaxis, tf.newaxis], images, augmented)
+
+    dataset = dataset.batch(batch_size).map(augment, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+    pending_keys, pending = [], []
+    done = 0
+    for images in dataset:
+        features = backbone.predict_on_batch(images)
+        pending.append(np.asarray(features).reshape(len(features), -1))
+        pending_keys.extend(todo_keys[done:done + len(features)])
+        done += len(features)
+        if len(pending_keys) >= shard_size or done == len(todo_keys):
+            cache.add(pending_keys, np.concatenate(pending))
+            pending_keys, pending = [], []
+            print(f"  {done}/{len(todo_keys)} features computed")
+    return keys
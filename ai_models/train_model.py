@@ -1,9 +1,5 @@
 import tensorflow as tf
 from tensorflow.keras import layers
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.applications.inception_v3 import InceptionV3
-from tensorflow.keras.layers import GlobalAveragePooling2D, Dense, Dropout
-from tensorflow.keras.models import Model
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
 import numpy as np
@@ -11,16 +7,54 @@ import matplotlib.pyplot as plt
 import os
 from sklearn.model_selection import train_test_split
 import pathlib
+import json
 import pandas as pd
 from sklearn.metrics import classification_report, confusion_matrix
 import seaborn as sns
 
+from backbones import BACKBONES, create_backbone, create_head, create_model, feature_extractor
+from data_pipeline import EpochThroughput, list_dataset, make_dataset
+from feature_cache import FeatureCache, backbone_version, compute_features
+
 # Configuration
 BATCH_SIZE = 32
-IMG_HEIGHT = 256
-IMG_WIDTH = 256
 EPOCHS = 25
 
+# Backbone (see backbones.BACKBONES) and square input resolution (default: the backbone's
+# usual size). The exported model carries its input size; the backend reads it from there.
+BACKBONE = os.environ.get('BACKBONE', 'inception_v3')
+IMG_HEIGHT = IMG_WIDTH = int(os.environ.get('IMAGE_SIZE', BACKBONES[BACKBONE].default_size))
+
+# Class-per-folder PlantVillage images (PLANT_DATASET_DIR overrides)
+DATASET_DIR = os.environ.get(
+    'PLANT_DATASET_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PlantVillage', 'PlantVillage')
+)
+VALIDATION_SPLIT = 0.2
+
+# Decoded images are cached after the first epoch: 'disk' (files under INPUT_CACHE_DIR),
+# 'memory' (about 200 KB per image at 256x256) or 'none'
+INPUT_CACHE = os.environ.get('INPUT_CACHE', 'disk')
+INPUT_CACHE_DIR = os.environ.get('INPUT_CACHE_DIR', os.path.join('ai_models', 'cache'))
+
+# 'mixed_float16' for GPUs, 'mixed_bfloat16' for CPUs/TPUs with bfloat16 units; empty trains in float32.
+# The exported TFLite models are float32 either way.
+MIXED_PRECISION = os.environ.get('MIXED_PRECISION', '')
+
+# 'end_to_end' runs every image through the frozen backbone in every epoch. 'cached_features'
+# computes the pooled backbone features once (FEATURE_VIEWS augmented views per training
+# image plus the original), keeps them under FEATURE_CACHE_DIR and trains only the head on them.
+TRAINING_MODE = os.environ.get('TRAINING_MODE', 'end_to_end')
+FEATURE_VIEWS = int(os.environ.get('FEATURE_VIEWS', 4))
+FEATURE_CACHE_DIR = os.environ.get('FEATURE_CACHE_DIR', os.path.join('ai_models', 'cache', 'features'))
+HEAD_BATCH_SIZE = 128
+HEAD_EPOCHS = 60
+
+# Also export a fully integer-quantized model (int8 weights and activations, uint8 input/output)
+EXPORT_INT8 = True
+CALIBRATION_IMAGES = 200  # Representative validation images used to calibrate activation ranges
+COMPARISON_IMAGES = 500  # Validation images for the float vs int8 report
+
 # Define the classes (based on the dataset structure)
 CLASS_NAMES = [
     'Pepper__bell___Bacterial_spot',
@@ -40,115 +74,117 @@ CLASS_NAMES = [
     'Tomato_healthy'
 ]
 
-print("Setting up data generators...")
-
-# Data preprocessing and augmentation
-train_datagen = ImageDataGenerator(
-    rescale=1./255,
-    rotation_range=20,
-    width_shift_range=0.2,
-    height_shift_range=0.2,
-    horizontal_flip=True,
-    zoom_range=0.2,
-    shear_range=0.2,
-    validation_split=0.2
-)
+print("Setting up input pipeline...")
 
-validation_datagen = ImageDataGenerator(
-    rescale=1./255,
-    validation_split=0.2
-)
+if MIXED_PRECISION:
+    tf.keras.mixed_precision.set_global_policy(MIXED_PRECISION)
 
-print("Loading data from PlantVillage dataset...")
+def input_cache(subset):
+    if INPUT_CACHE == 'memory':
+        return ''
+    if INPUT_CACHE == 'disk':
+        return os.path.join(INPUT_CACHE_DIR, f"{subset}_{IMG_HEIGHT}x{IMG_WIDTH}")
+    return None
 
-# Load training data from the actual PlantVillage dataset
-train_generator = train_datagen.flow_from_directory(
-    r'C:\Users\dnitr\Desktop\COLLEGE\IOT 2025\quoderproject\ai_models\PlantVillage\PlantVillage',  # Absolute path to the actual dataset
-    target_size=(IMG_HEIGHT, IMG_WIDTH),
+print(f"Loading data from {DATASET_DIR}...")
+class_names, (train_paths, train_labels), (validation_paths, validation_labels) = list_dataset(
+    DATASET_DIR, VALIDATION_SPLIT)
+num_classes = len(class_names)
+
+# Parallel decode and resize, cached decoded images, batched augmentation and prefetch
+train_dataset = make_dataset(
+    train_paths, train_labels, num_classes,
+    image_size=(IMG_HEIGHT, IMG_WIDTH),
     batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='training',
-    shuffle=True
+    training=True,
+    cache=input_cache('training')
 )
-
-# Load validation data from the actual PlantVillage dataset
-validation_generator = validation_datagen.flow_from_directory(
-    r'C:\Users\dnitr\Desktop\COLLEGE\IOT 2025\quoderproject\ai_models\PlantVillage\PlantVillage',  # Absolute path to the actual dataset
-    target_size=(IMG_HEIGHT, IMG_WIDTH),
+validation_dataset = make_dataset(
+    validation_paths, validation_labels, num_classes,
+    image_size=(IMG_HEIGHT, IMG_WIDTH),
     batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation',
-    shuffle=True
+    shuffle=True,  # One fixed order, so calibration and comparison images span every class
+    cache=input_cache('validation')
 )
 
-print(f"Number of training samples: {train_generator.samples}")
-print(f"Number of validation samples: {validation_generator.samples}")
-print(f"Number of classes: {train_generator.num_classes}")
-
-# Create and compile model using transfer learning
-def create_model():
-    # Use InceptionV3 as base model (pre-trained on ImageNet)
-    base_model = InceptionV3(
-        include_top=False,
-        weights='imagenet',
-        input_shape=(IMG_HEIGHT, IMG_WIDTH, 3)
-    )
-    
-    # Freeze base model layers
-    base_model.trainable = False
-    
-    # Add custom classifier on top
-    x = base_model.output
-    x = GlobalAveragePooling2D()(x)
-    x = Dense(1024, activation='relu')(x)
-    x = Dropout(0.4)(x)
-    x = Dense(train_generator.num_classes, activation='softmax')(x)
-    
-    model = Model(inputs=base_model.input, outputs=x)
-    
+print(f"Number of training samples: {len(train_paths)}")
+print(f"Number of validation samples: {len(validation_paths)}")
+print(f"Number of classes: {num_classes}")
+
+# Compile with a low learning rate: only the new head is trained
+def compile_model(model):
     model.compile(
         optimizer=Adam(learning_rate=0.0001),
         loss='categorical_crossentropy',
         metrics=['accuracy']
     )
-    
     return model
 
-print("Creating model...")
-model = create_model()
-model.summary()
-
-print("Starting training...")
-# Define callbacks
-checkpoint = ModelCheckpoint(
-    'backend/plant_disease_model_best.h5',
-    monitor='val_accuracy',
-    verbose=1,
-    save_best_only=True,
-    mode='auto'
-)
-
 early = EarlyStopping(
     monitor='val_accuracy',
     min_delta=0,
     patience=5,
     verbose=1,
-    mode='auto'
+    mode='auto',
+    restore_best_weights=TRAINING_MODE == 'cached_features'
 )
 
-# Train the model
-history = model.fit(
-    train_generator,
-    steps_per_epoch=train_generator.samples // BATCH_SIZE,
-    epochs=EPOCHS,
-    validation_data=validation_generator,
-    validation_steps=validation_generator.samples // BATCH_SIZE,
-    callbacks=[checkpoint, early]
-)
+if TRAINING_MODE == 'cached_features':
+    print("Creating backbone...")
+    base_model = create_backbone(BACKBONE, (IMG_HEIGHT, IMG_WIDTH))
+    extractor = feature_extractor(base_model)
+    cache = FeatureCache(FEATURE_CACHE_DIR, backbone_version(base_model, (IMG_HEIGHT, IMG_WIDTH)))
+    print(f"Feature cache {cache.directory} ({len(cache)} features)")
+    
+    # Backbone forward passes happen here, once per image and view that is not cached yet
+    train_keys = compute_features(cache, extractor, train_paths, FEATURE_VIEWS, (IMG_HEIGHT, IMG_WIDTH))
+    validation_keys = compute_features(cache, extractor, validation_paths, 0, (IMG_HEIGHT, IMG_WIDTH))
+    train_features = cache.get(train_keys)
+    train_targets = tf.keras.utils.to_categorical(np.repeat(train_labels, FEATURE_VIEWS + 1), num_classes)
+    validation_features = cache.get(validation_keys)
+    validation_targets = tf.keras.utils.to_categorical(validation_labels, num_classes)
+    
+    print("Starting head training on cached features...")
+    head = compile_model(create_head(train_features.shape[1], num_classes))
+    head.summary()
+    history = head.fit(
+        train_features,
+        train_targets,
+        batch_size=HEAD_BATCH_SIZE,
+        epochs=HEAD_EPOCHS,
+        shuffle=True,
+        validation_data=(validation_features, validation_targets),
+        callbacks=[early, EpochThroughput(len(train_keys))]
+    )
+    
+    # The deployable model: backbone and trained head
+    model = compile_model(create_model(base_model, num_classes, head))
+    model.save('backend/plant_disease_model_best.h5')
+else:
+    print(f"Creating model ({BACKBONE}, {IMG_HEIGHT}x{IMG_WIDTH})...")
+    model = compile_model(create_model(create_backbone(BACKBONE, (IMG_HEIGHT, IMG_WIDTH)), num_classes))
+    model.summary()
+    
+    print("Starting training...")
+    checkpoint = ModelCheckpoint(
+        'backend/plant_disease_model_best.h5',
+        monitor='val_accuracy',
+        verbose=1,
+        save_best_only=True,
+        mode='auto'
+    )
+    
+    # Train the model
+    history = model.fit(
+        train_dataset,
+        epochs=EPOCHS,
+        validation_data=validation_dataset,
+        callbacks=[checkpoint, early, EpochThroughput(len(train_paths))]
+    )
 
 # Evaluate the model
 print("Evaluating model...")
-test_loss, test_acc = model.evaluate(validation_generator, verbose=2)
+test_loss, test_acc = model.evaluate(validation_dataset, verbose=2)
 print(f'Validation accuracy: {test_acc:.4f}')
 
 # Plot training history
@@ -176,6 +212,13 @@ os.makedirs('ai_models', exist_ok=True)
 plt.savefig('ai_models/training_history.png')
 plt.show()
 
+# Export a float32 copy of a mixed-precision model
+if MIXED_PRECISION:
+    tf.keras.mixed_precision.set_global_policy('float32')
+    trained_model = model
+    model = create_model(create_backbone(BACKBONE, (IMG_HEIGHT, IMG_WIDTH), weights=None), num_classes)
+    model.set_weights(trained_model.get_weights())
+
 # Convert to TensorFlow Lite model
 print("Converting to TensorFlow Lite...")
 converter = tf.lite.TFLiteConverter.from_keras_model(model)
@@ -212,9 +255,46 @@ output_data = interpreter.get_tensor(output_details[0]['index'])
 predicted_class = np.argmax(output_data[0])
 confidence = np.max(output_data[0])
 
-# Get class names from the generator
-class_names = list(train_generator.class_indices.keys())
 print(f"Predicted class: {class_names[predicted_class]}")
 print(f"Confidence: {confidence:.4f}")
 
+# Convert to a fully integer-quantized TensorFlow Lite model
+if EXPORT_INT8:
+    print("Converting to int8 TensorFlow Lite...")
+    
+    # Calibrate activation ranges on real images, preprocessed exactly as for training ([0, 1])
+    def representative_dataset():
+        for image, _ in validation_dataset.unbatch().take(CALIBRATION_IMAGES):
+            yield [image.numpy()[np.newaxis].astype(np.float32)]
+    
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = {tf.lite.Optimize.DEFAULT}
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    # uint8 input with scale 1/255 is the raw pixels, so the server skips float conversion
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+    tflite_int8_model = converter.convert()
+    
+    with open('backend/plant_disease_model_int8.tflite', 'wb') as f:
+        f.write(tflite_int8_model)
+    print("Int8 TensorFlow Lite model saved as 'backend/plant_disease_model_int8.tflite'")
+    print("Serve it with DISEASE_MODEL_PATH=plant_disease_model_int8.tflite")
+    
+    # Compare size, latency and accuracy of the two exports on the validation split
+    from compare_models import compare_models, print_report
+    images, labels = [], []
+    for batch_images, batch_labels in validation_dataset.take(-(-COMPARISON_IMAGES // BATCH_SIZE)):
+        images.append(batch_images.numpy())
+        labels.append(np.argmax(batch_labels.numpy(), axis=1))
+    report = compare_models(
+        ['backend/plant_disease_model.tflite', 'backend/plant_disease_model_int8.tflite'],
+        np.concatenate(images)[:COMPARISON_IMAGES],
+        np.concatenate(labels)[:COMPARISON_IMAGES]
+    )
+    print_report(report)
+    with open('ai_models/quantization_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    print("Comparison report saved as 'ai_models/quantization_report.json'")
+
 print("Model training and conversion completed successfully!")
\ No newline at end of file
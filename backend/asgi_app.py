@@ -0,0 +1,202 @@
+"""
+ASGI server for the backend
+
+Serves /data, /upload_image, /actuate, /dashboard_data, /plant_profile and
+/stream from an event loop, with the same request and response payloads as
+the Flask app. A connection only occupies a thread while work that blocks is
+running: the scoring path (local SQLite writes), disease inference and
+Firestore reads and writes run in a bounded thread pool, and request bodies,
+uploads and live streams are read and written by the loop. One process can
+therefore hold thousands of connected devices and dashboards. Every other
+route (/history, /models, /metrics, /health, /ready, ...) is passed to the
+Flask app.
+
+Usage:
+    uvicorn asgi_app:asgi_app --host 0.0.0.0 --port 5000
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi_app:asgi_app
+"""
+
+import base64
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from anyio import to_thread
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_etags
+
+import app as backend
+from interpreter_pool import PoolTimeout
+from request_profiler import ASGIProfilingMiddleware, run_profiled
+
+logger = backend.logger
+
+# Threads for blocking work; caps how many requests are inside it at once
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 40))
+# Threads for the routes served by the Flask app
+ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 10))
+
+
+async def read_json(request):
+    """Body of a JSON request; like Flask's get_json(), other content types are an error"""
+    if request.headers.get('content-type', '').split(';')[0].strip() != 'application/json':
+        raise ValueError("Expected an application/json body")
+    return json.loads(await request.body())
+
+
+async def receive_sensor_data(request):
+    try:
+        with backend.stage_latency.time('json_parse'):
+            sensor_data = await read_json(request)
+        return JSONResponse(await run_in_threadpool(run_profiled, backend.process_sensor_reading, sensor_data))
+    except Exception as e:
+        logger.error(f"Error processing sensor data: {str(e)}")
+        return JSONResponse({"error": "Failed to process sensor data"}, status_code=500)
+
+
+async def upload_image(request):
+    try:
+        form = None
+        if request.headers.get('content-type', '').startswith('multipart/form-data'):
+            form = await request.form()
+        if form is not None and isinstance(form.get('image'), UploadFile):
+            # Image uploaded as file
+            image_data = await form['image'].read()
+            device_id = form.get('device_id')
+        else:
+            # Image sent as base64 in JSON
+            data = await read_json(request)
+            if 'image' not in data:
+                return JSONResponse({"error": "No image provided"}, status_code=400)
+            image_data = base64.b64decode(data['image'])
+            device_id = data.get('device_id')
+
+        analysis = await run_in_threadpool(run_profiled, backend.process_disease_image, image_data,
+                                           device_id or backend.DEFAULT_DEVICE_ID)
+        return JSONResponse(analysis)
+    except PoolTimeout as e:
+        logger.warning(f"Disease model busy: {e}")
+        return JSONResponse({"error": "Disease model busy, retry later"}, status_code=503)
+    except Exception as e:
+        logger.error(f"Error processing image: {str(e)}")
+        return JSONResponse({"error": "Failed to process image"}, status_code=500)
+
+
+async def actuate(request):
+    try:
+        # Only queues and publishes, so it runs on the loop
+        response, status = run_profiled(backend.process_actuation, await read_json(request))
+        return JSONResponse(response, status_code=status)
+    except Exception as e:
+        logger.error(f"Error processing actuation command: {str(e)}")
+        return JSONResponse({"error": "Failed to process actuation command"}, status_code=500)
+
+
+async def dashboard_data(request):
+    device_id = request.query_params.get('device_id')
+    if backend.shared_state is None:
+        snapshot = run_profiled(backend.dashboard_view.get, device_id)
+    else:
+        # Shared snapshots are read from SQLite, which may wait on another worker's write
+        snapshot = await run_in_threadpool(run_profiled, backend.dashboard_view.get, device_id)
+    if snapshot is not None:
+        etag = snapshot.etag()
+        if parse_etags(request.headers.get('if-none-match')).contains(etag):
+            return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+        return Response(snapshot.body, media_type='application/json', headers={"ETag": f'"{etag}"'})
+
+    # No readings since startup: try Firebase, otherwise fall back to mock data
+    dashboard_data = await run_in_threadpool(run_profiled, backend.stored_dashboard_data)
+    logger.debug("Sending dashboard data: %s", dashboard_data)
+    return JSONResponse(dashboard_data)
+
+
+async def stream_updates(request):
+    subscriber = backend.event_broker.subscribe_async(
+        backend.stream_device_ids(request.query_params.getlist('device_id')))
+    return StreamingResponse(
+        backend.event_broker.stream_async(subscriber, heartbeat=backend.STREAM_HEARTBEAT),
+        media_type='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def get_plant_profile(request):
+    try:
+        return JSONResponse(await run_in_threadpool(run_profiled, backend.load_plant_profile))
+    except Exception as e:
+        logger.error(f"Error retrieving plant profile: {e}")
+        return JSONResponse({"error": "Failed to retrieve plant profile"}, status_code=500)
+
+
+async def save_plant_profile(request):
+    try:
+        response, status = await run_in_threadpool(run_profiled, backend.store_plant_profile, await read_json(request))
+        return JSONResponse(response, status_code=status)
+    except Exception as e:
+        logger.error(f"Error saving plant profile: {e}")
+        return JSONResponse({"error": "Failed to save plant profile"}, status_code=500)
+
+
+class RequestMetricsMiddleware:
+    """Request count and latency for the async routes, under the same endpoint names as Flask's.
+    Latency runs until the response starts, as it does for Flask (streams stay open afterwards)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+
+        async def send_with_metrics(message):
+            if message['type'] == 'http.response.start':
+                endpoint = scope.get('endpoint')
+                # Mounted Flask routes record their own metrics
+                if endpoint is not None and not isinstance(endpoint, WSGIMiddleware):
+                    name = getattr(endpoint, '__name__', 'unmatched')
+                    status = message['status']
+                    backend.request_latency.observe(time.perf_counter() - started, name)
+                    backend.request_counter.inc(name, scope['method'], str(status))
+                    if status >= 500:
+                        backend.error_counter.inc(name)
+            await send(message)
+
+        await self.app(scope, receive, send_with_metrics)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    to_thread.current_default_thread_limiter().total_tokens = ASGI_THREADS
+    logger.info(f"ASGI server started (pid {os.getpid()}, {ASGI_THREADS} threads for blocking work)")
+    yield
+
+
+asgi_app = Starlette(
+    routes=[
+        Route('/data', receive_sensor_data, methods=['POST']),
+        Route('/upload_image', upload_image, methods=['POST']),
+        Route('/actuate', actuate, methods=['POST']),
+        Route('/dashboard_data', dashboard_data, methods=['GET']),
+        Route('/stream', stream_updates, methods=['GET']),
+        Route('/plant_profile', get_plant_profile, methods=['GET']),
+        Route('/plant_profile', save_plant_profile, methods=['POST']),
+        Mount('/', app=WSGIMiddleware(backend.app, workers=ASGI_WSGI_THREADS))
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(RequestMetricsMiddleware)
+    ] + ([Middleware(ASGIProfilingMiddleware, profiler=backend.request_profiler)]
+         if backend.request_profiler.enabled else []),
+    lifespan=lifespan
+)
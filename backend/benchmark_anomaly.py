@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Anomaly Detection Benchmark
+
+Compares the streaming per-device detector with the IsolationForest path on
+synthetic multi-device sensor streams with injected anomalies and waterings
+(a lasting step up in soil moisture, which is not an anomaly). Reports
+per-reading latency, throughput, precision, recall, F1 and the false alarms
+in the readings after each watering. The streaming detector runs twice:
+on its own, and told about each watering as the app does when it sends the
+command.
+
+Usage:
+    python benchmark_anomaly.py [--devices 50] [--readings 400] [--waterings 2] [--json results.json]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from streaming_anomaly import StreamingAnomalyDetector
+
+FEATURES = ['soil_moisture', 'temperature', 'humidity', 'light_intensity']
+MIN_SCALE = [10.0, 0.3, 1.0, 10.0]
+
+
+# Readings after a watering in which flags count as watering false alarms
+SHIFT_WINDOW = 20
+
+
+def generate_streams(devices, readings, anomaly_rate, seed, waterings=0):
+    """Per-device streams with their own baselines, slow drying drift, noise, waterings and labelled spikes"""
+    rng = np.random.default_rng(seed)
+    streams = []
+    for d in range(devices):
+        base = np.array([rng.uniform(350, 900), rng.uniform(18, 30), rng.uniform(40, 75), rng.uniform(150, 850)])
+        noise = np.array([15, 0.4, 1.5, 25])
+        drift = np.array([-rng.uniform(0.2, 1.0), 0, 0, 0])
+        t = np.arange(readings)[:, None]
+        X = base + drift * t + rng.normal(0, 1, (readings, 4)) * noise
+        # Daily light cycle
+        X[:, 3] += 80 * np.sin(2 * np.pi * t[:, 0] / 144)
+        # Waterings: soil moisture steps up and stays up
+        watered = np.zeros(readings, dtype=bool)
+        watered[rng.choice(np.arange(20, readings), min(waterings, readings - 20), replace=False)] = True
+        X[:, 0] += np.cumsum(watered * rng.uniform(300, 450, readings))
+        labels = np.zeros(readings, dtype=bool)
+        spikes = rng.random(readings) < anomaly_rate
+        spikes[:10] = False  # Leave the warmup clean
+        feature = rng.integers(0, 4, readings)
+        sign = rng.choice([-1, 1], readings)
+        X[spikes, feature[spikes]] += sign[spikes] * noise[feature[spikes]] * rng.uniform(8, 15, spikes.sum())
+        labels[spikes] = True
+        streams.append((f"device-{d}", X, labels, watered))
+    return streams
+
+
+def interleave(streams):
+    """Readings in arrival order: one from each device per tick"""
+    readings = len(streams[0][1])
+    for i in range(readings):
+        for device_id, X, labels, watered in streams:
+            yield device_id, X[i], labels[i], i, watered[i]
+
+
+def train_isolation_forest():
+    """Same synthetic training as app.train_models"""
+    np.random.seed(42)
+    days = np.arange(1, 31)
+    soil_moisture = 1000 - (days * 15) + np.random.normal(0, 50, 30)
+    temperature = 25 + np.random.normal(0, 5, 30)
+    humidity = 60 + np.random.normal(0, 10, 30)
+    light = 500 + np.random.normal(0, 100, 30)
+    model = IsolationForest(contamination="auto", random_state=42)
+    model.fit(np.column_stack((soil_moisture, temperature, humidity, light)))
+    return model
+
+
+def evaluate(predicted, actual, after_watering):
+    predicted = np.asarray(predicted)
+    actual = np.asarray(actual)
+    after_watering = np.asarray(after_watering)
+    tp = int(np.sum(predicted & actual))
+    fp = int(np.sum(predicted & ~actual))
+    fn = int(np.sum(~predicted & actual))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    waterings = int(np.sum(after_watering == 0))
+    shift_alarms = int(np.sum(predicted & ~actual & (after_watering >= 0)))
+    return {"precision": precision, "recall": recall, "f1": f1, "flagged": int(predicted.sum()),
+            "waterings": waterings, "false_alarms_per_watering": shift_alarms / waterings if waterings else 0.0}
+
+
+def readings_since_watering(streams):
+    """Per interleaved reading: readings since its device's last watering (-1 outside SHIFT_WINDOW)"""
+    last = {}
+    since = []
+    for device_id, _, _, index, watered in interleave(streams):
+        if watered:
+            last[device_id] = index
+        offset = index - last.get(device_id, -SHIFT_WINDOW - 1)
+        since.append(offset if offset < SHIFT_WINDOW else -1)
+    return since
+
+
+def run_isolation_forest(streams, model):
+    predicted, actual = [], []
+    started = time.perf_counter()
+    for _, row, label, index, _ in interleave(streams):
+        # Mirrors detect_anomalies: one predict call per reading after the 10-reading gate
+        anomaly = index + 1 >= 10 and model.predict(row.reshape(1, -1))[0] == -1
+        predicted.append(bool(anomaly))
+        actual.append(bool(label))
+    elapsed = time.perf_counter() - started
+    return elapsed, evaluate(predicted, actual, readings_since_watering(streams))
+
+
+def run_streaming(streams, threshold, announce_waterings=False):
+    detector = StreamingAnomalyDetector(MIN_SCALE, threshold=threshold)
+    predicted, actual = [], []
+    started = time.perf_counter()
+    for device_id, row, label, _, watered in interleave(streams):
+        if watered and announce_waterings:
+            detector.expect_shift(device_id, [0])
+        predicted.append(detector.update(device_id, row.tolist())[0])
+        actual.append(bool(label))
+    elapsed = time.perf_counter() - started
+    return elapsed, evaluate(predicted, actual, readings_since_watering(streams))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming vs IsolationForest anomaly detection")
+    parser.add_argument('--devices', type=int, default=50)
+    parser.add_argument('--readings', type=int, default=400, help="Readings per device")
+    parser.add_argument('--anomaly-rate', type=float, default=0.01)
+    parser.add_argument('--waterings', type=int, default=2, help="Level shifts (waterings) per device")
+    parser.add_argument('--threshold', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    streams = generate_streams(args.devices, args.readings, args.anomaly_rate, args.seed, args.waterings)
+    total = args.devices * args.readings
+
+    print("Anomaly Detection Benchmark")
+    print("=" * 30)
+    print(f"{args.devices} devices x {args.readings} readings, anomaly rate {args.anomaly_rate}, "
+          f"{args.waterings} waterings per device")
+
+    results = {}
+    model = train_isolation_forest()
+    for name, (elapsed, quality) in (
+        ("isolation_forest", run_isolation_forest(streams, model)),
+        ("streaming", run_streaming(streams, args.threshold)),
+        ("streaming, waterings announced", run_streaming(streams, args.threshold, announce_waterings=True)),
+    ):
+        results[name] = dict(quality, readings=total, seconds=elapsed,
+                             us_per_reading=elapsed / total * 1e6, readings_per_second=total / elapsed)
+        print(f"\n{name}")
+        print(f"  {results[name]['us_per_reading']:.1f} us/reading ({results[name]['readings_per_second']:.0f} readings/s)")
+        print(f"  precision {quality['precision']:.3f}  recall {quality['recall']:.3f}  f1 {quality['f1']:.3f}  flagged {quality['flagged']}")
+        print(f"  {quality['false_alarms_per_watering']:.2f} false alarms per watering")
+
+    speedup = results["isolation_forest"]["seconds"] / results["streaming"]["seconds"]
+    print(f"\nStreaming detector is {speedup:.0f}x faster")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+ASGI vs WSGI Connection Benchmark
+
+Starts the backend once as the WSGI server (gunicorn, gthread worker) and
+once as the ASGI server (gunicorn, uvicorn worker), one worker process each,
+and loads it with many connections at the same time: dashboards holding a
+/stream connection open, devices each keeping a connection and posting a
+reading every --interval seconds, and dashboards polling /dashboard_data
+with ETags. Reports how many streams were accepted, reading throughput,
+p50/p95/p99 latency, timeouts, stream events delivered and peak RSS.
+
+The client is asyncio over plain sockets so that it can hold thousands of
+connections itself; it raises its open-file limit, which the servers inherit.
+
+Usage:
+    python benchmark_asgi.py
+    python benchmark_asgi.py --streams 2000 --devices 1000 --readings 5 --json asgi.json
+    python benchmark_asgi.py --modes asgi --streams 5000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import time
+
+import numpy as np
+
+from benchmark_suite import HttpTarget, ServerProcess, sensor_payload
+
+
+async def open_connection(port):
+    return await asyncio.open_connection('127.0.0.1', port, limit=1 << 20)
+
+
+async def read_head(reader):
+    """Status code and headers of a response"""
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            return status, headers
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+async def request(reader, writer, method, path, body=None, headers=None):
+    """One request on a keep-alive connection; returns (status, headers)"""
+    lines = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    if body is not None:
+        lines.extend(["Content-Type: application/json", f"Content-Length: {len(body)}"])
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+    status, response_headers = await read_head(reader)
+    await reader.readexactly(int(response_headers.get('content-length', 0)))
+    return status, response_headers
+
+
+class Load:
+    """Connections opened against one server and what they observed"""
+
+    def __init__(self, port, args):
+        self.port = port
+        self.args = args
+        self.streams_open = 0
+        self.events = 0
+        self.latencies = []
+        self.errors = 0
+        self.dashboard_latencies = []
+
+    async def stream(self, device_id, connected):
+        try:
+            reader, writer = await open_connection(self.port)
+            writer.write(f"GET /stream?device_id={device_id} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode())
+            status, _ = await asyncio.wait_for(read_head(reader), self.args.timeout)
+            first = await asyncio.wait_for(reader.readuntil(b"\n\n"), self.args.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+            connected.append(False)
+            return
+        if status != 200 or b"retry" not in first:
+            connected.append(False)
+            return
+        self.streams_open += 1
+        connected.append(True)
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                self.events += chunk.count(b"event: reading")
+        finally:
+            writer.close()
+
+    async def device(self, rng, index):
+        try:
+            reader, writer = await open_connection(self.port)
+        except OSError:
+            self.errors += self.args.readings
+            return
+        await asyncio.sleep(rng.uniform(0, self.args.interval))
+        for _ in range(self.args.readings):
+            payload = sensor_payload(rng, self.args.devices)
+            payload["device_id"] = f"plant-{index}"
+            started = time.perf_counter()
+            try:
+                status, _ = await asyncio.wait_for(
+                    request(reader, writer, 'POST', '/data', json.dumps(payload).encode()), self.args.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+                self.errors += 1
+                # The connection may be mid-response; start a new one
+                writer.close()
+                try:
+                    reader, writer = await open_connection(self.port)
+                except OSError:
+                    continue
+            else:
+                self.latencies.append(time.perf_counter() - started)
+                if status != 200:
+                    self.errors += 1
+            await asyncio.sleep(self.args.interval)
+        writer.close()
+
+    async def dashboard(self, rng, index):
+        try:
+            reader, writer = await open_connection(self.port)
+        except OSError:
+            return
+        etag = None
+        await asyncio.sleep(rng.uniform(0, self.args.interval))
+        for _ in range(self.args.readings):
+            started = time.perf_counter()
+            try:
+                _, headers = await asyncio.wait_for(request(
+                    reader, writer, 'GET', f'/dashboard_data?device_id=plant-{index}',
+                    headers={"If-None-Match": etag} if etag else None), self.args.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+                self.errors += 1
+                break
+            etag = headers.get('etag', etag)
+            self.dashboard_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(self.args.interval)
+        writer.close()
+
+    async def run(self):
+        rng = random.Random(self.args.seed)
+        connected = []
+        streams = [asyncio.ensure_future(self.stream(f"plant-{i % self.args.devices}", connected))
+                   for i in range(self.args.streams)]
+        # Wait until every stream is connected or has given up
+        deadline = time.perf_counter() + self.args.timeout + 5
+        while len(connected) < self.args.streams and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+
+        started = time.perf_counter()
+        clients = [self.device(random.Random(rng.random()), i) for i in range(self.args.devices)]
+        clients += [self.dashboard(random.Random(rng.random()), i) for i in range(self.args.dashboards)]
+        await asyncio.gather(*clients)
+        elapsed = time.perf_counter() - started
+
+        # Let the last events arrive, then hang up
+        await asyncio.sleep(0.5)
+        for task in streams:
+            task.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+        return elapsed
+
+
+def percentile_ms(latencies, q):
+    return float(np.percentile(np.array(latencies) * 1000, q)) if latencies else None
+
+
+def run_mode(mode, args):
+    server = ServerProcess(workers=1, asgi=(mode == 'asgi'))
+    try:
+        load = Load(server.port, args)
+        elapsed = asyncio.run(load.run())
+        peak_rss = HttpTarget(server.url, server.process.pid).peak_rss()
+    finally:
+        server.stop()
+    readings = args.devices * args.readings
+    return {
+        "streams_requested": args.streams,
+        "streams_open": load.streams_open,
+        "readings": readings,
+        "readings_ok": len(load.latencies),
+        "errors": load.errors,
+        "seconds": elapsed,
+        "throughput": len(load.latencies) / elapsed,
+        "p50_ms": percentile_ms(load.latencies, 50),
+        "p95_ms": percentile_ms(load.latencies, 95),
+        "p99_ms": percentile_ms(load.latencies, 99),
+        "dashboard_p95_ms": percentile_ms(load.dashboard_latencies, 95),
+        "stream_events": load.events,
+        "peak_rss_mb": peak_rss / (1024 * 1024) if peak_rss else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the WSGI and ASGI servers under many connections")
+    parser.add_argument('--modes', default='wsgi,asgi')
+    parser.add_argument('--streams', type=int, default=1000, help="Open /stream connections")
+    parser.add_argument('--devices', type=int, default=500, help="Connected devices posting readings")
+    parser.add_argument('--dashboards', type=int, default=200, help="Dashboards polling /dashboard_data")
+    parser.add_argument('--readings', type=int, default=4, help="Requests per device and dashboard")
+    parser.add_argument('--interval', type=float, default=1.0, help="Seconds between a client's requests")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Seconds before a request counts as failed")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    # Room for every connection on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    print("ASGI vs WSGI Connection Benchmark")
+    print("=" * 30)
+    print(f"{args.streams} streams, {args.devices} devices, {args.dashboards} dashboards, "
+          f"{args.readings} requests each every {args.interval}s")
+
+    results = {"config": vars(args), "modes": {}}
+    for mode in args.modes.split(','):
+        row = run_mode(mode, args)
+        results["modes"][mode] = row
+        p50 = f"{row['p50_ms']:.1f}" if row['p50_ms'] is not None else "n/a"
+        p99 = f"{row['p99_ms']:.1f}" if row['p99_ms'] is not None else "n/a"
+        rss = f"{row['peak_rss_mb']:.0f} MB" if row["peak_rss_mb"] else "n/a"
+        print(f"{mode:<5} streams {row['streams_open']:5d}/{row['streams_requested']}  "
+              f"readings {row['readings_ok']:5d}/{row['readings']}  {row['throughput']:7.1f} req/s  "
+              f"p50 {p50} ms  p99 {p99} ms  errors {row['errors']}  events {row['stream_events']}  "
+              f"peak RSS {rss}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Disease Detection Benchmark
+
+Measures /upload_image inference throughput (images/s) and latency for 1 to N
+concurrent uploads, comparing a single shared interpreter, a pool of
+interpreters, and the pool with dynamic micro-batching. The average batch
+size shows whether concurrent uploads share batches, also at concurrency up
+to the pool size. Also times repeat
+uploads answered from the result cache. Uses plant_disease_model.tflite when given, otherwise a small
+stand-in CNN with the same input and output shapes.
+
+Usage:
+    python benchmark_disease.py [--model plant_disease_model.tflite] [--requests 64] [--pool-size 4] [--json results.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+INPUT_SIZE = 256
+NUM_CLASSES = 15
+
+
+def build_stand_in_model(path):
+    """Convert a small CNN with the production input/output shapes to TFLite"""
+    import tensorflow as tf
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(INPUT_SIZE, INPUT_SIZE, 3)),
+        tf.keras.layers.Conv2D(16, 3, strides=2, activation='relu'),
+        tf.keras.layers.Conv2D(32, 3, strides=2, activation='relu'),
+        tf.keras.layers.Conv2D(64, 3, strides=2, activation='relu'),
+        tf.keras.layers.Conv2D(64, 3, strides=2, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(NUM_CLASSES, activation='softmax')
+    ])
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    return path
+
+
+def make_jpeg(size=(1024, 768), seed=0):
+    """A camera-sized JPEG with some texture"""
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8)
+    image = Image.fromarray(pixels).resize(size)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def run_level(analyze, image, concurrency, requests):
+    """Fire `requests` analyses from `concurrency` threads; returns (images/s, latencies)"""
+    latencies = []
+
+    def one(_):
+        started = time.perf_counter()
+        analyze(image)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, latencies
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent disease detection")
+    parser.add_argument('--model', help="TFLite model (default: generated stand-in)")
+    parser.add_argument('--requests', type=int, default=64, help="Uploads per concurrency level")
+    parser.add_argument('--max-concurrency', type=int, default=(os.cpu_count() or 1) * 2)
+    parser.add_argument('--num-threads', type=int, default=1, help="Threads per interpreter")
+    parser.add_argument('--pool-size', type=int, default=os.cpu_count() or 1, help="Interpreters in the pool")
+    parser.add_argument('--batch-max', type=int, default=8, help="Largest micro-batch")
+    parser.add_argument('--batch-wait-ms', type=float, default=5.0, help="Longest wait for a micro-batch to fill")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    model_path = args.model or build_stand_in_model(os.path.join(tempfile.mkdtemp(), 'stand_in.tflite'))
+
+    # Load the app with the model and without external services
+    os.environ['DISEASE_MODEL_PATH'] = os.path.abspath(model_path)
+    os.environ['DISEASE_NUM_THREADS'] = str(args.num_threads)
+    os.environ.setdefault('STARTUP_MODE', 'eager')
+    os.environ.setdefault('HISTORY_DB_PATH', '')
+    os.environ.setdefault('MODEL_REGISTRY_DIR', tempfile.mkdtemp())
+    import logging
+    import app as backend
+    from inference_batcher import MicroBatcher
+    from interpreter_pool import InterpreterPool
+    logging.getLogger('app').setLevel(logging.WARNING)
+    backend.wait_until_ready(300)
+
+    image = make_jpeg()
+    pool_size = args.pool_size
+    levels = sorted({1, 2, 4, 8, pool_size, args.max_concurrency} - {0})
+    levels = [level for level in levels if level <= args.max_concurrency]
+
+    print("Disease Detection Benchmark")
+    print("=" * 30)
+    print(f"model {model_path}, {len(image) // 1024} KB JPEG, {args.requests} uploads per level")
+
+    # Every upload below is the same image; measure the model, not the cache
+    cache = backend.disease_cache
+    backend.disease_cache = None
+
+    results = {}
+    for label, size, batch_max in (("single_interpreter", 1, 1), ("pool", pool_size, 1),
+                                   ("pool_batched", pool_size, args.batch_max)):
+        if backend.disease_batcher is not None:
+            backend.disease_batcher.stop()
+        backend.disease_model = InterpreterPool.from_model_path(os.environ['DISEASE_MODEL_PATH'], size,
+                                                                args.num_threads, batch_max)
+        backend.disease_batcher = None
+        if batch_max > 1:
+            backend.disease_batcher = MicroBatcher(backend.run_disease_batch, batch_max,
+                                                   args.batch_wait_ms / 1000, workers=size)
+        backend.analyze_plant_disease(image)  # Warm up
+        print(f"\n{label} ({size} interpreters x {args.num_threads} threads, batches up to {batch_max})")
+        results[label] = []
+        for concurrency in levels:
+            before = backend.disease_model.stats()
+            batched_before = backend.disease_batcher.stats() if backend.disease_batcher is not None else None
+            throughput, latencies = run_level(backend.analyze_plant_disease, image, concurrency, args.requests)
+            after = backend.disease_model.stats()
+            checkouts = after["checkouts"] - before["checkouts"]
+            avg_batch = 1.0
+            if batched_before is not None:
+                batched_after = backend.disease_batcher.stats()
+                avg_batch = ((batched_after["items"] - batched_before["items"]) /
+                             max(batched_after["batches"] - batched_before["batches"], 1))
+            row = {
+                "concurrency": concurrency,
+                "images_per_second": throughput,
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "mean_ms": statistics.mean(latencies) * 1000,
+                "pool_wait_avg_ms": (after["wait_total"] - before["wait_total"]) / checkouts * 1000,
+                "invocations": checkouts,
+                "avg_batch_size": avg_batch
+            }
+            results[label].append(row)
+            print(f"  c={concurrency:<3} {throughput:7.1f} img/s  p50 {row['p50_ms']:7.1f} ms  "
+                  f"p95 {row['p95_ms']:7.1f} ms  pool wait avg {row['pool_wait_avg_ms']:6.1f} ms  invokes {checkouts}  "
+                  f"avg batch {avg_batch:4.1f}")
+
+    if cache is not None:
+        backend.disease_cache = cache
+        backend.analyze_plant_disease(image)
+        repeats = 1000
+        started = time.perf_counter()
+        for _ in range(repeats):
+            backend.analyze_plant_disease(image)
+        cached_us = (time.perf_counter() - started) / repeats * 1e6
+        results["cached_repeat_us"] = cached_us
+        print(f"\nrepeat upload from cache: {cached_us:.1f} us ({cache.stats()['hit_rate']:.0%} hit rate)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"config": vars(args), "cpu_count": os.cpu_count(), "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
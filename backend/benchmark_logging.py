@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Logging Benchmark
+
+Measures what logging costs per sensor reading. First the log calls alone:
+the six f-string logger.info calls /data used to make per reading with a
+synchronous stream handler, against the single structured call written
+synchronously, through the background queue, and through the queue with
+sampling. Then whole /data requests through the Flask test client with the
+same handler setups, against logging switched off as the floor, both with
+a fast sink (a temporary file) and a sink whose writes block for a while
+(like stderr piped to a busy log collector). Request timings interleave the
+setups over several rounds and report the median round.
+
+Usage:
+    python benchmark_logging.py [--readings 5000] [--requests 2000] [--sink-latency-us 200] [--json results.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from structured_logging import StructuredFormatter, configure_logging
+
+PAYLOAD = {
+    "device_id": "plant-7",
+    "soil_moisture": 612,
+    "temperature": 23.4,
+    "humidity": 58.1,
+    "light_intensity": 640,
+    "timestamp": 81234567
+}
+PREDICTION = {"water_now": False, "confidence": 0.0123, "next_watering": 1760000000.0}
+
+
+class SlowStream:
+    """A log sink whose every write blocks for `latency` seconds"""
+
+    def __init__(self, stream, latency):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, text):
+        time.sleep(self.latency)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def legacy_calls(logger, sensor_data):
+    """The per-reading log calls of receive_sensor_data and log_data before structured logging"""
+    logger.info(f"Received sensor data: {sensor_data}")
+    logger.info(f"Sensor Data: {sensor_data}")
+    logger.info(f"Health Score: {83.33333333333333}")
+    logger.info(f"Watering Prediction: {PREDICTION}")
+    logger.info(f"Anomaly Detected: {False}")
+    logger.info(f"History for {sensor_data['device_id']} now contains {100} entries")
+
+
+def structured_calls(logger, sensor_data):
+    """The per-reading log calls now"""
+    logger.debug("Received sensor data: %s", sensor_data)
+    logger.info("Reading scored", extra={
+        "category": "reading",
+        "device_id": sensor_data["device_id"],
+        "health_score": 83.3,
+        "water_now": False,
+        "anomaly": False,
+        "history": 100
+    })
+    logger.debug("Reading payload %s, watering prediction %s", sensor_data, PREDICTION)
+
+
+def install(mode, output):
+    """Point the root logger at the output file: 'sync', 'queue', 'sampled' or 'off'"""
+    logging.disable(logging.NOTSET)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    if mode == 'off':
+        logging.disable(logging.CRITICAL)
+        return None
+    if mode == 'sync':
+        handler = logging.StreamHandler(output)
+        handler.setFormatter(StructuredFormatter())
+        root.addHandler(handler)
+        return None
+    sample_rates = {"reading": 0.1} if mode == 'sampled' else None
+    return configure_logging(logging.INFO, sample_rates=sample_rates, stream=output, force=True)
+
+
+def time_calls(calls, mode, readings, output):
+    pipeline = install(mode, output)
+    logger = logging.getLogger('app')
+    started = time.perf_counter()
+    for _ in range(readings):
+        calls(logger, PAYLOAD)
+    elapsed = time.perf_counter() - started
+    if pipeline is not None:
+        pipeline.stop()
+    return elapsed / readings * 1e6
+
+
+def time_requests(client, mode, requests, output):
+    pipeline = install(mode, output)
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for i in range(requests):
+        payload = dict(PAYLOAD, device_id=f"plant-{i % 20}", soil_moisture=rng.randint(300, 900))
+        client.post('/data', json=payload)
+    elapsed = time.perf_counter() - started
+    if pipeline is not None:
+        pipeline.stop()
+    return elapsed / requests * 1e6
+
+
+def median_request_us(client, modes, requests, rounds, output):
+    """Median per-request time of each mode, running the modes in turn in every round"""
+    per_round = {mode: [] for mode in modes}
+    for _ in range(rounds):
+        for mode in modes:
+            per_round[mode].append(time_requests(client, mode, max(1, requests // rounds), output))
+    return {mode: sorted(times)[len(times) // 2] for mode, times in per_round.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-reading logging cost")
+    parser.add_argument('--readings', type=int, default=5000, help="Iterations of the log calls alone")
+    parser.add_argument('--requests', type=int, default=2000, help="/data requests per handler setup")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--sink-latency-us', type=float, default=200, help="Blocking time per write of the slow sink")
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    print("Logging Benchmark")
+    print("=" * 30)
+    results = {"calls_us": {}, "request_us": {}}
+    with tempfile.TemporaryFile('w') as output:
+        for name, calls, mode in (("legacy f-strings, sync", legacy_calls, 'sync'),
+                                  ("structured, sync", structured_calls, 'sync'),
+                                  ("structured, queue", structured_calls, 'queue'),
+                                  ("structured, queue, 10% sampled", structured_calls, 'sampled')):
+            results["calls_us"][name] = time_calls(calls, mode, args.readings, output)
+            print(f"log calls per reading  {name:<32} {results['calls_us'][name]:7.1f} us")
+
+        os.environ.setdefault('HISTORY_DB_PATH', '')
+        os.environ.setdefault('MODEL_REGISTRY_DIR', tempfile.mkdtemp())
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import app as backend
+        backend.wait_until_ready(300)
+        if backend.log_pipeline is not None:
+            backend.log_pipeline.stop()
+        client = backend.app.test_client()
+        time_requests(client, 'off', min(200, args.requests), output)  # Warm up
+
+        modes = ('off', 'sync', 'queue', 'sampled')
+        for sink, stream in (("file", output), ("slow", SlowStream(output, args.sink_latency_us / 1e6))):
+            timings = median_request_us(client, modes, args.requests, args.rounds, stream)
+            results["request_us"][sink] = timings
+            for mode in modes:
+                print(f"/data request, {sink} sink  {mode:<29} {timings[mode]:7.1f} us "
+                      f"(logging {timings[mode] - timings['off']:+.1f} us)")
+    logging.disable(logging.NOTSET)
+
+    legacy = results["calls_us"]["legacy f-strings, sync"]
+    current = results["calls_us"]["structured, queue"]
+    print(f"Per-reading logging cost: {legacy:.1f} us -> {current:.1f} us ({legacy / current:.1f}x less)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Image Preprocessing Benchmark
+
+Compares the original preprocessing (full decode, resize, float32 copy,
+expand_dims, divide) with ImagePreprocessor (draft-mode decode into a reused
+buffer) on camera-sized JPEGs. Reports per-image latency, peak numpy
+allocations and how far the outputs differ.
+
+Usage:
+    python benchmark_preprocessing.py [--iterations 50] [--json results.json]
+"""
+
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from image_preprocessing import ImagePreprocessor
+
+SIZES = [(640, 480), (1600, 1200), (3264, 2448)]
+
+
+def make_jpeg(size, seed=0):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (size[1] // 16, size[0] // 16, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).resize(size).save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def legacy_preprocess(image_data):
+    """The preprocessing analyze_plant_disease used before ImagePreprocessor"""
+    image = Image.open(io.BytesIO(image_data))
+    image = image.resize((256, 256))
+    image_array = np.array(image, dtype=np.float32)
+    image_array = np.expand_dims(image_array, axis=0)
+    image_array = image_array / 255.0
+    return image_array[0]
+
+
+def measure(function, image_data, iterations):
+    function(image_data)  # Warm up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function(image_data)
+    latency = (time.perf_counter() - started) / iterations
+
+    tracemalloc.start()
+    function(image_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latency, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark disease model preprocessing")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--json', help="Write results to this file")
+    args = parser.parse_args()
+
+    preprocessor = ImagePreprocessor((256, 256))
+
+    print("Image Preprocessing Benchmark")
+    print("=" * 30)
+    results = []
+    for size in SIZES:
+        image_data = make_jpeg(size)
+        legacy_latency, legacy_peak = measure(legacy_preprocess, image_data, args.iterations)
+        latency, peak = measure(preprocessor.preprocess, image_data, args.iterations)
+        difference = np.abs(legacy_preprocess(image_data) - preprocessor.preprocess(image_data))
+        row = {
+            "size": f"{size[0]}x{size[1]}",
+            "jpeg_kb": len(image_data) / 1024,
+            "legacy_ms": legacy_latency * 1000,
+            "preprocessor_ms": latency * 1000,
+            "speedup": legacy_latency / latency,
+            "legacy_peak_kb": legacy_peak / 1024,
+            "preprocessor_peak_kb": peak / 1024,
+            "mean_abs_difference": float(difference.mean()),
+            "max_abs_difference": float(difference.max())
+        }
+        results.append(row)
+        print(f"{row['size']:>10}: {row['legacy_ms']:7.2f} ms -> {row['preprocessor_ms']:6.2f} ms "
+              f"({row['speedup']:.1f}x), peak numpy {row['legacy_peak_kb']:7.0f} KB -> "
+              f"{row['preprocessor_peak_kb']:5.0f} KB, mean |diff| {row['mean_abs_difference']:.4f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Backend Benchmark Suite
+
+Drives /data, /dashboard_data, /plant_profile and /upload_image with
+synthetic payloads, either in-process through the Flask test client or over
+HTTP against a real server (started here, or an existing one via --url).
+With --workers N the server is gunicorn with N worker processes, and with
+--asgi it is the ASGI server (asgi_app.py) under uvicorn. --scaling 1,2,4
+starts gunicorn once per worker count and reports how throughput scales
+with the workers, next to the number of cores (the load generator runs on
+the same machine and needs cores of its own).
+Reports throughput, p50/p95/p99 latency, errors and peak RSS per scenario
+and saves the results as JSON; --compare prints the change against an
+earlier run, e.g. the previous commit.
+
+Usage:
+    python benchmark_suite.py --target client
+    python benchmark_suite.py --target server --json results.json --compare baseline.json
+    python benchmark_suite.py --target server --workers 4 --scenarios data,dashboard
+    python benchmark_suite.py --target server --asgi
+    python benchmark_suite.py --scaling 1,2,4 --scenarios data,dashboard
+    python benchmark_suite.py --url http://localhost:5000 --scenarios data,dashboard
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS = ('data', 'dashboard', 'profile_get', 'profile_post', 'upload_image')
+
+
+# Synthetic payloads
+
+def sensor_payload(rng, devices):
+    """The JSON body built by esp32_firmware/plant_monitor.ino, plus a device ID"""
+    return {
+        "device_id": f"plant-{rng.randrange(devices)}",
+        "soil_moisture": rng.randint(250, 950),
+        "temperature": round(rng.uniform(18, 32), 1),
+        "humidity": round(rng.uniform(35, 80), 1),
+        "light_intensity": rng.randint(50, 1000),
+        "timestamp": rng.randint(0, 10 ** 8)  # millis() since boot
+    }
+
+
+def profile_payload(rng):
+    """A profile as saved by the dashboard's plant profile form"""
+    return {
+        "plantName": f"Bench Plant {rng.randrange(1000)}",
+        "plantType": rng.choice(["Pothos", "Tomato", "Basil", "Fern"]),
+        "wateringPref": rng.choice(["Low", "Medium", "High"]),
+        "lightPref": rng.choice(["Low", "Low to Medium", "Bright"]),
+        "notes": "Benchmark update"
+    }
+
+
+def leaf_jpeg(size=(1024, 768), seed=0):
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (size[1] // 16, size[0] // 16, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).resize(size).save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def unique_image(base, i):
+    """Same picture, different bytes: decoders ignore data after the JPEG end marker,
+    so every upload misses the content-hash cache"""
+    return base + i.to_bytes(8, 'big')
+
+
+# Clients
+
+class TestClientTarget:
+    """Requests through Flask's test client in this process"""
+
+    name = 'client'
+
+    def __init__(self):
+        os.environ.setdefault('HISTORY_DB_PATH', '')
+        os.environ.setdefault('MODEL_REGISTRY_DIR', tempfile.mkdtemp())
+        sys.path.insert(0, BACKEND_DIR)
+        import logging
+        import app as backend
+        logging.getLogger('app').setLevel(logging.WARNING)
+        backend.wait_until_ready(300)
+        self.app = backend.app
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client
+
+    def get(self, path):
+        return self._client().get(path).status_code
+
+    def post_json(self, path, payload):
+        return self._client().post(path, json=payload).status_code
+
+    def post_file(self, path, field, data):
+        return self._client().post(path, data={field: (io.BytesIO(data), 'leaf.jpg')},
+                                   content_type='multipart/form-data').status_code
+
+    def peak_rss(self):
+        # ru_maxrss is kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def close(self):
+        pass
+
+
+class HttpTarget:
+    """Requests over HTTP to a running server"""
+
+    name = 'server'
+
+    def __init__(self, url, pid=None):
+        import requests
+        self.requests = requests
+        self.url = url.rstrip('/')
+        self.pid = pid
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.requests.Session()
+        return session
+
+    def get(self, path):
+        return self._session().get(self.url + path, timeout=60).status_code
+
+    def post_json(self, path, payload):
+        return self._session().post(self.url + path, json=payload, timeout=60).status_code
+
+    def post_file(self, path, field, data):
+        return self._session().post(self.url + path, files={field: ('leaf.jpg', data, 'image/jpeg')},
+                                    timeout=60).status_code
+
+    def peak_rss(self):
+        """Summed peak RSS (VmHWM) of the server process and its workers; only known for
+        a server started here, on Linux"""
+        if self.pid is None:
+            return None
+        total = 0
+        for pid in process_tree(self.pid):
+            try:
+                with open(f'/proc/{pid}/status') as f:
+                    for line in f:
+                        if line.startswith('VmHWM:'):
+                            total += int(line.split()[1]) * 1024
+            except OSError:
+                pass
+        return total or None
+
+    def close(self):
+        pass
+
+
+def process_tree(pid):
+    """pid and all its descendants (Linux)"""
+    pids = [pid]
+    for parent in pids:
+        try:
+            with open(f'/proc/{parent}/task/{parent}/children') as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+class ServerProcess:
+    """The backend in a subprocess on a free local port: Flask's threaded server, or gunicorn with
+    `workers` processes; with asgi=True the ASGI server under uvicorn (in each gunicorn worker)"""
+
+    def __init__(self, startup_timeout=300, workers=0, asgi=False):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            self.port = s.getsockname()[1]
+        env = dict(os.environ)
+        env.setdefault('HISTORY_DB_PATH', '')
+        env.setdefault('MODEL_REGISTRY_DIR', tempfile.mkdtemp())
+        env.setdefault('LOG_LEVEL', 'WARNING')
+        if workers:
+            if workers > 1:
+                env.setdefault('SHARED_STATE_PATH', os.path.join(tempfile.mkdtemp(), 'shared_state.db'))
+            env.update(WEB_CONCURRENCY=str(workers), BIND=f'127.0.0.1:{self.port}')
+            if asgi:
+                env.setdefault('GUNICORN_WORKER_CLASS', 'uvicorn.workers.UvicornWorker')
+            command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                       'asgi_app:asgi_app' if asgi else 'app:app']
+        elif asgi:
+            command = [sys.executable, '-m', 'uvicorn', 'asgi_app:asgi_app', '--host', '127.0.0.1',
+                       '--port', str(self.port), '--log-level', 'warning', '--no-access-log']
+        else:
+            code = (
+                "import logging, app; "
+                "logging.getLogger('werkzeug').setLevel(logging.ERROR); "
+                "logging.getLogger('app').setLevel(logging.WARNING); "
+                f"app.app.run(host='127.0.0.1', port={self.port}, threaded=True)"
+            )
+            command = [sys.executable, '-c', code]
+        self.process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._wait_ready(startup_timeout)
+
+    def _wait_ready(self, timeout):
+        import requests
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError("Backend server exited during startup")
+            try:
+                if requests.get(self.url + '/ready', timeout=1).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"Backend server not ready after {timeout}s")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# Scenarios
+
+def build_requests(scenario, target, args):
+    """A function sending the i-th request of a scenario and returning its status code"""
+    rng = random.Random(args.seed)
+    if scenario == 'data':
+        payloads = [sensor_payload(rng, args.devices) for _ in range(args.requests)]
+        return lambda i: target.post_json('/data', payloads[i])
+    if scenario == 'dashboard':
+        return lambda i: target.get('/dashboard_data')
+    if scenario == 'profile_get':
+        return lambda i: target.get('/plant_profile')
+    if scenario == 'profile_post':
+        payloads = [profile_payload(rng) for _ in range(args.requests)]
+        return lambda i: target.post_json('/plant_profile', payloads[i])
+    if scenario == 'upload_image':
+        base = leaf_jpeg(seed=args.seed)
+        if args.cached_images:
+            return lambda i: target.post_file('/upload_image', 'image', base)
+        return lambda i: target.post_file('/upload_image', 'image', unique_image(base, i))
+    raise ValueError(f"Unknown scenario {scenario}")
+
+
+def run_scenario(send, requests, concurrency, warmup):
+    for i in range(min(warmup, requests)):
+        send(i)
+
+    latencies = [0.0] * requests
+    statuses = [0] * requests
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            statuses[i] = send(i)
+        except Exception:
+            statuses[i] = -1
+        latencies[i] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    errors = sum(1 for status in statuses if status < 200 or status >= 400)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": requests / elapsed,
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max())
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print throughput and p95 changes against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nChange vs {baseline_path} (commit {baseline.get('commit')})")
+    for scenario, row in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(scenario)
+        if before is None:
+            continue
+        throughput = (row["throughput"] / before["throughput"] - 1) * 100
+        p95 = (row["p95_ms"] / before["p95_ms"] - 1) * 100
+        print(f"  {scenario:<14} throughput {throughput:+6.1f}%   p95 {p95:+6.1f}%")
+
+
+def run_scenarios(target, args):
+    """Run every selected scenario against target, printing a line for each; rows by scenario"""
+    rows = {}
+    for scenario in args.scenarios.split(','):
+        requests = args.image_requests if scenario == 'upload_image' else args.requests
+        args_for_scenario = argparse.Namespace(**dict(vars(args), requests=requests))
+        send = build_requests(scenario, target, args_for_scenario)
+        row = run_scenario(send, requests, args.concurrency, args.warmup)
+        peak_rss = target.peak_rss()
+        row["peak_rss_mb"] = peak_rss / (1024 * 1024) if peak_rss else None
+        rows[scenario] = row
+        rss = f"{row['peak_rss_mb']:.0f} MB" if row["peak_rss_mb"] else "n/a"
+        print(f"{scenario:<14} {row['throughput']:8.1f} req/s  p50 {row['p50_ms']:7.2f} ms  "
+              f"p95 {row['p95_ms']:7.2f} ms  p99 {row['p99_ms']:7.2f} ms  "
+              f"errors {row['errors']}  peak RSS {rss}")
+    return rows
+
+
+def run_scaling(args, results):
+    """Start gunicorn with each worker count in turn and print throughput against the first count"""
+    counts = [int(count) for count in args.scaling.split(',')]
+    results["cpu_count"] = os.cpu_count()
+    results["scaling"] = {}
+    print(f"Scaling, {os.cpu_count()} cores, concurrency {args.concurrency}")
+    for workers in counts:
+        print(f"\n{workers} worker{'s' if workers > 1 else ''}")
+        server = ServerProcess(workers=workers, asgi=args.asgi)
+        try:
+            results["scaling"][str(workers)] = run_scenarios(HttpTarget(server.url, server.process.pid), args)
+        finally:
+            server.stop()
+
+    print(f"\n{'scenario':<14}" + ''.join(f"{f'{workers} w req/s':>14}" for workers in counts)
+          + f"{'speedup':>10}")
+    for scenario in args.scenarios.split(','):
+        throughputs = [results["scaling"][str(workers)][scenario]["throughput"] for workers in counts]
+        print(f"{scenario:<14}" + ''.join(f"{throughput:14.1f}" for throughput in throughputs)
+              + f"{throughputs[-1] / throughputs[0]:9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the backend endpoints")
+    parser.add_argument('--target', choices=('client', 'server'), default='client',
+                        help="Flask test client in-process, or a server started on a free port")
+    parser.add_argument('--url', help="Benchmark an already running server instead")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="With --target server: run gunicorn with this many worker processes")
+    parser.add_argument('--asgi', action='store_true', help="With --target server: run the ASGI server")
+    parser.add_argument('--scaling', help="Worker counts to compare, e.g. 1,2,4 (starts gunicorn for each)")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=500, help="Requests per scenario")
+    parser.add_argument('--image-requests', type=int, default=50, help="Requests for upload_image")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--devices', type=int, default=20, help="Distinct device IDs in /data payloads")
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--cached-images', action='store_true', help="Upload identical bytes (cache hits)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "target": args.url or args.target,
+        "config": vars(args),
+        "scenarios": {}
+    }
+    if args.scaling:
+        print("Backend Benchmark Suite")
+        print("=" * 30)
+        run_scaling(args, results)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {args.json}")
+        return
+
+    server = None
+    if args.url:
+        target = HttpTarget(args.url)
+    elif args.target == 'server':
+        server = ServerProcess(workers=args.workers, asgi=args.asgi)
+        target = HttpTarget(server.url, server.process.pid)
+    else:
+        target = TestClientTarget()
+
+    print("Backend Benchmark Suite")
+    print("=" * 30)
+    print(f"target {args.url or target.name}{' (ASGI)' if args.asgi else ''}, workers {args.workers or 1}, "
+          f"concurrency {args.concurrency}")
+
+    results["target"] = args.url or target.name
+    try:
+        results["scenarios"] = run_scenarios(target, args)
+    finally:
+        target.close()
+        if server is not None:
+            server.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Materialized dashboard view
+
+The ingestion path calls DashboardView.update() with each history row, or
+update_many() with a device's rows from a batch, and the view keeps a
+ready-to-send JSON snapshot per device. Serving
+/dashboard_data is then a dictionary lookup and a bytes copy, independent of
+history size or how many browser tabs are polling.
+
+Snapshot versions count from 1 again after a restart, in a new worker or
+after clear(), so a version alone would let a browser's cached ETag match a
+different payload. Each view has a random epoch, renewed by clear(), and the
+ETag is epoch-device-version.
+"""
+
+import json
+import math
+import threading
+import uuid
+from collections import deque
+
+from ring_buffer import HISTORY_COLUMNS
+
+
+class DeviceSnapshot:
+    """Pre-serialized dashboard payload for one device"""
+
+    __slots__ = ('device_id', 'payload', 'body', 'version', 'epoch', 'recent')
+
+    def __init__(self, device_id, recent_points, epoch):
+        self.device_id = device_id
+        self.payload = None
+        self.body = None
+        self.version = 0
+        self.epoch = epoch  # Epoch of the view that numbered the versions
+        self.recent = deque(maxlen=recent_points)  # Most recent point first
+
+    def etag(self):
+        """Entity tag (unquoted) that changes with every update and never repeats across epochs"""
+        return f"{self.epoch}-{self.device_id}-{self.version}"
+
+
+def new_epoch():
+    return uuid.uuid4().hex[:12]
+
+
+class DashboardView:
+    """Per-device dashboard snapshots kept current by the ingestion path"""
+
+    def __init__(self, columns=HISTORY_COLUMNS, recent_points=10):
+        self.column_index = {name: i for i, name in enumerate(columns)}
+        self.recent_points = recent_points
+        self._snapshots = {}
+        self._latest_device = None
+        self._restored = set()  # Devices whose snapshot came from stored history
+        self.epoch = new_epoch()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def build_payload(self, device_id, row):
+        """(recent-data point, payload without recent_data) for one history row"""
+        columns = self.column_index
+        point = {
+            "timestamp": float(row[columns['timestamp']]),
+            "soil_moisture": float(row[columns['soil_moisture']]),
+            "temperature": float(row[columns['temperature']]),
+            "humidity": float(row[columns['humidity']]),
+            "light_intensity": float(row[columns['light_intensity']])
+        }
+        next_watering = float(row[columns['next_watering']])
+        payload = {
+            "device_id": device_id,
+            "current_readings": {key: value for key, value in point.items() if key != "timestamp"},
+            "health_score": float(row[columns['health_score']]),
+            "watering_prediction": {
+                "water_now": bool(row[columns['water_now']]),
+                "confidence": float(row[columns['confidence']]),
+                "next_watering": None if math.isnan(next_watering) else next_watering
+            },
+            "anomaly_detected": bool(row[columns['anomaly_detected']]),
+            "recent_data": None
+        }
+        return point, payload
+
+    def build_update(self, device_id, rows):
+        """(new points newest first, payload of the last row without recent_data) for a device's new rows"""
+        rows = rows[-self.recent_points:]
+        points = [self.build_payload(device_id, row)[0] for row in rows[:-1]]
+        point, payload = self.build_payload(device_id, rows[-1])
+        points.append(point)
+        return points[::-1], payload
+
+    def update(self, device_id, row):
+        """Fold one history row (HISTORY_COLUMNS order) into the device's snapshot"""
+        return self.update_many(device_id, [row])
+
+    def update_many(self, device_id, rows):
+        """Fold a device's new history rows (oldest first) into its snapshot, encoded once"""
+        points, payload = self.build_update(device_id, rows)
+        with self._lock:
+            snapshot = self._snapshots.get(device_id)
+            if snapshot is None:
+                snapshot = self._snapshots[device_id] = DeviceSnapshot(device_id, self.recent_points, self.epoch)
+            snapshot.recent.extendleft(points[::-1])
+            payload["recent_data"] = list(snapshot.recent)
+            snapshot.payload = payload
+            snapshot.body = json.dumps(payload).encode()
+            snapshot.version += 1
+            self._latest_device = device_id
+            self._restored.discard(device_id)
+        return snapshot
+
+    def restore(self, device_id, rows):
+        """Build a device's snapshot once from its stored history rows (oldest first).
+
+        A device that already has a snapshot reported live while the history was
+        loading; its snapshot is newer, so it is kept."""
+        if not len(rows):
+            return None
+        rows = rows[-self.recent_points:]
+        _, payload = self.build_payload(device_id, rows[-1])
+        snapshot = DeviceSnapshot(device_id, self.recent_points, self.epoch)
+        snapshot.recent.extend(self.build_payload(device_id, row)[0] for row in rows[::-1])
+        payload["recent_data"] = list(snapshot.recent)
+        snapshot.payload = payload
+        snapshot.body = json.dumps(payload).encode()
+        snapshot.version = 1
+        with self._lock:
+            if device_id in self._snapshots:
+                return self._snapshots[device_id]
+            self._snapshots[device_id] = snapshot
+            if self._latest_device is None or self._latest_device in self._restored:
+                self._latest_device = device_id
+            self._restored.add(device_id)
+        return snapshot
+
+    def get(self, device_id=None):
+        """Snapshot for a device (default: the one that reported last), or None"""
+        if device_id is None:
+            device_id = self._latest_device
+        return self._snapshots.get(device_id)
+
+    def latest_device(self):
+        return self._latest_device
+
+    def devices(self):
+        with self._lock:
+            return list(self._snapshots)
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+            self._restored.clear()
+            self._latest_device = None
+            self.epoch = new_epoch()
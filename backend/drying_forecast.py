@@ -0,0 +1,209 @@
+"""
+Per-device soil drying forecast
+
+Between waterings, soil moisture falls at a rate that depends on the plant,
+the pot and the room: faster when it is warm, dry and bright. Each device
+fits that rate with recursive least squares (RLS) on its own readings.
+Rather than differencing consecutive readings (sensor noise swamps a few
+minutes of drying), it regresses the moisture level on accumulated
+exposure since the last watering:
+
+    moisture(t) = level + sum_j rate_j * exposure_j(t)
+    exposure(t) = -integral of [1, temperature, humidity, light] (scaled) dt, in hours
+
+so rate_0 is the drying rate in counts per hour under typical conditions and
+rate_1..3 is how much each condition speeds it up. A forgetting factor
+lets old readings fade over a few days. When a watering is detected (a rise
+confirmed by the next reading), only the level restarts; the learned rates
+carry over. Each update costs a fixed number of float operations and never
+refits over the history. Each device's state has its own lock, held for the
+whole update, so concurrent readings for one device are applied one at a
+time.
+
+The forecast projects the current level down to the threshold at the rate
+predicted for the day's average conditions.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+# Mean absolute deviation of a normal distribution is sigma * sqrt(2 / pi)
+MAD_TO_SIGMA = math.sqrt(math.pi / 2)
+
+# Typical conditions and spans that scale temperature, humidity and light to about [-1, 1]
+CONDITION_CENTER = (24.0, 60.0, 500.0)
+CONDITION_SPAN = (5.0, 20.0, 500.0)
+
+
+def conditions(temperature, humidity, light_intensity):
+    """[1, scaled temperature, scaled humidity, scaled light]"""
+    return [1.0] + [(x - center) / span for x, center, span
+                    in zip((temperature, humidity, light_intensity), CONDITION_CENTER, CONDITION_SPAN)]
+
+
+class DeviceDrying:
+    """RLS state for one device"""
+
+    __slots__ = ('timestamp', 'moisture', 'conditions', 'average', 'exposure', 'theta', 'P',
+                 'deviation', 'hours', 'pending', 'lock')
+
+    def __init__(self, timestamp, moisture, current, prior_rate, prior_variance):
+        self.lock = threading.Lock()
+        self.timestamp = timestamp
+        self.moisture = moisture
+        self.conditions = current
+        self.average = list(current)  # Conditions averaged over about a day, for projecting
+        self.exposure = [0.0] * len(current)
+        self.theta = [moisture, prior_rate] + [0.0] * (len(current) - 1)
+        self.P = [[prior_variance[i] if i == j else 0.0 for j in range(len(prior_variance))]
+                  for i in range(len(prior_variance))]
+        self.deviation = 0.0
+        self.hours = 0.0  # Hours of readings the rates were fitted on
+        self.pending = None  # (timestamp, moisture) of an unconfirmed rise
+
+
+class DryingForecaster:
+    """Per-device drying-rate RLS with O(1) updates and threshold-crossing forecasts"""
+
+    def __init__(self, threshold=400.0, prior_rate=0.5, memory_hours=72.0, min_hours=2.0,
+                 min_scale=10.0, clip=3.0, rise=80.0, min_rate=0.05, max_horizon_hours=24 * 30,
+                 max_devices=10000):
+        self.threshold = threshold
+        self.prior_rate = prior_rate
+        self.memory = memory_hours
+        self.min_hours = min_hours
+        self.min_scale = min_scale
+        self.clip = clip
+        self.rise = rise  # A reading this far above the fit starts a new drying cycle (once confirmed)
+        self.min_rate = min_rate
+        self.max_horizon = max_horizon_hours
+        self.max_devices = max_devices
+        # Level, base rate, then condition coefficients
+        self.prior_variance = [100.0 ** 2, 1.0, 0.25, 0.25, 0.25]
+        self._devices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._devices)
+
+    def _state(self, device_id, timestamp, moisture, current):
+        with self._lock:
+            state = self._devices.get(device_id)
+            if state is None:
+                if len(self._devices) >= self.max_devices:
+                    self._devices.popitem(last=False)
+                state = self._devices[device_id] = DeviceDrying(
+                    timestamp, moisture, current, self.prior_rate, self.prior_variance)
+                return state, True
+            self._devices.move_to_end(device_id)
+            return state, False
+
+    def update(self, device_id, timestamp, values):
+        """Fold in a reading (soil_moisture, temperature, humidity, light_intensity) taken at
+        timestamp (seconds) and return the forecast watering time, or None if there is none yet"""
+        moisture = float(values[0])
+        current = conditions(*(float(x) for x in values[1:4]))
+        state, new = self._state(device_id, float(timestamp), moisture, current)
+        if new:
+            return None
+        with state.lock:
+            return self._update(state, float(timestamp), moisture, current)
+
+    def _update(self, state, timestamp, moisture, current):
+        hours = (timestamp - state.timestamp) / 3600
+        if hours <= 0:
+            # Duplicate or out of order
+            return self._forecast(state)
+
+        # Accumulate exposure under the conditions since the previous reading
+        for i, x in enumerate(state.conditions):
+            state.exposure[i] -= x * hours
+        weight = 1 - math.exp(-hours / 24)
+        for i, x in enumerate(current):
+            state.average[i] += weight * (x - state.average[i])
+        state.timestamp = timestamp
+        state.conditions = current
+
+        x = [1.0] + state.exposure
+        predicted = sum(t * xi for t, xi in zip(state.theta, x))
+        residual = moisture - predicted
+        scale = max(state.deviation * MAD_TO_SIGMA, self.min_scale)
+
+        if residual > self.rise:
+            # A watering or a glitch: only a second reading that stays up confirms a watering
+            if state.pending is not None and abs(moisture - state.pending[1]) < self.rise:
+                self._new_cycle(state, moisture)
+            else:
+                state.pending = (state.timestamp, moisture)
+            return self._forecast(state)
+        state.pending = None
+
+        self._rls(state, x, max(min(residual, self.clip * scale), -self.clip * scale), hours)
+        state.deviation += 0.05 * (min(abs(residual), self.clip * scale) - state.deviation)
+        state.hours += hours
+        state.moisture = sum(t * xi for t, xi in zip(state.theta, x))
+        return self._forecast(state)
+
+    def _rls(self, state, x, error, hours):
+        """One exponentially forgetting RLS step (the forgetting factor scales with elapsed time)"""
+        forgetting = math.exp(-hours / self.memory)
+        P, n = state.P, len(x)
+        Px = [sum(P[i][j] * x[j] for j in range(n)) for i in range(n)]
+        gain_denominator = forgetting + sum(xi * pxi for xi, pxi in zip(x, Px))
+        gain = [pxi / gain_denominator for pxi in Px]
+        for i in range(n):
+            state.theta[i] += gain[i] * error
+            for j in range(n):
+                P[i][j] = (P[i][j] - gain[i] * Px[j]) / forgetting
+        # Forgetting inflates P along directions the readings do not excite (constant
+        # conditions); bounding it by the prior keeps the fit from winding up
+        for i in range(n):
+            if P[i][i] > self.prior_variance[i]:
+                shrink = math.sqrt(self.prior_variance[i] / P[i][i])
+                for j in range(n):
+                    P[i][j] *= shrink
+                    P[j][i] *= shrink
+
+    def _new_cycle(self, state, moisture):
+        """Watered: restart the level and exposure, keep the rates"""
+        state.exposure = [0.0] * len(state.exposure)
+        state.theta[0] = moisture
+        for i in range(len(state.P)):
+            state.P[0][i] = state.P[i][0] = 0.0
+        state.P[0][0] = self.prior_variance[0]
+        state.moisture = moisture
+        state.pending = None
+
+    def _rate(self, state):
+        return sum(t * c for t, c in zip(state.theta[1:], state.average))
+
+    def _forecast(self, state):
+        if state.hours < self.min_hours:
+            return None
+        rate = self._rate(state)
+        if rate < self.min_rate:
+            return None
+        hours = max(0.0, (state.moisture - self.threshold) / rate)
+        if hours > self.max_horizon:
+            return None
+        return state.timestamp + hours * 3600
+
+    def forecast(self, device_id):
+        """{"moisture", "rate_per_hour", "next_watering"} for a device, or None before its first reading"""
+        state = self._devices.get(device_id)
+        if state is None:
+            return None
+        with state.lock:
+            return {
+                "moisture": state.moisture,
+                "rate_per_hour": self._rate(state),
+                "next_watering": self._forecast(state)
+            }
+
+    def reset(self, device_id=None):
+        with self._lock:
+            if device_id is None:
+                self._devices.clear()
+            else:
+                self._devices.pop(device_id, None)
@@ -0,0 +1,196 @@
+"""
+Server-Sent Events fan-out for live dashboard updates
+
+Publishers (ingestion, actuation, disease analysis) hand an event to the
+EventBroker, which serializes it once into an SSE frame and appends the same
+bytes to the queue of every subscriber interested in that device. Publishing
+never blocks: each subscriber has a bounded queue, and a subscriber that
+falls behind has its backlog discarded and receives a single "resync" event
+telling it to refetch /dashboard_data instead.
+
+Subscriber.next_frames() blocks a thread per connected client (WSGI servers);
+AsyncSubscriber is awaited on an event loop instead, so an ASGI server holds
+thousands of idle streams without a thread for each.
+"""
+
+import asyncio
+import json
+import threading
+from collections import deque
+
+# Sent when a subscriber's backlog was discarded
+RESYNC_EVENT = "resync"
+
+
+def encode_event(event, data, event_id=None):
+    """Serialize one SSE frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class Subscriber:
+    """One connected client with a bounded backlog of encoded frames"""
+
+    def __init__(self, device_ids=None, max_queue=100):
+        self.device_ids = frozenset(device_ids) if device_ids else None  # None = every device
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.closed = False
+        self._frames = deque()
+        self._lagged = False
+        self._ready = threading.Condition(threading.Lock())
+
+    def push(self, frame):
+        with self._ready:
+            if len(self._frames) >= self.max_queue:
+                # Slow consumer: throw away the backlog rather than grow or block
+                self.dropped += len(self._frames) + 1
+                self._frames.clear()
+                self._lagged = True
+            else:
+                self._frames.append(frame)
+            self._ready.notify()
+
+    def next_frames(self, timeout=None):
+        """Wait for and return all pending frames (empty list on timeout)"""
+        with self._ready:
+            if not self._frames and not self._lagged and not self.closed:
+                self._ready.wait(timeout)
+            frames = list(self._frames)
+            self._frames.clear()
+            if self._lagged:
+                self._lagged = False
+                frames = [encode_event(RESYNC_EVENT, {
+                    "devices": sorted(self.device_ids) if self.device_ids else None,
+                    "dropped": self.dropped
+                })] + frames
+            return frames
+
+    def close(self):
+        with self._ready:
+            self.closed = True
+            self._ready.notify()
+
+
+class AsyncSubscriber(Subscriber):
+    """Subscriber read from an asyncio event loop; publishers in any thread wake it up"""
+
+    def __init__(self, loop, device_ids=None, max_queue=100):
+        super().__init__(device_ids, max_queue)
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+
+    def push(self, frame):
+        super().push(frame)
+        self._notify()
+
+    def close(self):
+        super().close()
+        self._notify()
+
+    def _notify(self):
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # The loop has shut down; nobody is waiting any more
+
+    async def wait_frames(self, timeout=None):
+        """Wait without blocking the loop and return all pending frames (empty list on timeout)"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        # Cleared before draining, so a push arriving meanwhile wakes the next wait
+        self._wakeup.clear()
+        return self.next_frames(timeout=0)
+
+
+class EventBroker:
+    """Routes published events to subscribers by device ID"""
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self.published = 0
+        self._by_device = {}
+        self._all_devices = set()
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def subscribe(self, device_ids=None, max_queue=None):
+        return self.register(Subscriber(device_ids, max_queue or self.max_queue))
+
+    def subscribe_async(self, device_ids=None, max_queue=None):
+        """Subscriber for the running event loop (call from a coroutine)"""
+        loop = asyncio.get_running_loop()
+        return self.register(AsyncSubscriber(loop, device_ids, max_queue or self.max_queue))
+
+    def register(self, subscriber):
+        with self._lock:
+            if subscriber.device_ids is None:
+                self._all_devices.add(subscriber)
+            else:
+                for device_id in subscriber.device_ids:
+                    self._by_device.setdefault(device_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscriber.close()
+        with self._lock:
+            if subscriber.device_ids is None:
+                self._all_devices.discard(subscriber)
+            else:
+                for device_id in subscriber.device_ids:
+                    subscribers = self._by_device.get(device_id)
+                    if subscribers is not None:
+                        subscribers.discard(subscriber)
+                        if not subscribers:
+                            del self._by_device[device_id]
+
+    def wants(self, device_id):
+        """Cheap check so publishers can skip building events nobody will receive"""
+        return bool(self._all_devices) or device_id in self._by_device
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._all_devices) + len({s for subs in self._by_device.values() for s in subs})
+
+    def publish(self, device_id, event, data):
+        """Encode an event once and queue it for every interested subscriber"""
+        with self._lock:
+            targets = list(self._all_devices)
+            targets.extend(self._by_device.get(device_id, ()))
+            if not targets:
+                return 0
+            self._next_id += 1
+            self.published += 1
+            event_id = self._next_id
+        frame = encode_event(event, dict(data, device_id=device_id), event_id)
+        for subscriber in targets:
+            subscriber.push(frame)
+        return len(targets)
+
+    def stream(self, subscriber, heartbeat=15.0):
+        """Generator of SSE bytes for a streaming response; unsubscribes when closed"""
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield b"retry: 3000\n\n"
+            while not subscriber.closed:
+                frames = subscriber.next_frames(timeout=heartbeat)
+                # A comment line keeps proxies from closing idle connections
+                yield b"".join(frames) if frames else b": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def stream_async(self, subscriber, heartbeat=15.0):
+        """Async generator version of stream() for an AsyncSubscriber"""
+        try:
+            yield b"retry: 3000\n\n"
+            while not subscriber.closed:
+                frames = await subscriber.wait_frames(timeout=heartbeat)
+                yield b"".join(frames) if frames else b": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
@@ -0,0 +1,122 @@
+"""
+In-process stand-in for the Firestore client
+
+Implements the small part of the google-cloud-firestore API that the backend
+uses (collection().add/document().set/get, order_by().limit().stream() and
+batch().set/commit) so tests and load runs can exercise the Firebase code
+paths without credentials or the emulator. An optional commit_delay simulates
+network round trips.
+"""
+
+import itertools
+import threading
+import time
+
+_ids = itertools.count(1)
+
+
+class FakeSnapshot:
+    def __init__(self, document_id, data):
+        self.id = document_id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, store, collection, document_id):
+        self._store = store
+        self._collection = collection
+        self.id = document_id
+
+    def set(self, data):
+        self._store._write(self._collection, self.id, data)
+
+    def get(self):
+        return FakeSnapshot(self.id, self._store._read(self._collection, self.id))
+
+
+class FakeQuery:
+    def __init__(self, store, collection, order_field=None, descending=False, limit=None):
+        self._store = store
+        self._collection = collection
+        self._order_field = order_field
+        self._descending = descending
+        self._limit = limit
+
+    def order_by(self, field, direction='ASCENDING'):
+        return FakeQuery(self._store, self._collection, field, direction == 'DESCENDING', self._limit)
+
+    def limit(self, count):
+        return FakeQuery(self._store, self._collection, self._order_field, self._descending, count)
+
+    def stream(self):
+        with self._store._lock:
+            docs = list(self._store._collections.get(self._collection, {}).items())
+        if self._order_field is not None:
+            docs.sort(key=lambda item: item[1].get(self._order_field, 0), reverse=self._descending)
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        return iter([FakeSnapshot(document_id, data) for document_id, data in docs])
+
+
+class FakeCollection(FakeQuery):
+    def document(self, document_id=None):
+        return FakeDocument(self._store, self._collection, document_id or f"doc{next(_ids)}")
+
+    def add(self, data):
+        document = self.document()
+        document.set(data)
+        return time.time(), document
+
+
+class FakeBatch:
+    def __init__(self, store):
+        self._store = store
+        self._writes = []
+
+    def set(self, document, data):
+        self._writes.append((document, data))
+
+    def commit(self):
+        self._store._commit(self._writes)
+
+
+class FakeFirestore:
+    """Thread-safe in-memory Firestore client"""
+
+    def __init__(self, commit_delay=0.0):
+        self.commit_delay = commit_delay
+        self.commits = 0
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def count(self, collection):
+        with self._lock:
+            return len(self._collections.get(collection, {}))
+
+    def _write(self, collection, document_id, data):
+        self._commit([(FakeDocument(self, collection, document_id), data)])
+
+    def _commit(self, writes):
+        if self.commit_delay:
+            time.sleep(self.commit_delay)
+        with self._lock:
+            for document, data in writes:
+                self._collections.setdefault(document._collection, {})[document.id] = dict(data)
+            self.commits += 1
+
+    def _read(self, collection, document_id):
+        with self._lock:
+            return self._collections.get(collection, {}).get(document_id)
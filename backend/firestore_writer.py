@@ -0,0 +1,174 @@
+"""
+Write-behind Firestore persistence
+
+Request handlers hand documents to a FirestoreWriter, which queues them and
+returns immediately. A background thread groups queued documents into
+WriteBatch commits, flushing when a batch is full or its oldest document has
+waited max_age seconds. Failed commits are retried with exponential backoff;
+when the queue is full new documents are dropped and counted rather than
+blocking the request thread.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batches with more than 500 writes
+MAX_FIRESTORE_BATCH = 500
+
+
+class FirestoreWriter:
+    """Background writer that commits queued documents in Firestore batches"""
+
+    def __init__(self, db, max_queue=10000, batch_size=200, max_age=1.0,
+                 max_retries=5, backoff_base=0.5, backoff_max=30.0, on_commit=None):
+        self.db = db
+        self.on_commit = on_commit  # Called with (latency, documents) after each successful commit
+        self.batch_size = min(batch_size, MAX_FIRESTORE_BATCH)
+        self.max_age = max_age
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._flushing = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "commits": 0,
+            "retries": 0,
+            "commit_latency_total": 0.0,
+            "commit_latency_max": 0.0,
+            "commit_latency_last": 0.0,
+        }
+
+    def start(self):
+        """Start the background commit thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="firestore-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def add(self, collection, data, document_id=None):
+        """Queue a document for writing. Returns False if it was dropped."""
+        try:
+            self._queue.put_nowait((collection, document_id, data, time.monotonic()))
+        except queue.Full:
+            self._count("dropped")
+            logger.warning(f"Firestore write queue full, dropped document for '{collection}'")
+            return False
+        self._count("enqueued")
+        return True
+
+    def flush(self, timeout=None):
+        """Block until every queued document has been committed or given up on"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Tell the commit thread to stop waiting for batches to fill up
+        self._flushing.set()
+        try:
+            with self._queue.all_tasks_done:
+                while self._queue.unfinished_tasks:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._queue.all_tasks_done.wait(remaining)
+            return True
+        finally:
+            self._flushing.clear()
+
+    def stop(self, timeout=10.0):
+        """Flush outstanding documents and stop the background thread"""
+        if self._thread is None:
+            return True
+        flushed = self.flush(timeout)
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        if not flushed:
+            logger.warning(f"Firestore writer stopped with {self._queue.qsize()} documents unwritten")
+        return flushed
+
+    def stats(self):
+        """Snapshot of queue depth, drop counts and commit latency"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["commit_latency_avg"] = (
+            stats["commit_latency_total"] / stats["commits"] if stats["commits"] else 0.0
+        )
+        return stats
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            # Keep collecting until the batch is full or the oldest document is due
+            items = [first]
+            deadline = first[3] + self.max_age
+            while len(items) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0 or self._flushing.is_set() or self._stop.is_set():
+                        items.append(self._queue.get_nowait())
+                    else:
+                        items.append(self._queue.get(timeout=min(remaining, 0.05)))
+                except queue.Empty:
+                    if remaining <= 0 or self._flushing.is_set() or self._stop.is_set():
+                        break
+
+            try:
+                self._commit_with_retry(items)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _commit_with_retry(self, items):
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                batch = self.db.batch()
+                for collection, document_id, data, _ in items:
+                    collection_ref = self.db.collection(collection)
+                    document_ref = collection_ref.document(document_id) if document_id else collection_ref.document()
+                    batch.set(document_ref, data)
+                batch.commit()
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    self._count("failed", len(items))
+                    logger.error(f"Giving up on Firestore batch of {len(items)} documents: {e}")
+                    return False
+                self._count("retries")
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+                logger.warning(f"Firestore batch commit failed ({e}), retrying in {delay:.1f}s")
+                # Wake early on shutdown but still retry so the flush is not lost
+                self._stop.wait(delay)
+                continue
+
+            latency = time.perf_counter() - started
+            with self._stats_lock:
+                self._stats["written"] += len(items)
+                self._stats["commits"] += 1
+                self._stats["commit_latency_total"] += latency
+                self._stats["commit_latency_last"] = latency
+                self._stats["commit_latency_max"] = max(self._stats["commit_latency_max"], latency)
+            if self.on_commit is not None:
+                self.on_commit(latency, len(items))
+            return True
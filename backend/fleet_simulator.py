@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+ESP32 Fleet Simulator
+
+Emulates N plant monitors posting to /data. Every request body is the JSON
+built by sendDataToBackend() in esp32_firmware/plant_monitor.ino
+(soil_moisture, temperature, humidity, light_intensity and millis() uptime
+as timestamp), plus a device_id so the backend keeps per-plant state
+(--no-device-id sends the firmware body unchanged). Each simulated plant
+dries out, drifts and occasionally glitches, and applies the returned
+"water" and "light" commands under the firmware's pump safety limits, so
+the backend sees realistic feedback. Reports end-to-end latency, error
+rates, schedule lag and how many injected anomalies were flagged.
+
+Runs against a server (--url, e.g. the app with FIRESTORE_EMULATOR_HOST
+set) or in-process through the Flask test client with the Firestore fake.
+
+Usage:
+    python fleet_simulator.py --devices 200 --duration 60
+    python fleet_simulator.py --url http://localhost:5000 --devices 1000 --interval 10 --jitter 0.2
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Firmware constants (milliseconds, as in plant_monitor.ino)
+SENSOR_READ_INTERVAL = 10000
+MIN_WATERING_INTERVAL = 21600000
+MAX_PUMP_TIME = 20000
+MAX_DAILY_WATERING = 60000
+
+
+class SimulatedPlant:
+    """Sensor readings and actuator state of one ESP32 and its plant"""
+
+    def __init__(self, device_id, rng, time_scale=1.0, drift=0.0, anomaly_rate=0.0):
+        self.device_id = device_id
+        self.rng = rng
+        self.time_scale = time_scale  # Simulated seconds per real second
+        self.anomaly_rate = anomaly_rate
+        self.boot = time.monotonic()
+        self.soil = rng.uniform(600, 950)  # ADC counts, higher is wetter
+        self.drying_rate = rng.uniform(10, 30) / 86400  # Counts per simulated second
+        self.sensor_offset = 0.0
+        self.drift_rate = drift / 86400  # Sensor drift, counts per simulated day
+        self.base_temperature = rng.uniform(19, 27)
+        self.base_humidity = rng.uniform(45, 70)
+        self.base_light = rng.uniform(150, 700)
+        self.grow_light = False
+        self.last_watering_ms = -MIN_WATERING_INTERVAL
+        self.daily_watering_ms = 0
+        self.day = 0
+        self.last_update = self.boot
+        self.waterings = 0
+        self.refused_waterings = 0
+
+    def millis(self):
+        return int((time.monotonic() - self.boot) * self.time_scale * 1000)
+
+    def _advance(self):
+        now = time.monotonic()
+        seconds = (now - self.last_update) * self.time_scale
+        self.last_update = now
+        self.soil = max(250.0, self.soil - self.drying_rate * seconds)
+        self.sensor_offset += self.drift_rate * seconds
+        day = self.millis() // 86400000
+        if day != self.day:
+            self.day = day
+            self.daily_watering_ms = 0
+
+    def read(self):
+        """(payload, is_injected_anomaly) as the firmware would send it now"""
+        self._advance()
+        rng = self.rng
+        hour = (self.millis() / 3600000) % 24
+        daylight = max(0.0, math.sin(math.pi * (hour - 6) / 12))
+        reading = {
+            "soil_moisture": int(self.soil + self.sensor_offset + rng.gauss(0, 8)),
+            "temperature": round(self.base_temperature + 3 * daylight + rng.gauss(0, 0.3), 2),
+            "humidity": round(self.base_humidity - 8 * daylight + rng.gauss(0, 1.0), 2),
+            "light_intensity": int(self.base_light * daylight + (300 if self.grow_light else 0) + rng.gauss(0, 15))
+        }
+        anomaly = rng.random() < self.anomaly_rate
+        if anomaly:
+            glitch = rng.choice(('soil_open', 'soil_short', 'heat', 'light'))
+            if glitch == 'soil_open':
+                reading["soil_moisture"] = 0
+            elif glitch == 'soil_short':
+                reading["soil_moisture"] = 4095
+            elif glitch == 'heat':
+                reading["temperature"] = round(reading["temperature"] + rng.uniform(12, 20), 2)
+            else:
+                reading["light_intensity"] = 4095
+        reading["timestamp"] = self.millis()
+        return reading, anomaly
+
+    def apply(self, response):
+        """Act on the backend's commands like handleBackendResponse() does"""
+        if response.get("water"):
+            now = self.millis()
+            if now - self.last_watering_ms < MIN_WATERING_INTERVAL or self.daily_watering_ms >= MAX_DAILY_WATERING:
+                self.refused_waterings += 1
+            else:
+                self.last_watering_ms = now
+                self.daily_watering_ms += MAX_PUMP_TIME
+                self.soil = min(1000.0, self.soil + self.rng.uniform(250, 350))
+                self.waterings += 1
+        if "light" in response:
+            self.grow_light = bool(response["light"])
+
+
+class HttpBackend:
+    def __init__(self, url):
+        import requests
+        self.requests = requests
+        self.url = url.rstrip('/') + '/data'
+        self._local = threading.local()
+
+    def post(self, payload):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.requests.Session()
+        response = session.post(self.url, json=payload, timeout=30)
+        return response.status_code, response.json() if response.content else {}
+
+
+class InProcessBackend:
+    """The app in this process, with the Firestore fake standing in for Firebase"""
+
+    def __init__(self, commit_delay=0.0, fake_firestore=True):
+        os.environ.setdefault('HISTORY_DB_PATH', '')
+        os.environ.setdefault('MODEL_REGISTRY_DIR', tempfile.mkdtemp())
+        sys.path.insert(0, BACKEND_DIR)
+        import logging
+        import app as backend
+        from fake_firestore import FakeFirestore
+        logging.getLogger('app').setLevel(logging.WARNING)
+        backend.wait_until_ready(300)
+        if fake_firestore:
+            backend.db = FakeFirestore(commit_delay=commit_delay)
+            backend.start_firestore_writer(backend.db)
+        self.backend = backend
+        self._local = threading.local()
+
+    def post(self, payload):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.backend.app.test_client()
+        response = client.post('/data', json=payload)
+        return response.status_code, response.get_json() or {}
+
+    def writer_stats(self):
+        writer = self.backend.firestore_writer
+        if writer is None:
+            return None
+        writer.flush(timeout=30)
+        return writer.stats()
+
+
+class FleetSimulator:
+    """Schedules each device's readings and records the outcome of every request"""
+
+    def __init__(self, backend, plants, interval, jitter, concurrency, include_device_id=True):
+        self.backend = backend
+        self.plants = plants
+        self.interval = interval
+        self.jitter = jitter
+        self.include_device_id = include_device_id
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._lock = threading.Lock()
+        self._queue = []
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self.latencies = []
+        self.lags = []
+        self.statuses = {}
+        self.exceptions = 0
+        self.injected = 0
+        self.flagged = 0
+        self.flagged_injected = 0
+        self.water_commands = 0
+        self.light_commands = 0
+
+    def _schedule(self, plant, due):
+        with self._wakeup:
+            heapq.heappush(self._queue, (due, id(plant), plant))
+            self._wakeup.notify()
+
+    def _send(self, plant, due):
+        lag = time.monotonic() - due
+        payload, anomaly = plant.read()
+        if self.include_device_id:
+            payload["device_id"] = plant.device_id
+        started = time.perf_counter()
+        try:
+            status, response = self.backend.post(payload)
+        except Exception:
+            status, response = None, {}
+        latency = time.perf_counter() - started
+
+        if status == 200:
+            plant.apply(response)
+        with self._lock:
+            self.lags.append(lag)
+            self.latencies.append(latency)
+            if status is None:
+                self.exceptions += 1
+            else:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.injected += anomaly
+            flagged = bool(response.get("anomaly_detected"))
+            self.flagged += flagged
+            self.flagged_injected += flagged and anomaly
+            self.water_commands += bool(response.get("water"))
+            self.light_commands += bool(response.get("light"))
+
+        # Like the firmware loop, the next reading is due one interval after this one was due
+        if not self._stopping:
+            self._schedule(plant, due + self.interval * (1 + plant.rng.uniform(-self.jitter, self.jitter)))
+
+    def run(self, duration):
+        self._stopping = False
+        start = time.monotonic()
+        # Devices power up spread over one interval
+        for plant in self.plants:
+            self._schedule(plant, start + plant.rng.uniform(0, self.interval))
+
+        end = start + duration
+        while time.monotonic() < end:
+            with self._wakeup:
+                if not self._queue:
+                    self._wakeup.wait(0.1)
+                    continue
+                due = self._queue[0][0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._wakeup.wait(min(wait, end - time.monotonic(), 0.1))
+                    continue
+                _, _, plant = heapq.heappop(self._queue)
+            self.executor.submit(self._send, plant, due)
+        self._stopping = True
+        self.executor.shutdown(wait=True)
+        return time.monotonic() - start
+
+    def report(self, elapsed):
+        latencies = np.array(self.latencies or [0.0]) * 1000
+        lags = np.array(self.lags or [0.0]) * 1000
+        sent = len(self.latencies)
+        errors = self.exceptions + sum(count for status, count in self.statuses.items() if status != 200)
+        return {
+            "devices": len(self.plants),
+            "seconds": elapsed,
+            "requests": sent,
+            "throughput": sent / elapsed if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": errors / sent if sent else 0.0,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "exceptions": self.exceptions,
+            "latency_ms": {
+                "mean": float(latencies.mean()),
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max())
+            },
+            "schedule_lag_ms": {
+                "p50": float(np.percentile(lags, 50)),
+                "p95": float(np.percentile(lags, 95)),
+                "max": float(lags.max())
+            },
+            "anomalies": {
+                "injected": self.injected,
+                "flagged": self.flagged,
+                "flagged_injected": self.flagged_injected,
+                "recall": self.flagged_injected / self.injected if self.injected else None
+            },
+            "actuation": {
+                "water_commands": self.water_commands,
+                "waterings": sum(plant.waterings for plant in self.plants),
+                "refused_by_firmware": sum(plant.refused_waterings for plant in self.plants),
+                "light_commands": self.light_commands
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a fleet of ESP32 plant monitors")
+    parser.add_argument('--url', help="Backend base URL (default: in-process app with the Firestore fake)")
+    parser.add_argument('--devices', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to run")
+    parser.add_argument('--interval', type=float, default=SENSOR_READ_INTERVAL / 1000, help="Seconds between readings per device")
+    parser.add_argument('--jitter', type=float, default=0.1, help="Relative jitter of the interval")
+    parser.add_argument('--time-scale', type=float, default=1.0, help="Simulated seconds per real second (plant drying, day cycle)")
+    parser.add_argument('--drift', type=float, default=0.0, help="Soil sensor drift in counts per simulated day")
+    parser.add_argument('--anomaly-rate', type=float, default=0.01, help="Probability a reading is a sensor glitch")
+    parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight at once")
+    parser.add_argument('--commit-delay', type=float, default=0.0, help="Simulated Firestore commit latency (in-process)")
+    parser.add_argument('--no-firestore', action='store_true', help="In-process without the Firestore fake")
+    parser.add_argument('--no-device-id', action='store_true', help="Send the firmware body unchanged")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="Write the report to this file")
+    args = parser.parse_args()
+
+    if args.url:
+        backend = HttpBackend(args.url)
+    else:
+        backend = InProcessBackend(args.commit_delay, fake_firestore=not args.no_firestore)
+
+    rng = random.Random(args.seed)
+    plants = [
+        SimulatedPlant(f"esp32-{i:05d}", random.Random(rng.random()), args.time_scale, args.drift, args.anomaly_rate)
+        for i in range(args.devices)
+    ]
+    simulator = FleetSimulator(backend, plants, args.interval, args.jitter, args.concurrency,
+                               include_device_id=not args.no_device_id)
+
+    print("ESP32 Fleet Simulator")
+    print("=" * 30)
+    print(f"{args.devices} devices every {args.interval}s (±{args.jitter:.0%}) for {args.duration}s "
+          f"against {args.url or 'in-process app'}")
+    elapsed = simulator.run(args.duration)
+    report = simulator.report(elapsed)
+    if isinstance(backend, InProcessBackend):
+        report["firestore_writer"] = backend.writer_stats()
+
+    latency = report["latency_ms"]
+    print(f"requests {report['requests']} ({report['throughput']:.1f}/s), errors {report['errors']} "
+          f"({report['error_rate']:.2%})")
+    print(f"latency p50 {latency['p50']:.1f} ms  p95 {latency['p95']:.1f} ms  p99 {latency['p99']:.1f} ms  "
+          f"max {latency['max']:.1f} ms")
+    print(f"schedule lag p95 {report['schedule_lag_ms']['p95']:.1f} ms")
+    if report['schedule_lag_ms']['p95'] > args.interval * 500:
+        print("⚠️  Readings are sent late: the backend (or --concurrency) cannot keep up with this fleet")
+    anomalies = report["anomalies"]
+    print(f"anomalies injected {anomalies['injected']}, flagged {anomalies['flagged']} "
+          f"({anomalies['flagged_injected']} of the injected)")
+    print(f"watering commands {report['actuation']['water_commands']}, "
+          f"pump runs {report['actuation']['waterings']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"config": vars(args), "report": report}, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Gunicorn settings for the production server
+
+One worker process per core, each with GUNICORN_THREADS threads, serves
+requests by default; set WEB_CONCURRENCY to choose the number. Every worker imports
+the app and loads its own models: Firebase (gRPC) and TensorFlow Lite do not
+survive a fork, so the app is not preloaded in the master. TensorFlow Lite
+maps the model file, so the disease model weights are shared between workers
+through the page cache. With more than one worker, each device's readings are
+scored by the worker that owns it (the others forward them, see
+worker_routing.py), and dashboard snapshots and the plant profile live in
+SHARED_STATE_PATH, so every worker serves the same dashboard. Live events
+are relayed to /stream clients on every worker, and each worker labels its
+/metrics samples with its slot. Forwarding costs a local round trip for
+readings that arrive at the wrong worker, so on a single core one worker is
+faster; `python benchmark_suite.py --scaling 1,2,4` measures the difference.
+
+Set GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker to run the ASGI
+server (asgi_app.py) in each worker instead; the threads setting then does
+not apply.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+    WEB_CONCURRENCY=4 GUNICORN_THREADS=16 gunicorn -c gunicorn.conf.py app:app
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py asgi_app:asgi_app
+"""
+
+import multiprocessing
+import os
+import secrets
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# Threads per worker; each open /stream connection holds one
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = 120
+graceful_timeout = 30
+preload_app = False
+
+# Set before the workers start so they all inherit it; a single worker keeps its state in memory
+if workers > 1:
+    os.environ.setdefault('SHARED_STATE_PATH', os.path.join(BACKEND_DIR, 'data', 'shared_state.db'))
+    # Workers forward each device's readings to the worker that owns it (see worker_routing.py)
+    os.environ['WEB_CONCURRENCY'] = str(workers)
+    os.environ.setdefault('WORKER_ROUTING_KEY', secrets.token_hex(16))
+# Split the cores between the workers' disease model interpreters instead of giving each worker all of them
+os.environ.setdefault('DISEASE_POOL_SIZE', str(max(1, multiprocessing.cpu_count() // workers)))
@@ -0,0 +1,80 @@
+"""
+Image preprocessing for the disease model
+
+Camera uploads are usually several times larger than the 256x256 model
+input. JPEGs are decoded with PIL's draft mode, which lets libjpeg decode at
+1/2, 1/4 or 1/8 scale instead of decoding every pixel and throwing most of
+them away in the resize. The resized pixels are then scaled to [0, 1]
+straight into a float32 buffer that each thread reuses, so a request makes
+no full-size float temporaries. Grayscale, palette and RGBA images are
+converted to RGB (transparent areas become white).
+
+Quantized models take integers instead: value = pixel * scale + offset,
+rounded and clipped to the dtype. For a uint8 model calibrated on [0, 1]
+input (scale 1/255, zero point 0) that is the raw pixels, copied as-is.
+"""
+
+import io
+import threading
+
+import numpy as np
+
+ALPHA_MODES = ('RGBA', 'LA', 'PA')
+
+
+class ImagePreprocessor:
+    """Decodes image bytes into normalized model input arrays"""
+
+    def __init__(self, size=(256, 256), dtype=np.float32, scale=1 / 255.0, offset=0.0):
+        self.size = tuple(size)  # (width, height)
+        self.dtype = np.dtype(dtype)
+        self.scale = scale
+        self.offset = offset
+        self._local = threading.local()
+
+    def decode(self, image_data):
+        """RGB PIL image at the model size"""
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(image_data))
+        # Let JPEG decode at a reduced scale that is still at least the target size
+        image.draft('RGB', self.size)
+
+        if image.mode == 'P' and 'transparency' in image.info:
+            image = image.convert('RGBA')
+        if image.mode in ALPHA_MODES:
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image.convert('RGBA'), mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        if image.size != self.size:
+            image = image.resize(self.size)
+        return image
+
+    def buffer(self):
+        """This thread's reusable input buffer (height x width x 3)"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            width, height = self.size
+            buffer = self._local.buffer = np.empty((height, width, 3), dtype=self.dtype)
+        return buffer
+
+    def preprocess(self, image_data, out=None):
+        """Model input pixels written into out (default: this thread's buffer, valid until its next call)"""
+        if out is None:
+            out = self.buffer()
+        pixels = np.asarray(self.decode(image_data))
+        if self.scale == 1 and self.offset == 0 and np.can_cast(pixels.dtype, self.dtype):
+            np.copyto(out, pixels)
+        elif self.dtype.kind == 'f':
+            np.multiply(pixels, self.scale, out=out, dtype=self.dtype, casting='unsafe')
+            if self.offset:
+                out += self.offset
+        else:
+            limits = np.iinfo(self.dtype)
+            values = np.rint(pixels * np.float32(self.scale) + np.float32(self.offset))
+            np.clip(values, limits.min, limits.max, out=values)
+            np.copyto(out, values, casting='unsafe')
+        return out
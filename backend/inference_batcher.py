@@ -0,0 +1,132 @@
+"""
+Dynamic micro-batching for model inference
+
+Callers submit one input and block for its result. A single collector
+thread takes the first waiting input, keeps collecting until max_batch
+inputs are queued or max_wait has passed since that first input, and hands
+the whole group to one of `workers` threads for one batched inference call.
+Each caller then gets its own row of the output. The collector only starts
+a batch when a worker is free, so while every worker is busy the queue
+grows into the next batch instead of being split across idle collectors.
+Under light load a request waits at most max_wait; when many plants upload
+at once, the model runs on full batches and images/sec goes up.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from interpreter_pool import PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Groups concurrent requests into batches for run_batch(inputs) -> outputs"""
+
+    def __init__(self, run_batch, max_batch=8, max_wait=0.005, workers=1):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.failed = 0
+        self.batch_sizes = {}
+        self.workers = workers
+        self._free = threading.Semaphore(workers)
+        self._ready = queue.Queue()
+        self._threads = [threading.Thread(target=self._collect_batches, name="inference-batcher", daemon=True)] + [
+            threading.Thread(target=self._run, name=f"inference-batch-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item, timeout=None):
+        """Queue one input and wait for its output"""
+        future = Future()
+        self._pending.put((item, future))
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise PoolTimeout(f"No inference result within {timeout}s")
+
+    def _collect(self):
+        """Block for a first item, then gather more until the batch is full or max_wait passes"""
+        try:
+            batch = [self._pending.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._pending.get(timeout=remaining) if remaining > 0 else self._pending.get_nowait())
+            except queue.Empty:
+                break
+        # Drop requests whose caller already gave up
+        return [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+
+    def _collect_batches(self):
+        while not self._stop.is_set():
+            # Wait for a free worker first; meanwhile new requests join the next batch
+            if not self._free.acquire(timeout=0.5):
+                continue
+            batch = self._collect()
+            if batch:
+                self._ready.put(batch)
+            else:
+                self._free.release()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batch = self._ready.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._run_batch(batch)
+            finally:
+                self._free.release()
+
+    def _run_batch(self, batch):
+        try:
+            outputs = self.run_batch([item for item, _ in batch])
+        except Exception as e:
+            logger.error(f"Batched inference failed: {e}")
+            with self._lock:
+                self.failed += len(batch)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), output in zip(batch, outputs):
+            future.set_result(output)
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait": self.max_wait,
+                "workers": self.workers,
+                "queue_depth": self._pending.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "failed": self.failed,
+                "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+                "batch_sizes": dict(sorted(self.batch_sizes.items()))
+            }
@@ -0,0 +1,136 @@
+"""
+Pool of TFLite interpreters for concurrent inference
+
+A tf.lite.Interpreter holds its own input/output tensors and must not be
+used by two threads at once. The pool keeps one allocated interpreter per
+worker slot; a request checks one out, runs set_tensor/invoke/get_tensor,
+and checks it back in. For batched inference a slot holds the model at a
+few fixed batch sizes, each resized and allocated once, so a batch is padded
+to the next size instead of reallocating the tensors for every new size.
+
+Those interpreters stay resident. A tensor arena grows with its batch size,
+so a slot holding sizes 1/2/4/8 costs about as much as 15 batch-1
+interpreters less the shared weights: with the stand-in CNN of
+benchmark_disease.py, 36 MB per slot against 4 MB at batch 1. The pool's
+total is capped by a budget of image rows (pool size x sum of batch sizes)
+rather than left to grow with the core count.
+Requests beyond the pool size wait in a queue, and the time they spend
+waiting is recorded so the pool can be sized from data.
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+def batch_sizes(batch_max):
+    """Powers of two below batch_max, then batch_max: a batch wastes less than half its rows on padding"""
+    sizes = [1]
+    while sizes[-1] * 2 < batch_max:
+        sizes.append(sizes[-1] * 2)
+    if batch_max > 1:
+        sizes.append(batch_max)
+    return tuple(sizes)
+
+
+def load_tflite_interpreters(model_path, num_threads=1, sizes=(1,)):
+    """{batch size: interpreter} with each interpreter resized to its batch size and
+    allocated once (imports TensorFlow on first use)"""
+    import tensorflow as tf
+    interpreters = {}
+    for size in sizes:
+        interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        input_details = interpreter.get_input_details()[0]
+        if input_details['shape'][0] != size:
+            interpreter.resize_tensor_input(input_details['index'], [size] + list(input_details['shape'][1:]))
+        interpreter.allocate_tensors()
+        interpreters[size] = interpreter
+    return interpreters
+
+
+def padded_batch_size(interpreters, count):
+    """The smallest allocated batch size that holds count images"""
+    fitting = [size for size in interpreters if size >= count]
+    if not fitting:
+        raise ValueError(f"batch of {count} exceeds the largest allocated size {max(interpreters)}")
+    return min(fitting)
+
+
+def budgeted_pool_size(size, sizes, max_rows):
+    """Slots that fit in max_rows allocated image rows, at most size and at least one"""
+    return max(1, min(size, max_rows // sum(sizes)))
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class InterpreterPool:
+    """Fixed set of interpreters handed out one request at a time"""
+
+    def __init__(self, factory, size=None):
+        self.size = size or os.cpu_count() or 1
+        self._idle = queue.LifoQueue()  # Reuse the most recently used interpreter (warm caches)
+        for _ in range(self.size):
+            self._idle.put(factory())
+
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.in_use = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @classmethod
+    def from_model_path(cls, model_path, size=None, num_threads=1, batch_max=1, max_rows=None):
+        """Pool whose slots are {batch size: interpreter} for batches of up to batch_max images,
+        with fewer slots when they would allocate more than max_rows image rows in all"""
+        sizes = batch_sizes(batch_max)
+        size = size or os.cpu_count() or 1
+        if max_rows:
+            size = budgeted_pool_size(size, sizes, max_rows)
+        return cls(lambda: load_tflite_interpreters(model_path, num_threads, sizes), size)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """Borrow an interpreter for the duration of a with-block"""
+        with self._lock:
+            self.waiting += 1
+        started = time.perf_counter()
+        try:
+            interpreter = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.waiting -= 1
+                self.timeouts += 1
+            raise PoolTimeout(f"No interpreter available within {timeout}s")
+        waited = time.perf_counter() - started
+
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        try:
+            yield interpreter
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._idle.put(interpreter)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_total": self.wait_total,
+                "wait_max": self.wait_max,
+                "wait_avg": self.wait_total / self.checkouts if self.checkouts else 0.0
+            }
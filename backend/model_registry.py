@@ -0,0 +1,152 @@
+"""
+Versioned model registry on local disk
+
+Each published version lives in <root>/<name>/<version>/ with the serialized
+models (model.joblib) and a metadata.json describing feature order, training
+window and metrics. <root>/<name>/LATEST names the version servers should
+load. Versions are written to a temporary directory and renamed into place,
+and LATEST is replaced atomically, so a reader never sees a half-written
+version and several workers can share one registry directory.
+
+Usage:
+    python model_registry.py list [name]
+    python model_registry.py promote <name> <version>
+"""
+
+import argparse
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+
+ARTIFACT_FILE = 'model.joblib'
+METADATA_FILE = 'metadata.json'
+LATEST_FILE = 'LATEST'
+
+
+class ModelRegistryError(Exception):
+    pass
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Publishes and loads versioned model artifacts"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def versions(self, name):
+        """Published versions, oldest first"""
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        return sorted(entry for entry in os.listdir(model_dir)
+                      if entry.startswith('v') and os.path.isdir(os.path.join(model_dir, entry)))
+
+    def latest_version(self, name):
+        """Version named by LATEST, or None"""
+        try:
+            with open(os.path.join(self._model_dir(name), LATEST_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def metadata(self, name, version):
+        with open(os.path.join(self._model_dir(name), version, METADATA_FILE)) as f:
+            return json.load(f)
+
+    def publish(self, name, models, metadata, promote=True):
+        """Serialize models with their metadata as a new version. Returns the version."""
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=model_dir)
+        artifact_path = os.path.join(staging, ARTIFACT_FILE)
+        joblib.dump(models, artifact_path)
+        metadata = dict(metadata, name=name, created_at=time.time(), sha256=_sha256(artifact_path))
+
+        # Claim the next free version number; rename fails if another process took it
+        while True:
+            existing = self.versions(name)
+            number = int(existing[-1][1:]) + 1 if existing else 1
+            version = f"v{number:04d}"
+            metadata['version'] = version
+            with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+                json.dump(metadata, f, indent=2, sort_keys=True)
+            try:
+                os.rename(staging, os.path.join(model_dir, version))
+                break
+            except OSError as e:
+                if e.errno in (errno.EEXIST, errno.ENOTEMPTY):
+                    continue
+                # Not a lost race (permissions, full or read-only disk): give up
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+        if promote:
+            self.promote(name, version)
+        return version
+
+    def promote(self, name, version):
+        """Point LATEST at a version (also used for rollback)"""
+        if version not in self.versions(name):
+            raise ModelRegistryError(f"Unknown version {version} for {name}")
+        model_dir = self._model_dir(name)
+        fd, tmp_path = tempfile.mkstemp(prefix='.latest-', dir=model_dir)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(model_dir, LATEST_FILE))
+
+    def load(self, name, version=None):
+        """Load (models, metadata) for a version, LATEST by default"""
+        version = version or self.latest_version(name)
+        if version is None:
+            raise ModelRegistryError(f"No published versions of {name}")
+        version_dir = os.path.join(self._model_dir(name), version)
+        metadata = self.metadata(name, version)
+        artifact_path = os.path.join(version_dir, ARTIFACT_FILE)
+        if _sha256(artifact_path) != metadata.get('sha256'):
+            raise ModelRegistryError(f"Checksum mismatch for {name} {version}")
+        return joblib.load(artifact_path), metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and promote versions in the model registry")
+    parser.add_argument('--root', default=os.environ.get('MODEL_REGISTRY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_registry')))
+    commands = parser.add_subparsers(dest='command', required=True)
+    list_parser = commands.add_parser('list', help="List versions")
+    list_parser.add_argument('name', nargs='?', default='sensor_models')
+    promote_parser = commands.add_parser('promote', help="Make a version the one servers load")
+    promote_parser.add_argument('name')
+    promote_parser.add_argument('version')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        latest = registry.latest_version(args.name)
+        for version in registry.versions(args.name):
+            metadata = registry.metadata(args.name, version)
+            marker = '*' if version == latest else ' '
+            print(f"{marker} {version}  {time.ctime(metadata['created_at'])}  metrics={metadata.get('metrics', {})}")
+    else:
+        registry.promote(args.name, args.version)
+        print(f"{args.name} LATEST -> {args.version}")
+
+
+if __name__ == '__main__':
+    main()
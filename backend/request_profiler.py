@@ -0,0 +1,263 @@
+"""
+On-demand cProfile capture of live requests
+
+ProfilingMiddleware wraps the WSGI app and profiles a random fraction of
+requests, plus any request whose X-Profile-Token header matches the
+configured token. Each capture is kept in memory with the request method,
+path, status and duration; the most recent max_profiles are retained and
+can be downloaded as pstats files (for pstats, snakeviz) or as a text
+summary. The middleware is only installed when profiling is enabled, so a
+server with profiling off runs exactly the code it did before.
+
+cProfile only sees the thread that handles the request: time spent waiting
+on the disease micro-batcher shows up as that wait, not as model code.
+
+The ASGI server handles many requests on one event-loop thread, so it is
+not profiled as a whole. ASGIProfilingMiddleware selects requests the same
+way and marks them in a context variable. The routes pass their work (the
+process_* functions shared with Flask) through run_profiled(), which runs
+it under the request's profile, in a pool thread or on the loop.
+"""
+
+import contextvars
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import OrderedDict
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+
+class CapturedProfile:
+    __slots__ = ('id', 'method', 'path', 'query', 'status', 'reason', 'started_at', 'duration', 'stats')
+
+    def __init__(self, id, method, path, query, status, reason, started_at, duration, stats):
+        self.id = id
+        self.method = method
+        self.path = path
+        self.query = query
+        self.status = status
+        self.reason = reason
+        self.started_at = started_at
+        self.duration = duration
+        self.stats = stats  # cProfile stats dict, as written by Profile.dump_stats
+
+    def metadata(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": self.duration * 1000,
+            "functions": len(self.stats)
+        }
+
+    def pstats_bytes(self):
+        """The capture in the .prof format read by pstats.Stats and snakeviz"""
+        return marshal.dumps(self.stats)
+
+    def text(self, sort='cumulative', limit=40):
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = dict(self.stats)
+        stats.get_top_level_stats()
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps the recent captures"""
+
+    def __init__(self, sample_rate=0.0, token=None, max_profiles=50):
+        self.sample_rate = sample_rate
+        self.token = token or None
+        self.max_profiles = max_profiles
+        self.captured = 0
+        self.skipped = 0  # Selected while another request was being profiled
+        self._profiles = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # cProfile hooks are process-wide from Python 3.12, so one capture runs at a time
+        self._active = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or self.token is not None
+
+    def authorized(self, token):
+        return self.token is not None and token == self.token
+
+    def reason(self, environ):
+        """'header', 'sample' or None for a request's WSGI environ"""
+        return self.select(environ.get('HTTP_X_PROFILE_TOKEN'))
+
+    def select(self, token):
+        """'header', 'sample' or None for a request sending `token` in the profile header"""
+        if self.token is not None and token == self.token:
+            return 'header'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def record(self, method, path, query, status, reason, started_at, duration, profile):
+        profile.create_stats()
+        with self._lock:
+            profile_id = next(self._ids)
+            self._profiles[profile_id] = CapturedProfile(profile_id, method, path, query, status, reason,
+                                                         started_at, duration, profile.stats)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+            self.captured += 1
+        return profile_id
+
+    def list(self):
+        """Metadata of the retained captures, newest first"""
+        with self._lock:
+            return [profile.metadata() for profile in reversed(self._profiles.values())]
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "header": self.token is not None,
+                "retained": len(self._profiles),
+                "captured": self.captured,
+                "skipped": self.skipped
+            }
+
+
+class ProfilingMiddleware:
+    """WSGI middleware running selected requests under cProfile"""
+
+    def __init__(self, wsgi_app, profiler, exclude_prefixes=('/profiles', '/stream')):
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+        self.exclude_prefixes = exclude_prefixes
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        reason = self.profiler.reason(environ)
+        if reason is None or path.startswith(self.exclude_prefixes):
+            return self.wsgi_app(environ, start_response)
+        if not self.profiler._active.acquire(blocking=False):
+            with self.profiler._lock:
+                self.profiler.skipped += 1
+            return self.wsgi_app(environ, start_response)
+
+        status = []
+
+        def capture_status(status_line, headers, exc_info=None):
+            status.append(int(status_line.split(' ', 1)[0]))
+            return start_response(status_line, headers, exc_info)
+
+        started_at = time.time()
+        started = time.perf_counter()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                # Materialize the body so the work of building it is inside the capture
+                result = self.wsgi_app(environ, capture_status)
+                try:
+                    body = list(result)
+                finally:
+                    if hasattr(result, 'close'):
+                        result.close()
+            finally:
+                profile.disable()
+            self.profiler.record(environ.get('REQUEST_METHOD'), path, environ.get('QUERY_STRING', ''),
+                                 status[0] if status else None, reason, started_at,
+                                 time.perf_counter() - started, profile)
+        finally:
+            self.profiler._active.release()
+        return body
+
+
+class RequestCapture:
+    """An ASGI request selected for profiling; all of its run_profiled() work goes into one profile"""
+
+    __slots__ = ('profiler', 'profile')
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.profile = None
+
+
+# Capture of the ASGI request being handled (None when it was not selected)
+current_capture = contextvars.ContextVar('current_capture', default=None)
+
+
+def run_profiled(func, *args):
+    """func(*args), under cProfile when the current ASGI request was selected for profiling"""
+    capture = current_capture.get()
+    if capture is None:
+        return func(*args)
+    profiler = capture.profiler
+    if not profiler._active.acquire(blocking=False):
+        with profiler._lock:
+            profiler.skipped += 1
+        return func(*args)
+    try:
+        if capture.profile is None:
+            capture.profile = cProfile.Profile()
+        capture.profile.enable()
+        try:
+            return func(*args)
+        finally:
+            capture.profile.disable()
+    finally:
+        profiler._active.release()
+
+
+class ASGIProfilingMiddleware:
+    """ASGI middleware selecting requests for profiling; their run_profiled() work is captured.
+    Routes mounted from the WSGI app are profiled by its ProfilingMiddleware instead."""
+
+    def __init__(self, app, profiler, exclude_prefixes=('/profiles', '/stream')):
+        self.app = app
+        self.profiler = profiler
+        self.exclude_prefixes = exclude_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        token = next((value.decode('latin-1') for name, value in scope['headers']
+                      if name == PROFILE_HEADER.lower().encode()), None)
+        reason = self.profiler.select(token)
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = []
+
+        async def capture_status(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            await send(message)
+
+        capture = RequestCapture(self.profiler)
+        started_at = time.time()
+        started = time.perf_counter()
+        context_token = current_capture.set(capture)
+        try:
+            await self.app(scope, receive, capture_status)
+        finally:
+            current_capture.reset(context_token)
+        if capture.profile is not None:
+            self.profiler.record(scope['method'], scope['path'], scope.get('query_string', b'').decode('latin-1'),
+                                 status[0] if status else None, reason, started_at,
+                                 time.perf_counter() - started, capture.profile)
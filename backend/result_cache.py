@@ -0,0 +1,200 @@
+"""
+Content-addressed cache of analysis results
+
+Results are keyed by a hash of the uploaded bytes, so a camera re-sending the
+same frame is answered from memory without decoding or running the model.
+With a perceptual hash enabled, an image that differs only by recompression
+or small edits (a dHash within max_distance bits) also hits. Entries expire
+after ttl seconds and the least recently used are evicted once the entry or
+byte budget is exceeded. Changing the model version empties the cache.
+
+Near-duplicate lookups do not scan the cache. Each perceptual hash is split
+into max_distance + 1 bands, and entries are indexed by (band, band bits).
+Two hashes within max_distance bits differ in at most max_distance bands,
+so they match exactly in at least one, and a lookup checks only the entries
+sharing a band with it.
+"""
+
+import hashlib
+import io
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+HASH_BITS = 64  # dhash() with the default size
+
+
+def content_hash(data):
+    return hashlib.sha256(data).digest()
+
+
+def dhash(image_data, size=8):
+    """64-bit difference hash: is each pixel of a tiny grayscale thumbnail brighter than its right neighbour"""
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(image_data))
+    image.draft('L', (size + 1, size))
+    pixels = np.asarray(image.convert('L').resize((size + 1, size)))
+    value = 0
+    for bit in (pixels[:, :-1] > pixels[:, 1:]).flat:
+        value = (value << 1) | int(bit)
+    return value
+
+
+class CacheEntry:
+    __slots__ = ('result', 'expires_at', 'nbytes', 'perceptual')
+
+    def __init__(self, result, expires_at, nbytes, perceptual):
+        self.result = result
+        self.expires_at = expires_at
+        self.nbytes = nbytes
+        self.perceptual = perceptual
+
+
+class ResultCache:
+    """LRU + TTL cache with an entry and memory budget"""
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl=3600.0,
+                 perceptual=False, max_distance=4):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.perceptual = perceptual
+        self.max_distance = max_distance
+        self.version = None
+        self.nbytes = 0
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._near = {}  # (band, band bits) -> keys of entries whose perceptual hash has them
+        bands = min(max_distance + 1, HASH_BITS)
+        edges = [HASH_BITS * i // bands for i in range(bands + 1)]
+        self._bands = [(low, (1 << (high - low)) - 1) for low, high in zip(edges, edges[1:])]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set_version(self, version):
+        """Record the model version; results from another version are dropped"""
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._near.clear()
+                self.nbytes = 0
+                self.version = version
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _band_keys(self, perceptual):
+        return [(band, (perceptual >> low) & mask) for band, (low, mask) in enumerate(self._bands)]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.nbytes -= entry.nbytes
+        if entry.perceptual is not None:
+            for band_key in self._band_keys(entry.perceptual):
+                keys = self._near[band_key]
+                keys.discard(key)
+                if not keys:
+                    del self._near[band_key]
+
+    def _find(self, key, perceptual, now):
+        """(key, entry) for an exact key or a perceptual hash within max_distance, else (key, None)"""
+        entry = self._live(key, now) if key is not None else None
+        if entry is None and perceptual is not None:
+            checked = set()
+            for band_key in self._band_keys(perceptual):
+                for candidate_key in list(self._near.get(band_key, ())):
+                    if candidate_key in checked:
+                        continue
+                    checked.add(candidate_key)
+                    candidate = self._live(candidate_key, now)
+                    if (candidate is not None
+                            and bin(candidate.perceptual ^ perceptual).count('1') <= self.max_distance):
+                        self.near_hits += 1
+                        return candidate_key, candidate
+        return key, entry
+
+    def _record(self, key, entry):
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.result
+
+    def get(self, key, perceptual=None):
+        """Cached result for a content hash, else one whose perceptual hash is within max_distance, else None"""
+        with self._lock:
+            return self._record(*self._find(key, perceptual, time.monotonic()))
+
+    def lookup(self, data):
+        """(result or None, key, perceptual hash) for uploaded bytes; pass the hashes on to put().
+        The perceptual hash needs a decode, so it is only computed after an exact miss."""
+        key = content_hash(data)
+        with self._lock:
+            found_key, entry = self._find(key, None, time.monotonic())
+            if entry is not None or not self.perceptual:
+                return self._record(found_key, entry), key, None
+        perceptual = dhash(data)
+        with self._lock:
+            return self._record(*self._find(None, perceptual, time.monotonic())), key, perceptual
+
+    def put(self, key, result, perceptual=None, version=None):
+        """Store a result computed by model version `version` (ignored if the model changed meanwhile)"""
+        nbytes = len(key) + sys.getsizeof(result) + len(json.dumps(result))
+        with self._lock:
+            if version != self.version or nbytes > self.max_bytes:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(result, time.monotonic() + self.ttl, nbytes, perceptual)
+            self.nbytes += nbytes
+            if perceptual is not None:
+                for band_key in self._band_keys(perceptual):
+                    self._near.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._near.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "version": self.version,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
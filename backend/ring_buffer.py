@@ -0,0 +1,157 @@
+"""
+Per-device ring buffers for sensor history
+
+Each device gets a preallocated float64 array with a fixed number of rows, so
+memory use is bounded by max_devices x capacity x columns and appends never
+allocate. Every row is written twice (at slot i and i + capacity), which keeps
+the most recent `capacity` rows contiguous: window() is always a plain slice
+of the backing array and never copies.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Columns stored for every reading, in order
+HISTORY_COLUMNS = (
+    'timestamp',
+    'soil_moisture',
+    'temperature',
+    'humidity',
+    'light_intensity',
+    'health_score',
+    'water_now',
+    'confidence',
+    'next_watering',
+    'anomaly_detected',
+)
+
+
+class RingBuffer:
+    """Fixed-capacity, array-backed buffer with O(1) append and zero-copy windows"""
+
+    def __init__(self, capacity, columns=HISTORY_COLUMNS):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        self._data = np.full((2 * capacity, len(self.columns)), np.nan)
+        self._head = 0  # Next slot to write, in [0, capacity)
+        self._count = 0
+        self._lock = threading.Lock()
+        self.total_appended = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def append(self, row):
+        """Append one row (sequence of len(columns) numbers)"""
+        with self._lock:
+            head = self._head
+            self._data[head] = row
+            self._data[head + self.capacity] = row
+            self._head = head + 1 if head + 1 < self.capacity else 0
+            if self._count < self.capacity:
+                self._count += 1
+            self.total_appended += 1
+
+    def window(self, n=None):
+        """Read-only view of the last n rows, oldest first.
+
+        The view aliases the backing array, so rows are overwritten once
+        `capacity` further readings arrive; copy it if it must outlive that.
+        """
+        with self._lock:
+            count = self._count
+            end = self._head + self.capacity
+        n = count if n is None else max(0, min(n, count))
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def column(self, name, n=None):
+        """Read-only (strided) view of one column over the last n rows"""
+        return self.window(n)[:, self.column_index[name]]
+
+    def latest(self):
+        """Most recent row as a view, or None if empty"""
+        window = self.window(1)
+        return window[0] if len(window) else None
+
+
+class DeviceBuffers:
+    """Registry of one RingBuffer per device, bounded to max_devices"""
+
+    def __init__(self, capacity, columns=HISTORY_COLUMNS, max_devices=10000):
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        self.max_devices = max_devices
+        self._buffers = OrderedDict()  # Least recently updated device first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def __contains__(self, device_id):
+        return device_id in self._buffers
+
+    def get(self, device_id):
+        """Buffer for a device, or None if it has never reported"""
+        return self._buffers.get(device_id)
+
+    def append(self, device_id, row):
+        """Append a row to a device's buffer, creating (and evicting) as needed"""
+        with self._lock:
+            buffer = self._buffers.get(device_id)
+            if buffer is None:
+                if len(self._buffers) >= self.max_devices:
+                    # Drop the device that has been silent the longest
+                    self._buffers.popitem(last=False)
+                buffer = RingBuffer(self.capacity, self.columns)
+                self._buffers[device_id] = buffer
+            else:
+                self._buffers.move_to_end(device_id)
+        buffer.append(row)
+        return buffer
+
+    def count(self, device_id):
+        """Number of buffered rows for a device"""
+        buffer = self._buffers.get(device_id)
+        return len(buffer) if buffer is not None else 0
+
+    def window(self, device_id, n=None):
+        """Zero-copy view of a device's last n rows, oldest first"""
+        buffer = self._buffers.get(device_id)
+        if buffer is None:
+            return np.empty((0, len(self.columns)))
+        return buffer.window(n)
+
+    def devices(self):
+        """Device IDs, least recently updated first"""
+        with self._lock:
+            return list(self._buffers)
+
+    def latest_device(self):
+        """Device that reported most recently, or None"""
+        with self._lock:
+            return next(reversed(self._buffers), None)
+
+    def clear(self):
+        with self._lock:
+            self._buffers.clear()
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def max_nbytes(self):
+        """Upper bound on buffer memory with max_devices devices"""
+        return self.max_devices * 2 * self.capacity * len(self.columns) * 8
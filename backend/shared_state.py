@@ -0,0 +1,299 @@
+"""
+State shared by the worker processes of a multi-worker server
+
+Each worker has its own memory, so anything the dashboard reads must not
+depend on which worker handled the last request. SharedState keeps that
+state in one SQLite database on local disk (WAL mode, so readers never wait
+for the writer): small JSON values such as the plant profile, and, through
+SharedDashboardView, the per-device dashboard snapshots.
+
+Every reading of a device is scored by the one worker that owns it (see
+worker_routing.py), so that worker's in-memory snapshot is complete. An
+update encodes it once, as DashboardView does, and writes the bytes over
+the stored row in one statement, without reading or decoding what was
+there. Readers in any worker get the stored bytes back as they are; the
+payload is only decoded if something asks for it.
+
+Live dashboard events are published to the worker's own EventBroker, but a
+/stream client may be connected to any worker. SharedEventRelay also
+appends each event to a short log in the database while some other worker
+has subscribers, and a thread in every worker publishes the events the
+other workers logged to its own subscribers.
+
+file_lock() elects one worker for jobs that must only run once, such as
+history maintenance or training the first sensor models.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from dashboard_view import DashboardView, DeviceSnapshot, new_epoch
+from ring_buffer import HISTORY_COLUMNS
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process, nothing to coordinate
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """Exclusive lock on `path` across processes; yields False if blocking=False and it is taken"""
+    with open(path, 'a') as f:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def hold_file_lock(path):
+    """Take `path`'s lock for the life of the process if no other process has it.
+    Returns the open lock file (keep a reference), or None."""
+    f = open(path, 'a')
+    if fcntl is None:
+        return f
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+class SharedState:
+    """JSON values and dashboard snapshots in a SQLite file shared between processes"""
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS shared_values (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dashboard_snapshots (device_id TEXT PRIMARY KEY, epoch TEXT NOT NULL, "
+            "version INTEGER NOT NULL, updated_at REAL NOT NULL, body BLOB NOT NULL)"
+        )
+        if 'epoch' not in {row[1] for row in self._conn.execute("PRAGMA table_info(dashboard_snapshots)")}:
+            # Written before snapshots carried their writer's epoch; the next update replaces the row
+            self._conn.execute("ALTER TABLE dashboard_snapshots ADD COLUMN epoch TEXT NOT NULL DEFAULT ''")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS dashboard_snapshots_updated ON dashboard_snapshots (updated_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stream_events (seq INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, "
+            "created_at REAL NOT NULL, device_id TEXT NOT NULL, event TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS stream_events_created ON stream_events (created_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stream_listeners (origin TEXT PRIMARY KEY, subscribers INTEGER NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+
+    @contextmanager
+    def transaction(self):
+        """A write transaction; other processes' writes wait until it commits"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def execute(self, sql, params=()):
+        """One statement in its own transaction"""
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    def get(self, key, default=None):
+        rows = self.query("SELECT value FROM shared_values WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def set(self, key, value):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO shared_values (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def update(self, key, changes, default=None):
+        """Merge `changes` into the dict stored at `key` (starting from `default`) and return the result"""
+        with self.transaction() as conn:
+            rows = conn.execute("SELECT value FROM shared_values WHERE key = ?", (key,)).fetchall()
+            value = json.loads(rows[0][0]) if rows else dict(default or {})
+            value.update(changes)
+            conn.execute("INSERT OR REPLACE INTO shared_values (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+        return value
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Replace a device's stored snapshot unless it holds a later version from the same writer
+STORE_SNAPSHOT = ("INSERT INTO dashboard_snapshots (device_id, epoch, version, updated_at, body) "
+                  "VALUES (?, ?, ?, ?, ?) ON CONFLICT (device_id) DO UPDATE SET "
+                  "epoch = excluded.epoch, version = excluded.version, "
+                  "updated_at = excluded.updated_at, body = excluded.body "
+                  "WHERE excluded.epoch != dashboard_snapshots.epoch "
+                  "OR excluded.version > dashboard_snapshots.version")
+
+
+class StoredSnapshot:
+    """A snapshot read back from SharedState: the stored bytes, decoded only when payload is used"""
+
+    __slots__ = ('device_id', 'epoch', 'version', 'body', '_payload')
+
+    etag = DeviceSnapshot.etag
+
+    def __init__(self, device_id, epoch, version, body):
+        self.device_id = device_id
+        self.epoch = epoch
+        self.version = version
+        self.body = body
+        self._payload = None
+
+    @property
+    def payload(self):
+        if self._payload is None:
+            self._payload = json.loads(self.body)
+        return self._payload
+
+
+class SharedDashboardView(DashboardView):
+    """DashboardView that also stores its snapshots in SharedState, so every worker serves them.
+
+    Snapshots are written by the device's owner and tagged with its epoch, so
+    an ETag never repeats across workers or restarts. A device's first update
+    in a process carries on the stored recent points and version."""
+
+    def __init__(self, state, columns=HISTORY_COLUMNS, recent_points=10):
+        super().__init__(columns, recent_points)
+        self.state = state
+
+    def __len__(self):
+        return self.state.query("SELECT COUNT(*) FROM dashboard_snapshots")[0][0]
+
+    def _seed(self, device_id):
+        snapshot = DeviceSnapshot(device_id, self.recent_points, self.epoch)
+        rows = self.state.query("SELECT version, body FROM dashboard_snapshots WHERE device_id = ?", (device_id,))
+        if rows:
+            snapshot.version = rows[0][0]
+            snapshot.recent.extend(json.loads(rows[0][1])["recent_data"])
+        with self._lock:
+            self._snapshots.setdefault(device_id, snapshot)
+
+    def update_many(self, device_id, rows):
+        if device_id not in self._snapshots:
+            self._seed(device_id)
+        snapshot = super().update_many(device_id, rows)
+        with self._lock:
+            version, body = snapshot.version, snapshot.body
+        self.state.execute(STORE_SNAPSHOT, (device_id, snapshot.epoch, version, time.time(), body))
+        return snapshot
+
+    def get(self, device_id=None):
+        if device_id is None:
+            device_id = self.latest_device()
+        rows = self.state.query("SELECT epoch, version, body FROM dashboard_snapshots WHERE device_id = ?",
+                                (device_id,))
+        return StoredSnapshot(device_id, *rows[0]) if rows else None
+
+    def latest_device(self):
+        rows = self.state.query("SELECT device_id FROM dashboard_snapshots ORDER BY updated_at DESC LIMIT 1")
+        return rows[0][0] if rows else None
+
+    def devices(self):
+        return [device_id for device_id, in self.state.query(
+            "SELECT device_id FROM dashboard_snapshots ORDER BY updated_at")]
+
+    def clear(self):
+        """Empty the stored snapshots and this worker's (other workers keep their recent points)"""
+        super().clear()
+        self.state.execute("DELETE FROM dashboard_snapshots")
+
+
+class SharedEventRelay:
+    """Publishes live events to this worker's EventBroker and to the /stream clients of the other workers.
+
+    Has the publish() and wants() of EventBroker, so publishers use either.
+    Events reach other workers' subscribers within one poll interval."""
+
+    def __init__(self, state, broker, interval=0.25, keep_seconds=60.0):
+        self.state = state
+        self.broker = broker
+        self.interval = interval
+        self.keep_seconds = keep_seconds  # Logged events older than this are pruned
+        self.origin = new_epoch()
+        self.relayed = 0
+        self._remote_subscribers = 0
+        self._last_seq = 0
+        self._reported = None  # (subscribers, time) last written to stream_listeners
+        self._closed = threading.Event()
+
+    def wants(self, device_id):
+        return self._remote_subscribers > 0 or self.broker.wants(device_id)
+
+    def publish(self, device_id, event, data):
+        if self._remote_subscribers > 0:
+            self.state.execute(
+                "INSERT INTO stream_events (origin, created_at, device_id, event, data) VALUES (?, ?, ?, ?, ?)",
+                (self.origin, time.time(), device_id, event, json.dumps(data, separators=(',', ':'))))
+        return self.broker.publish(device_id, event, data)
+
+    def start(self):
+        self._last_seq = self.state.query("SELECT COALESCE(MAX(seq), 0) FROM stream_events")[0][0]
+        threading.Thread(target=self._run, name="event-relay", daemon=True).start()
+
+    def _run(self):
+        while not self._closed.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Event relay poll failed: {e}")
+
+    def poll(self):
+        """Report this worker's subscribers, then publish the events other workers logged since the last poll"""
+        now = time.time()
+        subscribers = self.broker.subscriber_count()
+        if self._reported is None or self._reported[0] != subscribers or now - self._reported[1] > 10:
+            self.state.execute(
+                "INSERT OR REPLACE INTO stream_listeners (origin, subscribers, updated_at) VALUES (?, ?, ?)",
+                (self.origin, subscribers, now))
+            # Prune alongside the report, so at most every ten seconds per worker
+            self.state.execute("DELETE FROM stream_events WHERE created_at < ?", (now - self.keep_seconds,))
+            self.state.execute("DELETE FROM stream_listeners WHERE updated_at < ?", (now - 30,))
+            self._reported = (subscribers, now)
+        # A worker that stopped without saying so drops out once its report is 30 seconds old
+        self._remote_subscribers = self.state.query(
+            "SELECT COALESCE(SUM(subscribers), 0) FROM stream_listeners WHERE origin != ? AND updated_at > ?",
+            (self.origin, now - 30))[0][0]
+        rows = self.state.query(
+            "SELECT seq, origin, device_id, event, data FROM stream_events WHERE seq > ? ORDER BY seq",
+            (self._last_seq,))
+        for seq, origin, device_id, event, data in rows:
+            self._last_seq = seq
+            if origin != self.origin and self.broker.wants(device_id):
+                self.broker.publish(device_id, event, json.loads(data))
+                self.relayed += 1
+        return len(rows)
+
+    def close(self):
+        self._closed.set()
+        self.state.execute("DELETE FROM stream_listeners WHERE origin = ?", (self.origin,))
@@ -0,0 +1,189 @@
+"""
+Streaming per-device anomaly detection
+
+Each device keeps a robust running location and scale per sensor feature.
+A reading is scored by its largest robust z-score (|x - location| / scale)
+and then folded into the state with a Huber-style update: the residual is
+clipped to a few scales before it moves the location, so a spike barely
+shifts the baseline while slow drift (a plant drying out, the seasons) is
+followed. Scoring and updating are O(1) per reading and use plain floats,
+so they cost microseconds instead of an sklearn predict call.
+
+A step change that persists (watering raises soil moisture for days) is not
+an anomaly to keep reporting. After shift_readings consecutive readings
+beyond the threshold on the same side, the feature's location is re-seeded
+at their mean. When the caller knows a shift is coming (it just sent a
+watering command), expect_shift() makes the first exceedance re-seed the
+location without being flagged.
+
+Requests for one device can be handled by several threads at once, so each
+baseline has its own lock, held from scoring through the update. Readings
+for different devices never wait on each other.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+# Mean absolute deviation of a normal distribution is sigma * sqrt(2 / pi)
+MAD_TO_SIGMA = math.sqrt(math.pi / 2)
+
+
+class DeviceBaseline:
+    """Running robust location/scale for one device"""
+
+    __slots__ = ('count', 'location', 'deviation', 'warmup', 'run_sign', 'run_count', 'run_sum',
+                 'expected', 'expected_readings', 'lock')
+
+    def __init__(self, features):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.location = [0.0] * features
+        self.deviation = [0.0] * features
+        self.warmup = []
+        # Consecutive exceedances per feature: side (+1/-1, 0 for none), count and sum of values
+        self.run_sign = [0] * features
+        self.run_count = [0] * features
+        self.run_sum = [0.0] * features
+        self.expected = ()  # Features with an announced level shift
+        self.expected_readings = 0  # Readings the announcement stays valid for
+
+
+class StreamingAnomalyDetector:
+    """Per-device robust z-score detector with O(1) updates"""
+
+    def __init__(self, min_scale, threshold=5.0, alpha=0.05, clip=3.0,
+                 warmup=10, shift_readings=3, expect_readings=30, max_devices=10000):
+        self.min_scale = list(min_scale)
+        self.features = len(self.min_scale)
+        self.threshold = threshold
+        self.alpha = alpha
+        self.clip = clip
+        self.warmup = warmup
+        self.shift_readings = shift_readings
+        self.expect_readings = expect_readings
+        self.max_devices = max_devices
+        self._baselines = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._baselines)
+
+    def _baseline(self, device_id):
+        with self._lock:
+            baseline = self._baselines.get(device_id)
+            if baseline is None:
+                if len(self._baselines) >= self.max_devices:
+                    self._baselines.popitem(last=False)
+                baseline = self._baselines[device_id] = DeviceBaseline(self.features)
+            else:
+                self._baselines.move_to_end(device_id)
+            return baseline
+
+    def score(self, device_id, values):
+        """Largest robust z-score of a reading against the device baseline (0.0 during warmup)"""
+        baseline = self._baselines.get(device_id)
+        if baseline is None:
+            return 0.0
+        with baseline.lock:
+            if baseline.count < self.warmup:
+                return 0.0
+            worst = 0.0
+            for x, location, deviation, floor in zip(values, baseline.location, baseline.deviation, self.min_scale):
+                scale = max(deviation * MAD_TO_SIGMA, floor)
+                z = abs(x - location) / scale
+                if z > worst:
+                    worst = z
+            return worst
+
+    def update(self, device_id, values):
+        """Score a reading, fold it into the baseline and return (is_anomaly, score)"""
+        baseline = self._baseline(device_id)
+        values = [float(x) for x in values]
+        with baseline.lock:
+            return self._update(baseline, values)
+
+    def _update(self, baseline, values):
+        if baseline.count < self.warmup:
+            # Seed location and scale from the median and mean absolute deviation of the first readings
+            baseline.warmup.append(values)
+            baseline.count += 1
+            if baseline.count == self.warmup:
+                for i in range(self.features):
+                    column = sorted(row[i] for row in baseline.warmup)
+                    middle = len(column) // 2
+                    median = column[middle] if len(column) % 2 else (column[middle - 1] + column[middle]) / 2
+                    baseline.location[i] = median
+                    baseline.deviation[i] = sum(abs(x - median) for x in column) / len(column)
+                baseline.warmup = None
+            return False, 0.0
+
+        score = 0.0
+        alpha = self.alpha
+        for i, x in enumerate(values):
+            scale = max(baseline.deviation[i] * MAD_TO_SIGMA, self.min_scale[i])
+            difference = x - baseline.location[i]
+            z = abs(difference) / scale
+            if z > self.threshold:
+                sign = 1 if difference > 0 else -1
+                if i in baseline.expected:
+                    # Announced shift: move straight to the new level
+                    self._reseed(baseline, i, x)
+                    baseline.expected = tuple(j for j in baseline.expected if j != i)
+                    continue
+                if baseline.run_sign[i] == sign:
+                    baseline.run_count[i] += 1
+                    baseline.run_sum[i] += x
+                else:
+                    baseline.run_sign[i], baseline.run_count[i], baseline.run_sum[i] = sign, 1, x
+                if baseline.run_count[i] >= self.shift_readings:
+                    # Sustained one-sided exceedance: a new level, not an anomaly
+                    self._reseed(baseline, i, baseline.run_sum[i] / baseline.run_count[i])
+                    continue
+            else:
+                baseline.run_sign[i] = 0
+            score = max(score, z)
+            limit = self.clip * scale
+            residual = min(max(difference, -limit), limit)
+            baseline.location[i] += alpha * residual
+            baseline.deviation[i] += alpha * (abs(residual) - baseline.deviation[i])
+        baseline.count += 1
+        if baseline.expected_readings:
+            baseline.expected_readings -= 1
+            if not baseline.expected_readings:
+                baseline.expected = ()
+        return score > self.threshold, score
+
+    @staticmethod
+    def _reseed(baseline, feature, location):
+        baseline.location[feature] = location
+        baseline.run_sign[feature] = 0
+
+    def expect_shift(self, device_id, features):
+        """Announce a level shift (e.g. a watering) in the given feature indices for the next readings"""
+        baseline = self._baselines.get(device_id)
+        if baseline is None:
+            return
+        with baseline.lock:
+            if baseline.count < self.warmup:
+                return
+            baseline.expected = tuple(features)
+            baseline.expected_readings = self.expect_readings
+
+    def baseline(self, device_id):
+        """(location, scale) per feature for a device, or None during warmup"""
+        baseline = self._baselines.get(device_id)
+        if baseline is None:
+            return None
+        with baseline.lock:
+            if baseline.count < self.warmup:
+                return None
+            scale = [max(d * MAD_TO_SIGMA, floor) for d, floor in zip(baseline.deviation, self.min_scale)]
+            return list(baseline.location), scale
+
+    def reset(self, device_id=None):
+        with self._lock:
+            if device_id is None:
+                self._baselines.clear()
+            else:
+                self._baselines.pop(device_id, None)
@@ -0,0 +1,175 @@
+"""
+Structured logging off the request thread
+
+configure_logging() installs a QueueHandler on the root logger, so a log call
+on the hot path only creates a record and puts it on a bounded queue; a
+QueueListener thread formats it and writes it to stderr. Records tagged with
+a category (logger.info("...", extra={"category": "reading", ...})) can be
+sampled (keep a fraction) and rate limited (at most N per second) before
+they are queued. Warnings and errors are never sampled or limited, and a
+full queue drops the record instead of blocking the request.
+
+Extra fields passed to a log call are rendered as key=value pairs, or as
+JSON objects with format='json'.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else came from extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def parse_category_values(text):
+    """'reading=0.1,disease=20' -> {'reading': 0.1, 'disease': 20.0}"""
+    values = {}
+    for item in (text or '').split(','):
+        if '=' in item:
+            category, value = item.split('=', 1)
+            values[category.strip()] = float(value)
+    return values
+
+
+def record_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class StructuredFormatter(logging.Formatter):
+    """'LEVEL:logger:message key=value ...' lines, or one JSON object per line"""
+
+    def __init__(self, json_format=False):
+        super().__init__()
+        self.json_format = json_format
+
+    def format(self, record):
+        message = record.getMessage()
+        fields = record_fields(record)
+        if self.json_format:
+            entry = {"time": record.created, "level": record.levelname, "logger": record.name, "message": message}
+            entry.update(fields)
+            if record.exc_text or record.exc_info:
+                entry["exception"] = record.exc_text or self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+        line = f"{record.levelname}:{record.name}:{message}"
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_text or record.exc_info:
+            line += '\n' + (record.exc_text or self.formatException(record.exc_info))
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """Per-category sampling and token-bucket rate limits; untagged records and warnings pass"""
+
+    def __init__(self, sample_rates=None, rate_limits=None):
+        super().__init__()
+        self.sample_rates = dict(sample_rates or {})
+        self.rate_limits = dict(rate_limits or {})
+        self.dropped = {}
+        self._buckets = {}  # category -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        category = getattr(record, 'category', None)
+        if category is None or record.levelno >= logging.WARNING:
+            return True
+        rate = self.sample_rates.get(category)
+        limit = self.rate_limits.get(category)
+        if rate is None and limit is None:
+            return True
+        with self._lock:
+            if rate is not None and rate < 1.0 and random.random() >= rate:
+                return self._drop(category)
+            if limit is not None:
+                now = time.monotonic()
+                bucket = self._buckets.get(category)
+                if bucket is None:
+                    bucket = self._buckets[category] = [limit, now]
+                bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * limit)
+                bucket[1] = now
+                if bucket[0] < 1.0:
+                    return self._drop(category)
+                bucket[0] -= 1.0
+        return True
+
+    def _drop(self, category):
+        # Called with the lock held
+        self.dropped[category] = self.dropped.get(category, 0) + 1
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Queues records as they are; formatting happens on the listener thread"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.overflowed = 0
+
+    def prepare(self, record):
+        # Tracebacks are rendered now, while the frames still exist; the message is formatted later
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.overflowed += 1
+
+
+class LoggingPipeline:
+    """The installed handler, filter and listener (see configure_logging)"""
+
+    def __init__(self, handler, sampling, listener):
+        self.handler = handler
+        self.sampling = sampling
+        self.listener = listener
+
+    def stats(self):
+        return {
+            "queued": self.handler.queue.qsize(),
+            "overflowed": self.handler.overflowed,
+            "sampled_out": dict(self.sampling.dropped)
+        }
+
+    def stop(self):
+        """Write out queued records and stop the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            logging.getLogger().removeHandler(self.handler)
+
+
+def configure_logging(level=logging.INFO, json_format=False, sample_rates=None, rate_limits=None,
+                      queue_size=10000, stream=None, force=False):
+    """Route root logging through a background queue. Like logging.basicConfig, this does nothing
+    (and returns None) if the root logger already has handlers, unless force is set."""
+    root = logging.getLogger()
+    if root.handlers and not force:
+        return None
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(StructuredFormatter(json_format))
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    sampling = SamplingFilter(sample_rates, rate_limits)
+    handler.addFilter(sampling)
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+
+    root.addHandler(handler)
+    root.setLevel(level)
+    pipeline = LoggingPipeline(handler, sampling, listener)
+    atexit.register(pipeline.stop)
+    return pipeline
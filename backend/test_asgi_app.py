@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+ASGI Server Test Script
+
+This script checks that the ASGI server answers /data, /upload_image,
+/actuate, /dashboard_data and /plant_profile like the Flask app, passes other
+routes through to Flask, and streams live updates from the event loop.
+"""
+
+import asyncio
+import base64
+import io
+import os
+import tempfile
+import threading
+
+# Keep the test run off the on-disk history store and model registry
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+import numpy as np
+from PIL import Image
+from starlette.testclient import TestClient
+
+import app as backend
+from asgi_app import asgi_app
+from event_stream import EventBroker
+
+backend.wait_until_ready(120)
+
+
+def reading(device_id, soil_moisture=520):
+    return {"device_id": device_id, "soil_moisture": soil_moisture, "temperature": 24.0,
+            "humidity": 55.0, "light_intensity": 450}
+
+
+def leaf_jpeg():
+    buffer = io.BytesIO()
+    Image.fromarray(np.full((64, 64, 3), (60, 140, 60), dtype=np.uint8)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def test_responses_match_flask():
+    """Same status codes and payloads as the Flask app for the same requests"""
+    flask = backend.app.test_client()
+    with TestClient(asgi_app) as client:
+        for payload in (reading('asgi-a'), reading('asgi-b', soil_moisture=150)):
+            expected = flask.post('/data', json=payload)
+            response = client.post('/data', json=payload)
+            assert response.status_code == expected.status_code == 200
+            assert response.json() == expected.get_json()
+        assert client.post('/data', content=b'soil=1', headers={"Content-Type": "text/plain"}).status_code == 500
+
+        for command in ({"action": "light", "state": False}, {"action": "dance"}, {}):
+            expected = flask.post('/actuate', json=command)
+            response = client.post('/actuate', json=command)
+            assert response.status_code == expected.status_code
+            assert response.json().keys() == expected.get_json().keys()
+
+        assert client.post('/plant_profile', json={"notes": "Moved to the balcony"}).json() == \
+            flask.post('/plant_profile', json={"notes": "Moved to the balcony"}).get_json()
+        assert client.get('/plant_profile').json() == flask.get('/plant_profile').get_json()
+
+        # Other routes are served by the Flask app
+        assert client.get('/history?device_id=asgi-a').json()["count"] == 2
+
+
+def test_dashboard_etag():
+    """Snapshots carry the Flask ETag and conditional requests get 304"""
+    with TestClient(asgi_app) as client:
+        client.post('/data', json=reading('asgi-etag'))
+        response = client.get('/dashboard_data?device_id=asgi-etag')
+        expected = backend.app.test_client().get('/dashboard_data?device_id=asgi-etag')
+        assert response.headers["ETag"] == expected.headers["ETag"]
+        assert response.content == expected.data
+        assert client.get('/dashboard_data?device_id=asgi-etag',
+                          headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_upload_image():
+    """Multipart and base64 uploads are analyzed; a JSON body without an image is rejected"""
+    image = leaf_jpeg()
+    with TestClient(asgi_app) as client:
+        response = client.post('/upload_image', files={"image": ("leaf.jpg", image, "image/jpeg")},
+                               data={"device_id": "asgi-cam"})
+        assert response.status_code == 200
+        expected = backend.app.test_client().post('/upload_image', data={"image": (io.BytesIO(image), "leaf.jpg")})
+        assert response.json().keys() == expected.get_json().keys()
+        assert client.post('/upload_image', json={"image": base64.b64encode(image).decode()}).status_code == 200
+        assert client.post('/upload_image', json={}).status_code == 400
+
+
+def test_async_stream():
+    """Events published from another thread wake an async subscriber; closing ends the stream"""
+    broker = EventBroker()
+
+    async def consume():
+        subscriber = broker.subscribe_async({'a'})
+        stream = broker.stream_async(subscriber, heartbeat=5)
+        assert await stream.__anext__() == b"retry: 3000\n\n"
+        threading.Timer(0.05, broker.publish, ('a', 'reading', {"health_score": 90})).start()
+        frame = await asyncio.wait_for(stream.__anext__(), 2)
+        assert b"event: reading" in frame and b'"health_score":90' in frame
+        assert broker.subscriber_count() == 1
+        await stream.aclose()
+        assert broker.subscriber_count() == 0
+
+    asyncio.run(consume())
+
+
+if __name__ == "__main__":
+    print("ASGI Server Test")
+    print("=" * 30)
+    test_responses_match_flask()
+    test_dashboard_etag()
+    test_upload_image()
+    test_async_stream()
+    print("✅ ASGI server tests passed")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Batch Ingestion Test Script
+
+This script checks that /data/batch scores readings from many devices in one
+pass and agrees with the single-reading /data path.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+# Keep the test run off the on-disk history store and model registry
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+import app as backend
+from timeseries_store import TimeSeriesStore
+
+backend.wait_until_ready(120)
+
+
+def make_readings(count, seed=0):
+    """Build synthetic readings tagged with device IDs"""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "device_id": f"device-{i % 7}",
+            "soil_moisture": float(rng.uniform(200, 1000)),
+            "temperature": float(rng.uniform(15, 35)),
+            "humidity": float(rng.uniform(30, 80)),
+            "light_intensity": float(rng.uniform(100, 900))
+        }
+        for i in range(count)
+    ]
+
+
+def test_vectorized_scores_match_scalar():
+    """Array health scores and watering probabilities match the per-reading functions"""
+    readings = make_readings(40)
+    _, X, errors = backend.parse_batch_payload({"readings": readings})
+    assert not errors
+
+    health_scores = backend.calculate_health_scores(X)
+    water_now, probabilities, _ = backend.predict_watering_times(X)
+    for i, reading in enumerate(readings):
+        assert abs(health_scores[i] - backend.calculate_health_score(reading)) < 1e-9
+        prediction = backend.predict_watering_time(reading)
+        assert abs(probabilities[i] - prediction["confidence"]) < 1e-9
+        assert bool(water_now[i]) == prediction["water_now"]
+
+
+def test_batch_endpoint_returns_per_device_decisions():
+    """The endpoint accepts both payload forms and reports rejected readings"""
+    client = backend.app.test_client()
+    readings = make_readings(12)
+
+    response = client.post('/data/batch', json={"readings": readings + [{"device_id": "broken"}]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["count"] == 12
+    assert [result["device_id"] for result in body["results"]] == [r["device_id"] for r in readings]
+    assert body["errors"][0]["device_id"] == "broken"
+
+    fields = ["device_id"] + backend.SENSOR_FEATURES
+    rows = [[reading[field] for field in fields] for reading in readings]
+    response = client.post('/data/batch', json={"fields": fields, "rows": rows, "timestamp": 1000.0})
+    compact = response.get_json()
+    assert [r["health_score"] for r in compact["results"]] == [r["health_score"] for r in body["results"]]
+
+    assert client.post('/data/batch', json={"nothing": []}).status_code == 400
+
+
+def test_next_watering_follows_drying_forecast():
+    """Once a device has history, both paths report its projected threshold crossing"""
+    client = backend.app.test_client()
+    start = 1760000000.0
+    # Six hours of a plant drying at 5 counts/hour, half sent one by one and half in batches
+    readings = [
+        {"device_id": "drying-plant", "timestamp": start + i * 300, "soil_moisture": 800 - 5 * i * 300 / 3600,
+         "temperature": 24.0, "humidity": 60.0, "light_intensity": 500.0}
+        for i in range(73)
+    ]
+    for reading in readings[:36]:
+        assert client.post('/data', json=reading).status_code == 200
+    for i in range(36, 72, 12):
+        assert client.post('/data/batch', json={"readings": readings[i:i + 12]}).status_code == 200
+
+    last = readings[-1]
+    expected = last["timestamp"] + (last["soil_moisture"] - backend.WATERING_THRESHOLD) / 5.0 * 3600
+    next_watering = backend.predict_watering_time(last)["next_watering"]
+    assert abs(next_watering - expected) < 0.1 * (expected - last["timestamp"])
+    _, _, batch_next_watering = backend.predict_watering_times(
+        np.array([[last[field] for field in backend.SENSOR_FEATURES]]), None, ["drying-plant"])
+    assert batch_next_watering[0] == next_watering
+
+    # Predictions only read the fit; readings change it only through ingestion
+    fit = backend.drying_forecaster.forecast("drying-plant")
+    backend.predict_watering_time(dict(last, soil_moisture=1000, timestamp=last["timestamp"] + 3600))
+    assert backend.drying_forecaster.forecast("drying-plant") == fit
+    assert client.post('/data', json=last).status_code == 200
+    assert backend.drying_forecaster.forecast("drying-plant") != fit
+
+
+def test_batch_stamped_readings_of_one_device_are_all_stored():
+    """Two readings of a device under one batch timestamp both reach the history store"""
+    client = backend.app.test_client()
+    store = TimeSeriesStore(os.path.join(tempfile.mkdtemp(), 'history.db'))
+    original, backend.history_store = backend.history_store, store
+    try:
+        readings = [dict(reading, device_id="gateway-plant", soil_moisture=moisture)
+                    for reading, moisture in zip(make_readings(2), (700.0, 650.0))]
+        response = client.post('/data/batch', json={"readings": readings, "timestamp": 1760000000.0})
+        assert response.status_code == 200 and response.get_json()["count"] == 2
+
+        rows = store.scan("gateway-plant")
+        assert [row[1] for row in rows] == [700.0, 650.0]
+        assert rows[0][0] == 1760000000.0 < rows[1][0] < 1760000001.0
+        assert backend.sensor_history.window("gateway-plant")[:, 1].tolist() == [700.0, 650.0]
+    finally:
+        backend.history_store = original
+        store.close()
+
+
+def test_batch_is_logged_once_per_batch_and_device():
+    """A batch is one history transaction, and one snapshot update and live event per device"""
+    class CountingStore(TimeSeriesStore):
+        calls = 0
+
+        def append_many(self, items):
+            CountingStore.calls += 1
+            super().append_many(items)
+
+    store = CountingStore(os.path.join(tempfile.mkdtemp(), 'history.db'))
+    original, backend.history_store = backend.history_store, store
+    subscriber = backend.event_broker.subscribe(["bulk-a", "bulk-b"])
+    try:
+        readings = [dict(reading, device_id=f"bulk-{'ab'[i % 2]}", timestamp=1760000000.0 + i)
+                    for i, reading in enumerate(make_readings(200))]
+        published = backend.event_broker.published
+        backend.score_readings(*backend.parse_batch_payload({"readings": readings})[:2])
+
+        assert CountingStore.calls == 1
+        assert len(store.scan("bulk-a")) == len(store.scan("bulk-b")) == 100
+        assert backend.event_broker.published - published == 2
+        assert backend.dashboard_view.get("bulk-a").version == 1
+        frames = b"".join(subscriber.next_frames(timeout=1)).decode()
+        assert frames.count("event: reading") == 2
+
+        # The snapshot still shows the latest points, newest first
+        recent = backend.dashboard_view.get("bulk-b").payload["recent_data"]
+        assert [point["timestamp"] for point in recent] == [1760000000.0 + i for i in range(199, 179, -2)]
+    finally:
+        backend.event_broker.unsubscribe(subscriber)
+        backend.history_store = original
+        store.close()
+
+
+if __name__ == "__main__":
+    print("Batch Ingestion Test")
+    print("=" * 30)
+    test_vectorized_scores_match_scalar()
+    test_batch_endpoint_returns_per_device_decisions()
+    test_next_watering_follows_drying_forecast()
+    test_batch_stamped_readings_of_one_device_are_all_stored()
+    test_batch_is_logged_once_per_batch_and_device()
+    print("✅ Batch ingestion tests passed")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Dashboard Snapshot Test Script
+
+This script checks that /dashboard_data serves the snapshot maintained by the
+ingestion path.
+"""
+
+import os
+import tempfile
+
+# Keep the test run off the on-disk history store and model registry
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+import app as backend
+from timeseries_store import TimeSeriesStore
+
+
+def post_reading(client, device_id, soil_moisture):
+    """Send one reading through /data"""
+    return client.post('/data', json={
+        "device_id": device_id,
+        "soil_moisture": soil_moisture,
+        "temperature": 24.0,
+        "humidity": 58.0,
+        "light_intensity": 420
+    })
+
+
+def test_snapshot_tracks_each_device():
+    """Each device gets its own current readings and most-recent-first window"""
+    client = backend.app.test_client()
+    for i in range(15):
+        post_reading(client, 'shelf-a', 600 - i)
+    post_reading(client, 'shelf-b', 350)
+
+    latest = client.get('/dashboard_data').get_json()
+    assert latest["device_id"] == 'shelf-b'
+    assert latest["current_readings"]["soil_moisture"] == 350
+
+    shelf_a = client.get('/dashboard_data?device_id=shelf-a').get_json()
+    moisture = [point["soil_moisture"] for point in shelf_a["recent_data"]]
+    assert moisture == [586 + i for i in range(10)]
+    assert shelf_a["health_score"] == backend.calculate_health_score({
+        "soil_moisture": 586, "temperature": 24.0, "humidity": 58.0, "light_intensity": 420})
+
+
+def test_unchanged_snapshot_returns_not_modified():
+    """Polling tabs get a 304 until the device reports again"""
+    client = backend.app.test_client()
+    post_reading(client, 'shelf-c', 500)
+
+    first = client.get('/dashboard_data?device_id=shelf-c')
+    etag = first.headers["ETag"]
+    assert client.get('/dashboard_data?device_id=shelf-c', headers={"If-None-Match": etag}).status_code == 304
+
+    post_reading(client, 'shelf-c', 480)
+    assert client.get('/dashboard_data?device_id=shelf-c', headers={"If-None-Match": etag}).status_code == 200
+
+    # Versions restart with the view (as after a restart or in a new worker); the ETag does not repeat
+    backend.dashboard_view.clear()
+    post_reading(client, 'shelf-c', 500)
+    assert backend.dashboard_view.get('shelf-c').version == 1
+    assert client.get('/dashboard_data?device_id=shelf-c', headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_history_restore_builds_one_snapshot_per_device():
+    """Stored history refills the buffers and snapshots without touching devices that reported live"""
+    client = backend.app.test_client()
+    post_reading(client, 'live-shelf', 510)
+    with tempfile.TemporaryDirectory() as directory:
+        store = TimeSeriesStore(os.path.join(directory, 'history.db'), backend.HISTORY_COLUMNS)
+        base = 1_700_000_000.0
+        for device_id in ('live-shelf', 'stored-shelf'):
+            store.append_many([(device_id, (base + i * 60, 700 - i, 24.0, 58.0, 420, 80.0, 0, 0.1, float('nan'), 0))
+                               for i in range(25)])
+        original, backend.history_store = backend.history_store, store
+        try:
+            assert backend.restore_history() == 1
+        finally:
+            backend.history_store = original
+            store.close()
+
+    assert backend.sensor_history.count('stored-shelf') == 25
+    stored = client.get('/dashboard_data?device_id=stored-shelf').get_json()
+    assert [point["soil_moisture"] for point in stored["recent_data"]] == [676 + i for i in range(10)]
+    assert stored["current_readings"]["soil_moisture"] == 676
+    live = client.get('/dashboard_data?device_id=live-shelf').get_json()
+    assert live["current_readings"]["soil_moisture"] == 510 and len(live["recent_data"]) == 1
+
+
+if __name__ == "__main__":
+    print("Dashboard Snapshot Test")
+    print("=" * 30)
+    test_snapshot_tracks_each_device()
+    test_unchanged_snapshot_returns_not_modified()
+    test_history_restore_builds_one_snapshot_per_device()
+    print("✅ Dashboard snapshot tests passed")
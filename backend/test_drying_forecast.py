@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Drying Forecast Test Script
+
+This script checks the per-device drying-rate forecaster: rate recovery from
+noisy readings, the effect of conditions, watering detection, robustness to
+sensor glitches, per-device isolation and that concurrent readings for one
+device are applied one at a time.
+"""
+
+import math
+import random
+import threading
+import time
+
+from drying_forecast import DryingForecaster
+
+START = 1760000000.0
+
+
+def dry(forecaster, device_id, rng, hours, rate, soil=800.0, temperature=24.0, interval=60,
+        start=START, glitch_rate=0.0):
+    """Feed readings of soil drying at rate (counts/hour, at 24 C) every interval seconds; returns the last soil level and time"""
+    t = start
+    for _ in range(int(hours * 3600 / interval)):
+        t += interval
+        soil -= rate * (1 + 0.5 * (temperature - 24) / 5) * interval / 3600
+        reading = [soil + rng.gauss(0, 8), temperature + rng.gauss(0, 0.3), 60 + rng.gauss(0, 1), 500 + rng.gauss(0, 15)]
+        if rng.random() < glitch_rate:
+            reading[0] = rng.choice((0, 4095))
+        forecaster.update(device_id, t, reading)
+    return soil, t
+
+
+def test_no_forecast_before_enough_history():
+    """A new device has no forecast until min_hours of readings"""
+    forecaster = DryingForecaster(min_hours=2.0)
+    assert forecaster.update('d1', START, [800, 24, 60, 500]) is None
+    dry(forecaster, 'd1', random.Random(0), 1.5, rate=5.0)
+    assert forecaster.forecast('d1')["next_watering"] is None
+    assert forecaster.forecast('unknown') is None
+
+
+def test_recovers_rate_and_projects_crossing():
+    """The fitted rate matches the true one and the ETA is when the soil reaches the threshold"""
+    forecaster = DryingForecaster(threshold=400.0)
+    soil, t = dry(forecaster, 'd1', random.Random(1), 24, rate=5.0)
+    forecast = forecaster.forecast('d1')
+    assert abs(forecast["rate_per_hour"] - 5.0) < 0.5, forecast
+    assert abs(forecast["moisture"] - soil) < 10, forecast
+    expected_hours = (soil - 400.0) / 5.0
+    assert abs((forecast["next_watering"] - t) / 3600 - expected_hours) < 0.15 * expected_hours
+
+
+def test_warmer_room_dries_faster():
+    """Conditions enter the rate: a warm spell shortens the forecast"""
+    rng = random.Random(2)
+    forecaster = DryingForecaster()
+    soil, t = dry(forecaster, 'd1', rng, 24, rate=5.0, temperature=20.0)
+    cool = forecaster.forecast('d1')["rate_per_hour"]  # True rate 3.0
+    # Forecasts use conditions averaged over about a day, so give the average time to follow
+    dry(forecaster, 'd1', rng, 72, rate=5.0, temperature=28.0, soil=soil, start=t)
+    warm = forecaster.forecast('d1')["rate_per_hour"]  # True rate 7.0
+    assert abs(cool - 3.0) < 0.5 and abs(warm - 7.0) < 1.0, (cool, warm)
+
+
+def test_watering_restarts_level_and_keeps_rate():
+    """A confirmed rise starts a new cycle without forgetting the rate"""
+    rng = random.Random(3)
+    forecaster = DryingForecaster()
+    _, t = dry(forecaster, 'd1', rng, 24, rate=5.0, soil=700.0)
+    rate = forecaster.forecast('d1')["rate_per_hour"]
+    soil, t = dry(forecaster, 'd1', rng, 0.1, rate=5.0, soil=850.0, start=t)
+    forecast = forecaster.forecast('d1')
+    assert abs(forecast["moisture"] - soil) < 15, forecast
+    assert abs(forecast["rate_per_hour"] - rate) < 0.5
+    assert forecast["next_watering"] is not None
+
+
+def test_glitches_do_not_move_the_fit():
+    """Single open/short-circuit readings are ignored or clipped"""
+    clean = DryingForecaster()
+    noisy = DryingForecaster()
+    dry(clean, 'd1', random.Random(4), 24, rate=5.0)
+    dry(noisy, 'd1', random.Random(4), 24, rate=5.0, glitch_rate=0.01)
+    assert abs(noisy.forecast('d1')["rate_per_hour"] - clean.forecast('d1')["rate_per_hour"]) < 0.5
+    assert abs(noisy.forecast('d1')["moisture"] - clean.forecast('d1')["moisture"]) < 15
+
+
+def test_devices_are_isolated_and_bounded():
+    """Each device has its own rate; least recently seen devices are evicted"""
+    forecaster = DryingForecaster(max_devices=2)
+    rng = random.Random(5)
+    dry(forecaster, 'slow', rng, 12, rate=1.0)
+    dry(forecaster, 'fast', rng, 12, rate=8.0)
+    assert forecaster.forecast('slow')["rate_per_hour"] < 2.0 < 6.0 < forecaster.forecast('fast')["rate_per_hour"]
+    forecaster.update('new', START, [800, 24, 60, 500])
+    assert len(forecaster) == 2 and forecaster.forecast('slow') is None
+    forecaster.reset()
+    assert len(forecaster) == 0
+
+
+def test_wet_soil_that_is_not_drying_has_no_forecast():
+    """A flat moisture trace gives no threshold crossing"""
+    forecaster = DryingForecaster()
+    dry(forecaster, 'd1', random.Random(6), 24, rate=0.0)
+    forecast = forecaster.forecast('d1')
+    assert forecast["next_watering"] is None and not math.isnan(forecast["rate_per_hour"])
+
+
+def test_readings_for_one_device_are_serialized():
+    """While an update runs, another reading or forecast for that device waits; other devices do not"""
+    forecaster = DryingForecaster()
+    rng = random.Random(7)
+    _, t = dry(forecaster, 'd1', rng, 3, rate=5.0)
+    dry(forecaster, 'd2', rng, 3, rate=5.0)
+
+    entered, release = threading.Event(), threading.Event()
+    rls = forecaster._rls
+
+    def pausing_rls(state, *args):
+        if state is forecaster._devices['d1'] and not entered.is_set():
+            entered.set()
+            release.wait(5)
+        rls(state, *args)
+
+    forecaster._rls = pausing_rls
+    paused = threading.Thread(target=forecaster.update, args=('d1', t + 60, [780, 24, 60, 500]))
+    paused.start()
+    assert entered.wait(5)
+    dry(forecaster, 'd2', rng, 0.1, rate=5.0, start=t)
+    waiting = [threading.Thread(target=forecaster.update, args=('d1', t + 120, [779, 24, 60, 500])),
+               threading.Thread(target=forecaster.forecast, args=('d1',))]
+    for thread in waiting:
+        thread.start()
+    time.sleep(0.05)
+    assert all(thread.is_alive() for thread in waiting)
+
+    release.set()
+    for thread in [paused] + waiting:
+        thread.join(5)
+        assert not thread.is_alive()
+    assert forecaster._devices['d1'].timestamp == t + 120
+
+
+if __name__ == "__main__":
+    print("Drying Forecast Test")
+    print("=" * 30)
+    test_no_forecast_before_enough_history()
+    test_recovers_rate_and_projects_crossing()
+    test_warmer_room_dries_faster()
+    test_watering_restarts_level_and_keeps_rate()
+    test_glitches_do_not_move_the_fit()
+    test_devices_are_isolated_and_bounded()
+    test_wet_soil_that_is_not_drying_has_no_forecast()
+    test_readings_for_one_device_are_serialized()
+    print("✅ All drying forecast tests passed")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Live Update Stream Test Script
+
+This script checks per-device fan-out of Server-Sent Events and the
+slow-consumer backpressure policy.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+# Keep the test run off the on-disk history store and model registry
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+import app as backend
+from event_stream import EventBroker
+
+
+def parse_frames(chunk):
+    """Split SSE bytes into (event, data) pairs"""
+    events = []
+    for frame in chunk.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_events_reach_only_matching_subscribers():
+    """Per-device subscribers only see their device; wildcard subscribers see all"""
+    broker = EventBroker()
+    shelf_a = broker.subscribe({'a'})
+    everything = broker.subscribe()
+
+    broker.publish('a', 'reading', {"health_score": 90})
+    broker.publish('b', 'reading', {"health_score": 40})
+
+    assert [data["device_id"] for _, data in parse_frames(b"".join(shelf_a.next_frames(0)))] == ['a']
+    assert [data["device_id"] for _, data in parse_frames(b"".join(everything.next_frames(0)))] == ['a', 'b']
+    assert broker.wants('c')  # Wildcard subscriber is still connected
+
+    broker.unsubscribe(everything)
+    assert not broker.wants('c')
+    assert broker.wants('a')
+
+
+def test_slow_consumer_gets_resync_without_blocking_publisher():
+    """A stalled subscriber loses its backlog and gets one resync; others are unaffected"""
+    broker = EventBroker(max_queue=5)
+    slow = broker.subscribe({'a'})
+    fast = broker.subscribe({'a'}, max_queue=1000)
+
+    started = time.perf_counter()
+    for i in range(50):
+        broker.publish('a', 'reading', {"i": i})
+    assert time.perf_counter() - started < 0.1
+
+    events = parse_frames(b"".join(slow.next_frames(0)))
+    assert events[0][0] == "resync"
+    assert len(events) <= 6
+    assert events[-1][1]["i"] == 49
+    assert slow.dropped >= 44
+
+    assert [data["i"] for _, data in parse_frames(b"".join(fast.next_frames(0)))] == list(range(50))
+    assert broker.published == 50
+
+
+def test_stream_endpoint_pushes_reading_deltas():
+    """POST /data shows up on an open /stream connection for that device"""
+    client = backend.app.test_client()
+    response = client.get('/stream?device_id=stream-test', buffered=False)
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b"retry:")
+
+    client.post('/data', json={
+        "device_id": "stream-test",
+        "soil_moisture": 480,
+        "temperature": 23.5,
+        "humidity": 55,
+        "light_intensity": 600
+    })
+    event, data = parse_frames(next(chunks))[0]
+    assert event == "reading"
+    assert data["device_id"] == "stream-test"
+    assert [point["soil_moisture"] for point in data["points"]] == [480]
+    assert "recent_data" not in data
+    response.close()
+    assert not backend.event_broker.wants("stream-test")
+
+
+if __name__ == "__main__":
+    print("Live Update Stream Test")
+    print("=" * 30)
+    test_events_reach_only_matching_subscribers()
+    test_slow_consumer_gets_resync_without_blocking_publisher()
+    test_stream_endpoint_pushes_reading_deltas()
+    print("✅ Live update stream tests passed")
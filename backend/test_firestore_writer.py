@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Firestore Write-Behind Test Script
+
+This script checks that the background Firestore writer batches, retries,
+drops on overload and flushes on shutdown. Set FIRESTORE_EMULATOR_HOST
+(e.g. localhost:8080 with `docker-compose up firestore`) to also run the
+emulator round trip.
+"""
+
+import os
+import tempfile
+import time
+
+# Keep the app test run off the on-disk history store and model registry
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+from fake_firestore import FakeFirestore
+from firestore_writer import FirestoreWriter
+
+
+class FlakyFirestore(FakeFirestore):
+    """Fake client whose first few commits fail"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def _commit(self, writes):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("simulated network error")
+        super()._commit(writes)
+
+
+def test_documents_are_committed_in_batches():
+    """Many documents go out in a few WriteBatch commits and stop() flushes the rest"""
+    db = FakeFirestore()
+    writer = FirestoreWriter(db, batch_size=50, max_age=5.0).start()
+    for i in range(120):
+        assert writer.add('plant_data', {"timestamp": i})
+    writer.stop()
+
+    stats = writer.stats()
+    assert db.count('plant_data') == 120
+    assert stats["written"] == 120
+    assert stats["commits"] == db.commits <= 4
+    assert stats["queue_depth"] == 0
+
+
+def test_failed_commits_are_retried():
+    """Transient commit errors are retried with backoff"""
+    db = FlakyFirestore(failures=2)
+    writer = FirestoreWriter(db, max_age=0.01, backoff_base=0.01).start()
+    writer.add('actuations', {"action": "water"})
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    assert db.count('actuations') == 1
+    assert writer.stats()["retries"] == 2
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """A full queue rejects new documents immediately and counts them"""
+    db = FakeFirestore(commit_delay=0.2)
+    writer = FirestoreWriter(db, max_queue=5, batch_size=1, max_age=0.0).start()
+    started = time.perf_counter()
+    accepted = sum(writer.add('plant_data', {"i": i}) for i in range(50))
+    assert time.perf_counter() - started < 0.1
+    writer.stop()
+
+    assert writer.stats()["dropped"] == 50 - accepted > 0
+    assert db.count('plant_data') == accepted
+
+
+def test_app_buffers_documents_until_firebase_is_ready():
+    """Readings logged before Firebase has connected are committed once it does"""
+    import app as backend
+    backend.wait_until_ready(120)
+    backend.create_firestore_writer()  # As at import time when Firebase is configured
+    try:
+        backend.process_sensor_reading({"device_id": "early-bird", "soil_moisture": 610, "temperature": 23.5,
+                                        "humidity": 55.0, "light_intensity": 400})
+        assert backend.db is None and backend.firestore_writer.stats()["queue_depth"] == 1
+
+        db = FakeFirestore()
+        backend.db = db
+        backend.start_firestore_writer(db)
+        backend.stop_firestore_writer()
+        docs = [doc.to_dict() for doc in db.collection('plant_data').stream()]
+        assert [doc["device_id"] for doc in docs] == ["early-bird"]
+    finally:
+        # Leave the shared app without Firebase for the other tests
+        backend.stop_firestore_writer()
+        backend.discard_firestore_writer()
+        backend.db = None
+
+
+def test_emulator_round_trip():
+    """Write through the Firestore emulator when it is available"""
+    if not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+        print("FIRESTORE_EMULATOR_HOST not set, skipping emulator test")
+        return
+
+    from google.cloud import firestore as cloud_firestore
+    db = cloud_firestore.Client(project=os.environ.get('GOOGLE_CLOUD_PROJECT', 'plant-monitor-dev'))
+    marker = f"writer-test-{time.time()}"
+    writer = FirestoreWriter(db, max_age=0.05).start()
+    for i in range(10):
+        writer.add('writer_test', {"marker": marker, "i": i})
+    assert writer.stop()
+
+    docs = list(db.collection('writer_test').where('marker', '==', marker).stream())
+    assert len(docs) == 10
+
+
+if __name__ == "__main__":
+    print("Firestore Write-Behind Test")
+    print("=" * 30)
+    test_documents_are_committed_in_batches()
+    test_failed_commits_are_retried()
+    test_full_queue_drops_instead_of_blocking()
+    test_app_buffers_documents_until_firebase_is_ready()
+    test_emulator_round_trip()
+    print("✅ Firestore writer tests passed")
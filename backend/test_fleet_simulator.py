@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Fleet Simulator Test Script
+
+This script checks that simulated devices send the firmware's payload,
+follow the firmware's pump safety limits and can drive the app in-process.
+"""
+
+import os
+import random
+import tempfile
+
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+from fleet_simulator import FleetSimulator, InProcessBackend, SimulatedPlant
+
+
+def test_payload_matches_firmware():
+    """Readings carry exactly the fields sendDataToBackend() sets"""
+    plant = SimulatedPlant('esp32-1', random.Random(0))
+    payload, anomaly = plant.read()
+    assert set(payload) == {"soil_moisture", "temperature", "humidity", "light_intensity", "timestamp"}
+    assert isinstance(payload["soil_moisture"], int) and isinstance(payload["timestamp"], int)
+    assert not anomaly
+
+
+def test_watering_respects_firmware_limits():
+    """A second water command within six hours is refused, like the firmware does"""
+    plant = SimulatedPlant('esp32-1', random.Random(0))
+    plant.soil = 400
+    plant.apply({"water": True, "light": True})
+    assert plant.waterings == 1 and plant.soil > 600 and plant.grow_light
+    plant.apply({"water": True, "light": False})
+    assert plant.waterings == 1 and plant.refused_waterings == 1 and not plant.grow_light
+
+
+def test_short_run_against_app():
+    """A small fleet runs against the in-process app and the Firestore fake without errors"""
+    backend = InProcessBackend()
+    plants = [SimulatedPlant(f"esp32-{i}", random.Random(i)) for i in range(5)]
+    simulator = FleetSimulator(backend, plants, interval=0.05, jitter=0.1, concurrency=4)
+    try:
+        report = simulator.report(simulator.run(1.0))
+        assert report["requests"] >= 20
+        assert report["errors"] == 0
+        assert backend.writer_stats()["written"] >= report["requests"]
+    finally:
+        # Leave the shared app without Firebase for the other tests
+        backend.backend.stop_firestore_writer()
+        backend.backend.discard_firestore_writer()
+        backend.backend.db = None
+
+
+if __name__ == "__main__":
+    print("Fleet Simulator Test")
+    print("=" * 30)
+    test_payload_matches_firmware()
+    test_watering_respects_firmware_limits()
+    test_short_run_against_app()
+    print("✅ Fleet simulator tests passed")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Image Preprocessing Test Script
+
+This script checks that uploads in any common format are decoded into
+normalized RGB model input of the right size, written into reused buffers.
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+from image_preprocessing import ImagePreprocessor
+
+
+def encode(image, format='PNG', **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+def test_output_shape_range_and_buffer_reuse():
+    """Output is (height, width, 3) float32 in [0, 1], written into this thread's buffer"""
+    preprocessor = ImagePreprocessor((64, 32))
+    image_data = encode(Image.new('RGB', (300, 200), (255, 128, 0)), 'JPEG')
+
+    first = preprocessor.preprocess(image_data)
+    assert first.shape == (32, 64, 3) and first.dtype == np.float32
+    assert 0.0 <= first.min() and first.max() <= 1.0
+    assert abs(first[..., 0].mean() - 1.0) < 0.02
+
+    second = preprocessor.preprocess(image_data)
+    assert second is first
+
+    out = np.zeros((32, 64, 3), dtype=np.float32)
+    assert preprocessor.preprocess(image_data, out=out) is out
+
+
+def test_channel_conversion():
+    """Grayscale, palette and RGBA uploads become RGB; transparency becomes white"""
+    preprocessor = ImagePreprocessor((16, 16))
+
+    gray = preprocessor.preprocess(encode(Image.new('L', (40, 40), 51)))
+    assert np.allclose(gray, 0.2, atol=0.01)
+
+    palette = preprocessor.preprocess(encode(Image.new('RGB', (40, 40), (0, 0, 255)).convert('P')))
+    assert np.allclose(palette[..., 2], 1.0, atol=0.01) and np.allclose(palette[..., 0], 0.0, atol=0.01)
+
+    rgba = Image.new('RGBA', (40, 40), (0, 0, 0, 0))
+    rgba.paste((0, 255, 0, 255), (0, 0, 20, 40))
+    converted = preprocessor.preprocess(encode(rgba)).copy()
+    assert np.allclose(converted[:, 0], [0.0, 1.0, 0.0], atol=0.01)
+    assert np.allclose(converted[:, -1], 1.0, atol=0.01)
+
+
+def test_draft_decode_matches_full_decode():
+    """Reduced-scale JPEG decoding gives nearly the same input as a full decode"""
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)
+    image_data = encode(Image.fromarray(pixels).resize((1600, 1200)), 'JPEG', quality=95)
+
+    reduced = ImagePreprocessor((256, 256)).preprocess(image_data)
+    full = np.asarray(Image.open(io.BytesIO(image_data)).resize((256, 256)), dtype=np.float32) / 255.0
+    assert np.abs(reduced - full).mean() < 0.02
+
+
+if __name__ == "__main__":
+    print("Image Preprocessing Test")
+    print("=" * 30)
+    test_output_shape_range_and_buffer_reuse()
+    test_channel_conversion()
+    test_draft_decode_matches_full_decode()
+    print("✅ Image preprocessing tests passed")
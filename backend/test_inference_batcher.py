@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Inference Batcher Test Script
+
+This script checks that concurrent requests are grouped into batches, that
+every caller gets its own result, and that failures reach every caller.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from inference_batcher import MicroBatcher
+
+
+def test_concurrent_requests_share_batches():
+    """Requests arriving together run as one batch and get their own outputs"""
+    calls = []
+
+    def run_batch(inputs):
+        calls.append(len(inputs))
+        time.sleep(0.01)
+        return [x * 10 for x in inputs]
+
+    batcher = MicroBatcher(run_batch, max_batch=4, max_wait=0.05)
+    try:
+        with ThreadPoolExecutor(max_workers=12) as executor:
+            results = list(executor.map(batcher.submit, range(12)))
+    finally:
+        batcher.stop()
+
+    assert results == [x * 10 for x in range(12)]
+    assert max(calls) <= 4
+    assert len(calls) < 12
+    stats = batcher.stats()
+    assert stats["items"] == 12 and stats["batches"] == len(calls)
+
+
+def test_requests_up_to_the_worker_count_share_a_batch():
+    """With a free worker per request, concurrent requests still run as one batch"""
+    calls = []
+
+    def run_batch(inputs):
+        calls.append(len(inputs))
+        return inputs
+
+    def request(x):
+        # Staggered arrivals, each while idle workers are waiting for work
+        time.sleep(0.02 * x)
+        return batcher.submit(x)
+
+    batcher = MicroBatcher(run_batch, max_batch=8, max_wait=0.2, workers=4)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert sorted(executor.map(request, range(4))) == [0, 1, 2, 3]
+    finally:
+        batcher.stop()
+    assert calls == [4]
+
+
+def test_workers_run_batches_in_parallel():
+    """Each worker runs its own batch; two batches can be in the model at once"""
+    running = threading.Barrier(2, timeout=2)
+
+    def run_batch(inputs):
+        running.wait()
+        return inputs
+
+    batcher = MicroBatcher(run_batch, max_batch=1, max_wait=0.0, workers=2)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assert sorted(executor.map(batcher.submit, range(2))) == [0, 1]
+    finally:
+        batcher.stop()
+    assert batcher.stats()["batches"] == 2
+
+
+def test_single_request_waits_at_most_max_wait():
+    """A lone request is not held back waiting for a full batch"""
+    batcher = MicroBatcher(lambda inputs: inputs, max_batch=8, max_wait=0.02)
+    try:
+        started = time.perf_counter()
+        assert batcher.submit('x') == 'x'
+        assert time.perf_counter() - started < 0.5
+    finally:
+        batcher.stop()
+
+
+def test_failure_reaches_every_caller():
+    """An exception in the batch is raised in each waiting request"""
+    barrier = threading.Barrier(3)
+
+    def run_batch(inputs):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(run_batch, max_batch=3, max_wait=0.05)
+
+    def request(x):
+        barrier.wait()
+        try:
+            batcher.submit(x)
+        except RuntimeError as e:
+            return str(e)
+
+    try:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            assert list(executor.map(request, range(3))) == ["model failed"] * 3
+    finally:
+        batcher.stop()
+    assert batcher.stats()["failed"] == 3
+
+
+if __name__ == "__main__":
+    print("Inference Batcher Test")
+    print("=" * 30)
+    test_concurrent_requests_share_batches()
+    test_requests_up_to_the_worker_count_share_a_batch()
+    test_workers_run_batches_in_parallel()
+    test_single_request_waits_at_most_max_wait()
+    test_failure_reaches_every_caller()
+    print("✅ Inference batcher tests passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Interpreter Pool Test Script
+
+This script checks that the TFLite interpreter pool never hands one
+interpreter to two requests at once and records queue-wait metrics.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from interpreter_pool import InterpreterPool, PoolTimeout, batch_sizes, budgeted_pool_size, padded_batch_size
+
+
+class FakeInterpreter:
+    """Stands in for tf.lite.Interpreter and detects concurrent use"""
+
+    def __init__(self):
+        self.busy = threading.Lock()
+        self.invocations = 0
+
+    def invoke(self):
+        assert self.busy.acquire(blocking=False), "interpreter used by two threads"
+        try:
+            time.sleep(0.01)
+            self.invocations += 1
+        finally:
+            self.busy.release()
+
+
+def test_interpreters_are_never_shared():
+    """Concurrent requests each get an interpreter of their own"""
+    created = []
+    pool = InterpreterPool(lambda: created.append(FakeInterpreter()) or created[-1], size=3)
+
+    def request(_):
+        with pool.checkout() as interpreter:
+            interpreter.invoke()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(request, range(40)))
+
+    assert len(created) == 3
+    assert sum(interpreter.invocations for interpreter in created) == 40
+    stats = pool.stats()
+    assert stats["checkouts"] == 40 and stats["in_use"] == 0 and stats["waiting"] == 0
+    # Eight threads over three interpreters must have queued
+    assert stats["wait_max"] > 0
+
+
+def test_checkout_timeout():
+    """A request that cannot get an interpreter in time raises PoolTimeout"""
+    pool = InterpreterPool(FakeInterpreter, size=1)
+    with pool.checkout():
+        try:
+            with pool.checkout(timeout=0.05):
+                raise AssertionError("second checkout should time out")
+        except PoolTimeout:
+            pass
+    assert pool.stats()["timeouts"] == 1
+
+    # The interpreter is returned even when the with-block raises
+    try:
+        with pool.checkout():
+            raise ValueError
+    except ValueError:
+        pass
+    with pool.checkout(timeout=0.05):
+        pass
+
+
+def test_batches_are_padded_to_allocated_sizes():
+    """Batches go to the smallest of a few fixed sizes that fits them"""
+    assert batch_sizes(1) == (1,)
+    assert batch_sizes(8) == (1, 2, 4, 8)
+    assert batch_sizes(6) == (1, 2, 4, 6)
+    interpreters = dict.fromkeys(batch_sizes(8))
+    assert [padded_batch_size(interpreters, n) for n in range(1, 9)] == [1, 2, 4, 4, 8, 8, 8, 8]
+    try:
+        padded_batch_size(interpreters, 9)
+        raise AssertionError("a batch larger than any allocated size should be rejected")
+    except ValueError:
+        pass
+
+
+def test_pool_size_fits_the_row_budget():
+    """Slots allocating every batch size are capped by the image-row budget, not the core count"""
+    assert budgeted_pool_size(64, batch_sizes(8), 64) == 4
+    assert budgeted_pool_size(2, batch_sizes(8), 64) == 2
+    assert budgeted_pool_size(64, batch_sizes(1), 64) == 64
+    assert budgeted_pool_size(8, batch_sizes(64), 64) == 1
+
+
+if __name__ == "__main__":
+    print("Interpreter Pool Test")
+    print("=" * 30)
+    test_interpreters_are_never_shared()
+    test_checkout_timeout()
+    test_batches_are_padded_to_allocated_sizes()
+    test_pool_size_fits_the_row_budget()
+    print("✅ Interpreter pool tests passed")
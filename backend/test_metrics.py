@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Metrics Test Script
+
+This script checks the Prometheus text output of the metrics registry and
+that a /data request shows up in /metrics with its per-stage latencies.
+"""
+
+import os
+import tempfile
+
+# Keep the test run off the on-disk history store and model registry
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+import app as backend
+from metrics import MetricsRegistry
+
+backend.wait_until_ready(120)
+
+
+def sample(text, line_prefix):
+    """Value of the first exposition line starting with line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+def test_render_format():
+    """Counters, cumulative histogram buckets and gauges in the exposition format"""
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', "Requests", ('endpoint',))
+    latency = registry.histogram('latency_seconds', "Latency", ('stage',), buckets=(0.1, 1.0))
+    registry.gauge('queue_depth', "Queue depth", lambda: 3)
+    registry.gauge('broken', "Callback raises", lambda: 1 / 0)
+
+    requests.inc('data')
+    requests.inc('data', amount=2)
+    requests.inc('a"b')
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, 'parse')
+
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert '# TYPE latency_seconds histogram' in text
+    assert sample(text, 'requests_total{endpoint="data"}') == 3
+    assert sample(text, 'requests_total{endpoint="a\\"b"}') == 1
+    assert sample(text, 'latency_seconds_bucket{stage="parse",le="0.1"}') == 1
+    assert sample(text, 'latency_seconds_bucket{stage="parse",le="1.0"}') == 2
+    assert sample(text, 'latency_seconds_bucket{stage="parse",le="+Inf"}') == 3
+    assert sample(text, 'latency_seconds_count{stage="parse"}') == 3
+    assert abs(sample(text, 'latency_seconds_sum{stage="parse"}') - 5.55) < 1e-9
+    assert sample(text, 'queue_depth') == 3
+    assert '# TYPE broken gauge' in text and sample(text, 'broken') is None
+    assert latency.count('parse') == 3 and requests.value('data') == 3
+
+
+def test_constant_labels():
+    """Constant labels such as the worker slot are added to every sample"""
+    registry = MetricsRegistry({'worker': '1'})
+    registry.counter('requests_total', "Requests", ('endpoint',)).inc('data')
+    registry.histogram('latency_seconds', "Latency", buckets=(0.1,)).observe(0.05)
+    registry.gauge('queue_depth', "Queue depth", lambda: 3)
+
+    text = registry.render()
+    assert sample(text, 'requests_total{worker="1",endpoint="data"}') == 1
+    assert sample(text, 'latency_seconds_bucket{worker="1",le="0.1"}') == 1
+    assert sample(text, 'latency_seconds_count{worker="1"}') == 1
+    assert sample(text, 'queue_depth{worker="1"}') == 3
+
+
+def test_metrics_endpoint_records_requests():
+    """A /data post is counted, timed per stage and visible at /metrics"""
+    client = backend.app.test_client()
+    before = backend.request_counter.value('receive_sensor_data', 'POST', '200')
+    response = client.post('/data', json={
+        "device_id": "metrics-test",
+        "soil_moisture": 600,
+        "temperature": 24.0,
+        "humidity": 55.0,
+        "light_intensity": 500,
+        "timestamp": 1000
+    })
+    assert response.status_code == 200
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert sample(text, 'plant_http_requests_total{endpoint="receive_sensor_data",method="POST",status="200"}') == before + 1
+    for stage in ('json_parse', 'health_score', 'watering_prediction', 'anomaly_detection', 'log_data'):
+        assert sample(text, f'plant_stage_duration_seconds_count{{stage="{stage}"}}') >= 1
+    assert sample(text, 'plant_tracked_devices') >= 1
+
+    client.get('/no-such-route')
+    assert backend.request_counter.value('unmatched', 'GET', '404') >= 1
+
+
+if __name__ == "__main__":
+    print("Metrics Test")
+    print("=" * 30)
+    test_render_format()
+    test_constant_labels()
+    test_metrics_endpoint_records_requests()
+    print("✅ Metrics tests passed")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Model Registry Test Script
+
+This script checks publishing, loading and promoting versioned sensor models,
+and that the server swaps versions without disturbing in-flight requests.
+"""
+
+import errno
+import os
+import tempfile
+
+# Keep the test run off the on-disk history store and model registry
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+import app as backend
+import model_registry
+from model_registry import ModelRegistry, ModelRegistryError
+
+backend.wait_until_ready(120)
+
+
+def test_publish_load_and_promote():
+    """Versions are numbered, loadable, checksummed and can be rolled back"""
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        first = registry.publish('demo', {"weights": [1, 2, 3]}, {"features": ["a"]})
+        second = registry.publish('demo', {"weights": [4, 5, 6]}, {"features": ["a"]})
+        assert (first, second) == ('v0001', 'v0002')
+        assert registry.latest_version('demo') == second
+
+        models, metadata = registry.load('demo')
+        assert models == {"weights": [4, 5, 6]}
+        assert metadata["version"] == second
+
+        registry.promote('demo', first)
+        assert registry.load('demo')[0] == {"weights": [1, 2, 3]}
+
+        with open(os.path.join(root, 'demo', first, 'model.joblib'), 'ab') as f:
+            f.write(b'corrupted')
+        try:
+            registry.load('demo', first)
+            assert False, "corrupted artifact should not load"
+        except ModelRegistryError:
+            pass
+
+
+def test_publish_retries_only_lost_races():
+    """A taken version number is retried; any other rename error is raised and the staging copy removed"""
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        real_rename = os.rename
+        errors = [errno.ENOTEMPTY, errno.EACCES]
+
+        def failing_rename(source, target):
+            if errors:
+                code = errors.pop(0)
+                raise OSError(code, os.strerror(code), target)
+            return real_rename(source, target)
+
+        model_registry.os.rename = failing_rename
+        try:
+            registry.publish('demo', {"weights": [1]}, {"features": ["a"]})
+            assert False, "EACCES should not be retried"
+        except OSError as e:
+            assert e.errno == errno.EACCES and not errors
+        finally:
+            model_registry.os.rename = real_rename
+        assert os.listdir(os.path.join(root, 'demo')) == []
+        assert registry.publish('demo', {"weights": [1]}, {"features": ["a"]}) == 'v0001'
+
+
+def test_server_loads_and_swaps_registry_versions():
+    """Startup publishes a first version; reload swaps atomically to a newer one"""
+    registry = backend.model_registry
+    assert backend.sensor_models.version == registry.latest_version(backend.SENSOR_MODELS_NAME)
+
+    in_flight = backend.sensor_models
+    models, metadata = backend.train_models()
+    metadata["metrics"]["note"] = "retrained"
+    new_version = registry.publish(backend.SENSOR_MODELS_NAME, models, metadata)
+
+    client = backend.app.test_client()
+    original_token, backend.ADMIN_TOKEN = backend.ADMIN_TOKEN, ''
+    try:
+        # Refused without a configured token, or with the wrong one
+        assert client.post('/models/reload', json={}).status_code == 403
+        backend.ADMIN_TOKEN = 'secret'
+        headers = {backend.ADMIN_HEADER: 'secret'}
+        assert client.post('/models/reload', json={}, headers={backend.ADMIN_HEADER: 'wrong'}).status_code == 403
+        assert backend.sensor_models is in_flight
+
+        # Failures are logged; the client gets no paths or exception text
+        failed = client.post('/models/reload', json={"version": "v9999"}, headers=headers)
+        assert failed.status_code == 500
+        assert failed.get_json() == {"error": "Failed to reload sensor models"}
+
+        response = client.post('/models/reload', json={}, headers=headers)
+    finally:
+        backend.ADMIN_TOKEN = original_token
+    assert response.get_json()["active"] == new_version
+    assert backend.sensor_models.version == new_version
+    # A request that already grabbed the old models can still finish with them
+    assert in_flight is not backend.sensor_models
+    reading = {"soil_moisture": 300, "temperature": 25, "humidity": 60, "light_intensity": 500}
+    expected = in_flight.watering_model.predict_proba([[300, 25, 60, 500]])[0][1]
+    assert backend.predict_watering_time(reading, in_flight)["confidence"] == expected
+
+    listing = client.get('/models').get_json()
+    assert listing["active"] == listing["latest"] == new_version
+    assert len(listing["versions"]) >= 2
+
+
+if __name__ == "__main__":
+    print("Model Registry Test")
+    print("=" * 30)
+    test_publish_load_and_promote()
+    test_publish_retries_only_lost_races()
+    test_server_loads_and_swaps_registry_versions()
+    print("✅ Model registry tests passed")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Quantized Model Serving Test Script
+
+This script converts a small stand-in disease model to float and int8
+TFLite and checks that the backend detects each model's input/output dtype
+and input size, feeds it correctly encoded pixels and returns comparable
+probabilities.
+"""
+
+import functools
+import io
+import os
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+import numpy as np
+from PIL import Image
+
+import app as backend
+
+
+def convert_stand_in_models(directory, size=256):
+    """Float and fully int8 TFLite exports of the same small CNN"""
+    import tensorflow as tf
+    tf.random.set_seed(0)
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(size, size, 3)),
+        tf.keras.layers.Conv2D(8, 3, strides=4, activation='relu'),
+        tf.keras.layers.Conv2D(16, 3, strides=4, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(15, activation='softmax')
+    ])
+    rng = np.random.default_rng(0)
+
+    def representative_dataset():
+        for _ in range(20):
+            yield [rng.random((1, size, size, 3), dtype=np.float32)]
+
+    paths = {}
+    for name in ('float', 'int8'):
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        if name == 'int8':
+            converter.optimizations = {tf.lite.Optimize.DEFAULT}
+            converter.representative_dataset = representative_dataset
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            converter.inference_input_type = tf.uint8
+            converter.inference_output_type = tf.uint8
+        paths[name] = os.path.join(directory, f'{name}.tflite')
+        with open(paths[name], 'wb') as f:
+            f.write(converter.convert())
+    return paths
+
+
+def leaf_image():
+    rng = np.random.default_rng(1)
+    pixels = rng.integers(0, 256, (32, 32, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).resize((640, 480)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def requires_tensorflow(test):
+    """Skip (with a note) when TensorFlow is not installed"""
+    @functools.wraps(test)
+    def run():
+        try:
+            import tensorflow  # noqa: F401
+        except ImportError:
+            print(f"TensorFlow not installed; skipping {test.__name__}")
+            return
+        test()
+    return run
+
+
+@contextmanager
+def served_model(path):
+    """Serve the TFLite model at path for the with-block, then restore the backend's no-model state"""
+    backend.wait_until_ready(120)
+    original_path = backend.DISEASE_MODEL_PATH
+    backend.DISEASE_MODEL_PATH = path
+    try:
+        backend.initialize_models()
+        assert backend.disease_model is not None, f"{path} did not load"
+        yield
+    finally:
+        if backend.disease_batcher is not None:
+            backend.disease_batcher.stop()
+        backend.disease_batcher = None
+        backend.disease_model = None
+        backend.disease_preprocessor = backend.ImagePreprocessor(backend.DISEASE_INPUT_SIZE)
+        backend.DISEASE_MODEL_PATH = original_path
+
+
+@requires_tensorflow
+def test_int8_model_is_served_with_quantized_io():
+    """uint8 models get raw pixels and their output is dequantized to probabilities"""
+    paths = convert_stand_in_models(tempfile.mkdtemp())
+    image = leaf_image()
+    probabilities = {}
+    for name, path in paths.items():
+        with served_model(path):
+            images = [backend.disease_preprocessor.preprocess(image).copy()]
+            probabilities[name] = backend.run_disease_batch(images)[0]
+            assert 0.0 <= backend.analyze_plant_disease(image)["confidence"] <= 1.0
+            if name == 'int8':
+                assert backend.disease_preprocessor.dtype == np.uint8
+                assert images[0].dtype == np.uint8 and images[0].max() > 1
+
+    for name in ('float', 'int8'):
+        assert probabilities[name].dtype == np.float32
+        assert abs(float(probabilities[name].sum()) - 1.0) < 0.05
+    assert np.abs(probabilities['float'] - probabilities['int8']).max() < 0.05
+
+
+@requires_tensorflow
+def test_input_size_comes_from_model():
+    """A model exported at another resolution is served without configuration"""
+    paths = convert_stand_in_models(tempfile.mkdtemp(), size=160)
+    with served_model(paths['float']):
+        assert backend.disease_preprocessor.size == (160, 160)
+        image = backend.disease_preprocessor.preprocess(leaf_image()).copy()
+        assert image.shape == (160, 160, 3)
+        assert abs(float(backend.run_disease_batch([image])[0].sum()) - 1.0) < 0.05
+
+
+@requires_tensorflow
+def test_batches_reuse_preallocated_interpreters():
+    """Any batch size is padded onto an interpreter allocated at load time, never reallocated"""
+    paths = convert_stand_in_models(tempfile.mkdtemp(), size=64)
+    with served_model(paths['float']):
+        rng = np.random.default_rng(2)
+        images = [rng.random((64, 64, 3), dtype=np.float32) for _ in range(backend.DISEASE_BATCH_MAX)]
+        single = [backend.run_disease_batch([image])[0] for image in images]
+
+        def reallocated(*args, **kwargs):
+            raise AssertionError("tensors reallocated for a batch")
+
+        with ExitStack() as stack:
+            slots = [stack.enter_context(backend.disease_model.checkout())
+                     for _ in range(backend.disease_model.size)]
+        for interpreters in slots:
+            for size, interpreter in interpreters.items():
+                assert interpreter.get_input_details()[0]['shape'][0] == size
+                interpreter.allocate_tensors = interpreter.resize_tensor_input = reallocated
+
+        for count in range(1, len(images) + 1):
+            output = backend.run_disease_batch(images[:count])
+            assert len(output) == count
+            for probabilities, expected in zip(output, single):
+                assert np.abs(probabilities - expected).max() < 1e-5
+
+
+if __name__ == "__main__":
+    print("Quantized Model Serving Test")
+    print("=" * 30)
+    test_int8_model_is_served_with_quantized_io()
+    test_input_size_comes_from_model()
+    test_batches_reuse_preallocated_interpreters()
+    print("✅ Quantized model serving tests passed")
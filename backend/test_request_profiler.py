@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Request Profiler Test Script
+
+This script checks that requests are profiled when sampled or when they send
+the profile token, and that captures can be listed and downloaded.
+"""
+
+import io
+import marshal
+import os
+import pstats
+import tempfile
+
+# Keep the test run off the on-disk history store and model registry
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+import app as backend
+from request_profiler import ASGIProfilingMiddleware, PROFILE_HEADER, ProfilingMiddleware, RequestProfiler
+
+backend.wait_until_ready(120)
+
+READING = {
+    "device_id": "profile-test",
+    "soil_moisture": 600,
+    "temperature": 24.0,
+    "humidity": 55.0,
+    "light_intensity": 500,
+    "timestamp": 1000
+}
+
+
+def test_selection():
+    """Off by default; the header selects a request, sampling selects a fraction"""
+    assert not RequestProfiler().enabled
+    assert not backend.request_profiler.enabled
+    assert not isinstance(backend.app.wsgi_app, ProfilingMiddleware)
+
+    profiler = RequestProfiler(token='secret')
+    assert profiler.reason({'HTTP_X_PROFILE_TOKEN': 'secret'}) == 'header'
+    assert profiler.reason({'HTTP_X_PROFILE_TOKEN': 'wrong'}) is None
+    assert profiler.reason({}) is None
+    assert RequestProfiler(sample_rate=1.0).reason({}) == 'sample'
+
+
+def test_capture_list_and_download():
+    """A request with the token is captured and served as pstats data and text"""
+    original_app, original_profiler = backend.app.wsgi_app, backend.request_profiler
+    profiler = RequestProfiler(token='secret', max_profiles=2)
+    backend.request_profiler = profiler
+    backend.app.wsgi_app = ProfilingMiddleware(original_app, profiler)
+    try:
+        client = backend.app.test_client()
+        headers = {PROFILE_HEADER: 'secret'}
+        assert client.post('/data', json=READING).status_code == 200
+        assert profiler.captured == 0
+        assert client.post('/data', json=READING, headers=headers).status_code == 200
+        assert profiler.captured == 1
+
+        assert client.get('/profiles').status_code == 403
+        listing = client.get('/profiles', headers=headers).get_json()
+        assert len(listing["profiles"]) == 1
+        captured = listing["profiles"][0]
+        assert captured["path"] == '/data' and captured["method"] == 'POST'
+        assert captured["status"] == 200 and captured["reason"] == 'header'
+        assert captured["duration_ms"] > 0 and captured["functions"] > 0
+
+        response = client.get(f'/profiles/{captured["id"]}', headers=headers)
+        assert response.status_code == 200
+        stats = pstats.Stats(write_profile(response.data), stream=io.StringIO())
+        assert any(name == 'receive_sensor_data' for _, _, name in stats.stats)
+
+        text = client.get(f'/profiles/{captured["id"]}?format=text', headers=headers).get_data(as_text=True)
+        assert 'receive_sensor_data' in text
+        assert client.get('/profiles/9999', headers=headers).status_code == 404
+
+        # Only the most recent max_profiles are kept
+        for _ in range(3):
+            client.get('/health', headers=headers)
+        assert [p["path"] for p in profiler.list()] == ['/health', '/health']
+    finally:
+        backend.app.wsgi_app, backend.request_profiler = original_app, original_profiler
+
+
+def test_profiles_need_a_token():
+    """Sampling alone captures profiles but never serves them"""
+    original_app, original_profiler = backend.app.wsgi_app, backend.request_profiler
+    profiler = RequestProfiler(sample_rate=1.0)
+    backend.request_profiler = profiler
+    backend.app.wsgi_app = ProfilingMiddleware(original_app, profiler)
+    try:
+        client = backend.app.test_client()
+        assert client.post('/data', json=READING).status_code == 200
+        assert profiler.captured == 1
+        assert client.get('/profiles').status_code == 403
+        assert client.get('/profiles', headers={PROFILE_HEADER: ''}).status_code == 403
+        assert client.get(f'/profiles/{profiler.list()[0]["id"]}').status_code == 403
+    finally:
+        backend.app.wsgi_app, backend.request_profiler = original_app, original_profiler
+
+
+def test_native_asgi_routes_are_profiled():
+    """The ASGI middleware captures the work of routes that bypass the Flask app"""
+    from starlette.testclient import TestClient
+    from asgi_app import asgi_app
+
+    original_profiler = backend.request_profiler
+    profiler = RequestProfiler(token='secret')
+    backend.request_profiler = profiler
+    try:
+        client = TestClient(ASGIProfilingMiddleware(asgi_app, profiler))
+        headers = {PROFILE_HEADER: 'secret'}
+        assert client.post('/data', json=READING).status_code == 200
+        assert profiler.captured == 0
+        assert client.post('/data', json=READING, headers=headers).status_code == 200
+        assert client.get('/dashboard_data', headers=headers).status_code == 200
+        assert profiler.captured == 2
+
+        captured = client.get('/profiles', headers=headers).json()["profiles"]
+        assert [(p["path"], p["status"]) for p in captured] == [('/dashboard_data', 200), ('/data', 200)]
+        response = client.get(f'/profiles/{captured[1]["id"]}', headers=headers)
+        stats = pstats.Stats(write_profile(response.content), stream=io.StringIO())
+        assert any(name == 'process_sensor_reading' for _, _, name in stats.stats)
+        assert profiler.captured == 2
+    finally:
+        backend.request_profiler = original_profiler
+
+
+def write_profile(data):
+    """A path to the downloaded .prof bytes, as pstats.Stats expects a file"""
+    path = os.path.join(tempfile.mkdtemp(), 'request.prof')
+    with open(path, 'wb') as f:
+        f.write(data)
+    assert isinstance(marshal.loads(data), dict)
+    return path
+
+
+if __name__ == "__main__":
+    print("Request Profiler Test")
+    print("=" * 30)
+    test_selection()
+    test_capture_list_and_download()
+    test_profiles_need_a_token()
+    test_native_asgi_routes_are_profiled()
+    print("✅ Request profiler tests passed")
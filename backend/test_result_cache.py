@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Result Cache Test Script
+
+This script checks the disease analysis result cache: exact and
+near-duplicate hits, LRU and memory-budget eviction, expiry and
+invalidation when the model version changes.
+"""
+
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+from result_cache import ResultCache, content_hash, dhash
+
+RESULT = {"disease": "Tomato_healthy", "confidence": 0.93, "treatment": "Keep up the good care."}
+
+
+def leaf_jpeg(quality, seed=0):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).resize((640, 480)).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def test_exact_hits_and_lru_eviction():
+    """Repeat bytes hit; the least recently used entry is evicted first"""
+    cache = ResultCache(max_entries=2)
+    cache.set_version('v1')
+    for name in (b'a', b'b'):
+        assert cache.put(content_hash(name), dict(RESULT, disease=name.decode()), version='v1')
+    assert cache.get(content_hash(b'a'))['disease'] == 'a'
+    cache.put(content_hash(b'c'), RESULT, version='v1')
+
+    assert cache.get(content_hash(b'b')) is None
+    assert cache.get(content_hash(b'a')) is not None
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["evictions"] == 1
+
+
+def test_memory_budget():
+    """Entries are evicted to stay within the byte budget"""
+    cache = ResultCache(max_entries=1000, max_bytes=2000)
+    for i in range(50):
+        cache.put(content_hash(bytes([i])), RESULT)
+    assert 0 < len(cache) < 50
+    assert cache.stats()["bytes"] <= 2000
+
+
+def test_expiry_and_version_invalidation():
+    """Entries expire after ttl and are dropped when the model version changes"""
+    cache = ResultCache(ttl=0.05)
+    cache.set_version('v1')
+    key = content_hash(b'leaf')
+    cache.put(key, RESULT, version='v1')
+    time.sleep(0.06)
+    assert cache.get(key) is None and cache.stats()["expirations"] == 1
+
+    cache.ttl = 60
+    cache.put(key, RESULT, version='v1')
+    cache.set_version('v2')
+    assert cache.get(key) is None and cache.stats()["invalidations"] == 1
+
+    # A result computed by the old model that finishes after the swap is not stored
+    assert not cache.put(key, RESULT, version='v1')
+    assert cache.get(key) is None
+
+
+def test_lookup_matches_near_duplicates():
+    """With perceptual hashing, a re-encoded upload hits; a different image does not"""
+    original, recompressed, other = leaf_jpeg(95), leaf_jpeg(60), leaf_jpeg(95, seed=1)
+    assert original != recompressed
+    assert bin(dhash(original) ^ dhash(recompressed)).count('1') <= 4
+
+    exact_only = ResultCache()
+    _, key, perceptual = exact_only.lookup(original)
+    assert perceptual is None
+    exact_only.put(key, RESULT)
+    assert exact_only.lookup(original)[0] == RESULT
+    assert exact_only.lookup(recompressed)[0] is None
+
+    cache = ResultCache(perceptual=True, max_distance=4)
+    result, key, perceptual = cache.lookup(original)
+    assert result is None and perceptual is not None
+    cache.put(key, RESULT, perceptual)
+    assert cache.lookup(recompressed)[0] == RESULT
+    assert cache.lookup(other)[0] is None
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_near_lookup_checks_only_sharing_bands():
+    """A near-duplicate is found among many entries without scanning them, and eviction unindexes it"""
+    rng = np.random.default_rng(2)
+    cache = ResultCache(max_entries=20000, max_bytes=1 << 30, perceptual=True, max_distance=4)
+    hashes = [int(value) for value in rng.integers(0, 1 << 63, 10000, dtype=np.int64)]
+    for i, perceptual in enumerate(hashes):
+        cache.put(content_hash(str(i).encode()), dict(RESULT, disease=str(i)), perceptual)
+
+    checked = []
+    live = cache._live
+    cache._live = lambda key, now: checked.append(key) or live(key, now)
+    target = hashes[1234]
+    near = target ^ (1 << 3) ^ (1 << 20) ^ (1 << 41) ^ (1 << 60)  # Four bits off, one per band
+    assert cache.get(None, near)['disease'] == '1234'
+    assert len(checked) < 50
+    assert cache.get(None, target ^ 0b1111) is not None
+    checked.clear()
+    assert cache.get(None, target ^ 0b11111) is None  # Five bits off
+    assert len(checked) < 50
+
+    cache._live = live
+    cache.clear()
+    assert cache.get(None, target) is None and not cache._near
+
+
+if __name__ == "__main__":
+    print("Result Cache Test")
+    print("=" * 30)
+    test_exact_hits_and_lru_eviction()
+    test_memory_budget()
+    test_expiry_and_version_invalidation()
+    test_lookup_matches_near_duplicates()
+    test_near_lookup_checks_only_sharing_bands()
+    print("✅ Result cache tests passed")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Ring Buffer Test Script
+
+This script checks the per-device ring buffers used for sensor history.
+"""
+
+import numpy as np
+
+from ring_buffer import DeviceBuffers, RingBuffer
+
+
+def test_window_is_ordered_zero_copy_view():
+    """Windows return the newest rows oldest-first without copying"""
+    buffer = RingBuffer(5, columns=('a', 'b'))
+    for i in range(12):
+        buffer.append((i, i * 10))
+
+    window = buffer.window()
+    assert len(buffer) == 5
+    assert window[:, 0].tolist() == [7, 8, 9, 10, 11]
+    assert buffer.window(2)[:, 1].tolist() == [100, 110]
+    assert np.shares_memory(window, buffer._data)
+    assert not window.flags.writeable
+    assert buffer.latest()[0] == 11
+
+
+def test_device_buffers_are_isolated_and_bounded():
+    """Devices keep separate histories and the least recently updated one is evicted"""
+    buffers = DeviceBuffers(3, columns=('value',), max_devices=2)
+    buffers.append('a', (1,))
+    buffers.append('b', (2,))
+    buffers.append('a', (3,))
+    assert buffers.window('a')[:, 0].tolist() == [1, 3]
+    assert buffers.latest_device() == 'a'
+
+    buffers.append('c', (4,))
+    assert 'b' not in buffers
+    assert buffers.devices() == ['a', 'c']
+    assert buffers.nbytes <= buffers.max_nbytes()
+
+
+if __name__ == "__main__":
+    print("Ring Buffer Test")
+    print("=" * 30)
+    test_window_is_ordered_zero_copy_view()
+    test_device_buffers_are_isolated_and_bounded()
+    print("✅ Ring buffer tests passed")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Shared State Test Script
+
+This script checks the state shared by server workers: dashboard snapshots
+written by their devices' owners and read by every worker, the shared plant
+profile, live events relayed to another worker's subscribers, history
+partitions created by another process, and the single-holder file locks.
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+from dashboard_view import DashboardView
+from event_stream import EventBroker
+from ring_buffer import HISTORY_COLUMNS
+from shared_state import (STORE_SNAPSHOT, SharedDashboardView, SharedEventRelay, SharedState, file_lock,
+                          hold_file_lock)
+from timeseries_store import TimeSeriesStore
+
+
+def make_row(timestamp, soil_moisture):
+    return np.array([timestamp, soil_moisture, 22.0, 50.0, 400.0, 80.0, 0.0, 0.1, np.nan, 0.0])
+
+
+def write_readings(path, device_id, start, count):
+    """Worker process body: fold readings into the shared dashboard view"""
+    view = SharedDashboardView(SharedState(path), HISTORY_COLUMNS, recent_points=10)
+    for i in range(start, start + count):
+        view.update(device_id, make_row(1760000000 + i, 300 + i))
+
+
+def test_snapshots_match_in_memory_view():
+    """Every worker serves the bytes the device's owner built, as a single in-memory view would"""
+    path = os.path.join(tempfile.mkdtemp(), 'shared_state.db')
+    worker_a = SharedDashboardView(SharedState(path), HISTORY_COLUMNS, recent_points=3)
+    worker_b = SharedDashboardView(SharedState(path), HISTORY_COLUMNS, recent_points=3)
+    local = DashboardView(HISTORY_COLUMNS, recent_points=3)
+    for i in range(5):
+        row = make_row(1760000000 + i, 500 + i)
+        snapshot = worker_a.update('plant-1', row)
+        local.update('plant-1', row)
+        assert snapshot.body == local.get('plant-1').body
+    worker_b.update('plant-2', make_row(1760000010, 700))
+
+    for worker in (worker_a, worker_b):
+        assert worker.get('plant-1').body == local.get('plant-1').body
+        assert worker.get('plant-1').payload == local.get('plant-1').payload
+        assert worker.get('plant-1').version == 5
+        assert worker.latest_device() == 'plant-2'
+        assert worker.get().device_id == 'plant-2'
+        assert worker.devices() == ['plant-1', 'plant-2'] and len(worker) == 2
+    assert worker_b.get('unknown') is None
+    etag = worker_a.get('plant-1').etag()
+    assert worker_b.get('plant-1').etag() == etag
+
+    # A restarted owner carries on the stored recent points, under its own epoch
+    restarted = SharedDashboardView(SharedState(path), HISTORY_COLUMNS, recent_points=3)
+    row = make_row(1760000005, 505)
+    assert restarted.update('plant-1', row).body == local.update('plant-1', row).body
+    assert worker_b.get('plant-1').version == 6 and worker_b.get('plant-1').etag() != etag
+
+    # A batch of rows is folded in as one update
+    rows = [make_row(1760000100 + i, 600 + i) for i in range(4)]
+    assert restarted.update_many('plant-1', rows).body == local.update_many('plant-1', rows).body
+    assert worker_a.get('plant-1').version == 7
+    assert [point["soil_moisture"] for point in worker_a.get('plant-1').payload["recent_data"]] == [603, 602, 601]
+
+    # Writes never go back to an older version of the same writer
+    stale = restarted.get('plant-1')
+    restarted.state.execute(STORE_SNAPSHOT, ('plant-1', stale.epoch, 6, 0.0, b'{}'))
+    assert worker_a.get('plant-1').body == stale.body
+
+    worker_b.clear()
+    assert worker_a.get('plant-1') is None and worker_a.latest_device() is None
+
+
+def test_concurrent_processes():
+    """Owners in separate processes write their devices' snapshots side by side"""
+    path = os.path.join(tempfile.mkdtemp(), 'shared_state.db')
+    SharedState(path).close()
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=write_readings, args=(path, device_id, 0, 40))
+                 for device_id in ('plant-1', 'plant-2')]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+    local = DashboardView(HISTORY_COLUMNS, recent_points=10)
+    for i in range(40):
+        local.update('plant-1', make_row(1760000000 + i, 300 + i))
+    view = SharedDashboardView(SharedState(path), HISTORY_COLUMNS, recent_points=10)
+    for device_id in ('plant-1', 'plant-2'):
+        snapshot = view.get(device_id)
+        assert snapshot.version == 40
+        assert snapshot.payload["recent_data"] == local.get('plant-1').payload["recent_data"]
+
+
+def test_shared_values():
+    """Profile updates merge into the stored value and are seen by every process"""
+    path = os.path.join(tempfile.mkdtemp(), 'shared_state.db')
+    first, second = SharedState(path), SharedState(path)
+    default = {"plantName": "Green Friend", "plantType": "Pothos"}
+    assert first.get('plant_profile', default) == default
+    first.update('plant_profile', {"plantName": "Basil Bob"}, default)
+    assert second.get('plant_profile') == {"plantName": "Basil Bob", "plantType": "Pothos"}
+    second.set('plant_profile', {"plantName": "Fern"})
+    assert first.get('plant_profile') == {"plantName": "Fern"}
+    assert default == {"plantName": "Green Friend", "plantType": "Pothos"}
+
+
+def test_events_reach_other_workers():
+    """An event published in one worker reaches /stream clients of another, and is only logged while one listens"""
+    path = os.path.join(tempfile.mkdtemp(), 'shared_state.db')
+    relay_a = SharedEventRelay(SharedState(path), EventBroker())
+    relay_b = SharedEventRelay(SharedState(path), EventBroker())
+    for relay in (relay_a, relay_b):
+        relay.start()
+        relay.close()  # Stop the polling thread; the test polls by hand
+
+    # Nobody listens anywhere: nothing is built or logged
+    relay_a.poll()
+    assert not relay_a.wants('plant-1')
+    relay_a.publish('plant-1', 'reading', {"health_score": 80})
+    assert relay_a.state.query("SELECT COUNT(*) FROM stream_events")[0][0] == 0
+
+    subscriber = relay_b.broker.subscribe(['plant-1'])
+    relay_b.poll()
+    relay_a.poll()
+    assert relay_a.wants('plant-1')
+    relay_a.publish('plant-1', 'reading', {"health_score": 81})
+    relay_a.publish('plant-2', 'reading', {"health_score": 50})
+    assert relay_b.poll() == 2
+    frames = subscriber.next_frames(timeout=0)
+    assert len(frames) == 1 and b'"health_score":81' in frames[0] and b'"device_id":"plant-1"' in frames[0]
+    # The publisher's own poll skips its events (its subscribers already have them)
+    assert relay_a.poll() == 2 and relay_a.relayed == 0
+
+    relay_b.broker.unsubscribe(subscriber)
+    relay_b.poll()
+    relay_a.poll()
+    assert not relay_a.wants('plant-1')
+
+
+def test_history_partitions_across_processes():
+    """A shared store reads partitions another process created after it opened"""
+    path = os.path.join(tempfile.mkdtemp(), 'history.db')
+    reader = TimeSeriesStore(path, shared=True)
+    writer = TimeSeriesStore(path, shared=True)
+    writer.append('plant-1', make_row(1760000000, 500))
+    writer.append('plant-1', make_row(1760000000 + 86400, 510))
+    assert len(reader.scan('plant-1')) == 2
+    assert reader.devices() == ['plant-1']
+
+
+def test_file_locks():
+    """Only one holder at a time"""
+    path = os.path.join(tempfile.mkdtemp(), 'maintenance.lock')
+    leader = hold_file_lock(path)
+    assert leader is not None
+    assert hold_file_lock(path) is None
+    with file_lock(path, blocking=False) as acquired:
+        assert not acquired
+    leader.close()
+    with file_lock(path, blocking=False) as acquired:
+        assert acquired
+
+
+if __name__ == "__main__":
+    print("Shared State Test")
+    print("=" * 30)
+    test_snapshots_match_in_memory_view()
+    test_concurrent_processes()
+    test_shared_values()
+    test_events_reach_other_workers()
+    test_history_partitions_across_processes()
+    test_file_locks()
+    print("✅ Shared state tests passed")
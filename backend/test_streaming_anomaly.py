@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Streaming Anomaly Detector Test Script
+
+This script checks the per-device robust z-score detector: the warmup
+period, spike detection, adaptation to slow drift, per-device isolation and
+that concurrent readings for one device are applied one at a time.
+"""
+
+import random
+import threading
+import time
+
+from streaming_anomaly import StreamingAnomalyDetector
+
+MIN_SCALE = [10.0, 0.3, 1.0, 10.0]
+
+
+def normal_reading(rng, soil=600.0):
+    return [soil + rng.gauss(0, 15), 24 + rng.gauss(0, 0.4), 60 + rng.gauss(0, 1.5), 500 + rng.gauss(0, 25)]
+
+
+def test_warmup_never_flags():
+    """Readings during warmup are never anomalies, however extreme"""
+    detector = StreamingAnomalyDetector(MIN_SCALE, warmup=10)
+    for i in range(10):
+        is_anomaly, score = detector.update('d1', [600 if i % 2 else 5000, 24, 60, 500])
+        assert not is_anomaly and score == 0.0
+    assert detector.baseline('d1') is not None
+
+
+def test_spike_detected_and_baseline_robust():
+    """A large spike is flagged and barely moves the baseline"""
+    rng = random.Random(1)
+    detector = StreamingAnomalyDetector(MIN_SCALE)
+    for _ in range(200):
+        detector.update('d1', normal_reading(rng))
+    location_before = detector.baseline('d1')[0][0]
+
+    is_anomaly, score = detector.update('d1', [2000, 24, 60, 500])
+    assert is_anomaly and score > detector.threshold
+    assert abs(detector.baseline('d1')[0][0] - location_before) < 20
+
+    is_anomaly, _ = detector.update('d1', normal_reading(rng))
+    assert not is_anomaly
+
+
+def test_false_positive_rate_on_clean_stream():
+    """Gaussian noise alone rarely crosses the threshold"""
+    rng = random.Random(2)
+    detector = StreamingAnomalyDetector(MIN_SCALE)
+    flagged = sum(detector.update('d1', normal_reading(rng))[0] for _ in range(2000))
+    assert flagged <= 5, flagged
+
+
+def test_follows_slow_drift():
+    """A plant slowly drying out is tracked, not flagged"""
+    rng = random.Random(3)
+    detector = StreamingAnomalyDetector(MIN_SCALE)
+    flagged = 0
+    for i in range(600):
+        flagged += detector.update('d1', normal_reading(rng, soil=900 - 0.8 * i))[0]
+    assert flagged <= 3, flagged
+    assert abs(detector.baseline('d1')[0][0] - (900 - 0.8 * 600)) < 60
+
+
+def test_devices_are_isolated():
+    """Each device is judged against its own baseline"""
+    rng = random.Random(4)
+    detector = StreamingAnomalyDetector(MIN_SCALE)
+    for _ in range(100):
+        detector.update('dry', normal_reading(rng, soil=300))
+        detector.update('wet', normal_reading(rng, soil=900))
+    # Normal for 'wet', far outside 'dry'
+    assert detector.update('dry', [900, 24, 60, 500])[0]
+    assert not detector.update('wet', [900, 24, 60, 500])[0]
+    # A new device starts in warmup
+    assert detector.update('new', [900, 24, 60, 500]) == (False, 0.0)
+
+
+def test_level_shift_is_adopted():
+    """A watering-sized step is flagged for at most shift_readings - 1 readings, or not at all when announced"""
+    for announced in (False, True):
+        rng = random.Random(6)
+        detector = StreamingAnomalyDetector(MIN_SCALE, shift_readings=3)
+        for _ in range(300):
+            detector.update('d1', normal_reading(rng, soil=420))
+        if announced:
+            detector.expect_shift('d1', [0])
+        flagged = [i for i in range(100) if detector.update('d1', normal_reading(rng, soil=850))[0]]
+        assert flagged == ([] if announced else [0, 1]), flagged
+        assert abs(detector.baseline('d1')[0][0] - 850) < 30
+        # A spike on top of the new level is still an anomaly
+        assert detector.update('d1', [2000, 24, 60, 500])[0]
+
+
+def test_device_limit_and_reset():
+    """Least recently seen devices are evicted; reset forgets a baseline"""
+    detector = StreamingAnomalyDetector(MIN_SCALE, max_devices=2)
+    for device_id in ('a', 'b', 'c'):
+        detector.update(device_id, [600, 24, 60, 500])
+    assert len(detector) == 2
+    detector.reset('c')
+    assert len(detector) == 1
+    detector.reset()
+    assert len(detector) == 0
+
+
+class PausingFloor(float):
+    """A min_scale entry that, once armed, holds the next update using it until released"""
+
+    def __new__(cls, value):
+        floor = super().__new__(cls, value)
+        floor.armed = False
+        floor.entered = threading.Event()
+        floor.release = threading.Event()
+        return floor
+
+    def __gt__(self, other):
+        if self.armed:
+            self.armed = False
+            self.entered.set()
+            self.release.wait(5)
+        return float(self) > other
+
+
+def test_readings_for_one_device_are_serialized():
+    """While an update runs, another reading or announcement for that device waits; other devices do not"""
+    rng = random.Random(7)
+    floor = PausingFloor(MIN_SCALE[0])
+    detector = StreamingAnomalyDetector([floor] + MIN_SCALE[1:], warmup=10)
+    for device_id in ('d1', 'd2'):
+        for _ in range(10):
+            detector.update(device_id, normal_reading(rng))
+
+    floor.armed = True
+    paused = threading.Thread(target=detector.update, args=('d1', normal_reading(rng)))
+    paused.start()
+    assert floor.entered.wait(5)
+    detector.update('d2', normal_reading(rng))
+    waiting = [threading.Thread(target=detector.update, args=('d1', normal_reading(rng))),
+               threading.Thread(target=detector.expect_shift, args=('d1', [0])),
+               threading.Thread(target=detector.baseline, args=('d1',))]
+    for thread in waiting:
+        thread.start()
+    time.sleep(0.05)
+    assert all(thread.is_alive() for thread in waiting)
+
+    floor.release.set()
+    for thread in [paused] + waiting:
+        thread.join(5)
+        assert not thread.is_alive()
+    assert detector._baselines['d1'].count == 12 and detector._baselines['d2'].count == 11
+
+
+if __name__ == "__main__":
+    print("Streaming Anomaly Detector Test")
+    print("=" * 30)
+    test_warmup_never_flags()
+    test_spike_detected_and_baseline_robust()
+    test_false_positive_rate_on_clean_stream()
+    test_follows_slow_drift()
+    test_devices_are_isolated()
+    test_level_shift_is_adopted()
+    test_device_limit_and_reset()
+    test_readings_for_one_device_are_serialized()
+    print("✅ All streaming anomaly tests passed")
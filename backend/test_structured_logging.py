@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Structured Logging Test Script
+
+This script checks the queued logging pipeline: key=value and JSON output,
+per-category sampling and rate limits, and that warnings are never dropped.
+"""
+
+import io
+import json
+import logging
+import queue
+
+from structured_logging import (NonBlockingQueueHandler, SamplingFilter, StructuredFormatter,
+                                configure_logging, parse_category_values)
+
+
+def make_record(level=logging.INFO, category=None, **fields):
+    record = logging.LogRecord('app', level, __file__, 1, "Reading %s", ('scored',), None)
+    if category is not None:
+        record.category = category
+    for key, value in fields.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_formatter():
+    """Extra fields follow the message as key=value pairs, or as JSON keys"""
+    record = make_record(category='reading', device_id='plant-1', health_score=83.3)
+    assert StructuredFormatter().format(record) == \
+        "INFO:app:Reading scored category=reading device_id=plant-1 health_score=83.3"
+    entry = json.loads(StructuredFormatter(json_format=True).format(record))
+    assert entry["message"] == "Reading scored" and entry["level"] == "INFO"
+    assert entry["device_id"] == 'plant-1' and entry["health_score"] == 83.3
+    assert parse_category_values("reading=0.1, disease=20") == {"reading": 0.1, "disease": 20.0}
+
+
+def test_sampling_and_rate_limits():
+    """Sampled and rate-limited categories are thinned; other records always pass"""
+    sampling = SamplingFilter(sample_rates={"reading": 0.0}, rate_limits={"disease": 5})
+    assert not sampling.filter(make_record(category='reading'))
+    assert sampling.filter(make_record(level=logging.WARNING, category='reading'))
+    assert sampling.filter(make_record())
+    assert sampling.filter(make_record(category='actuation'))
+
+    passed = sum(sampling.filter(make_record(category='disease')) for _ in range(100))
+    assert 5 <= passed <= 6  # The burst allowance, plus at most a refill during the loop
+    assert sampling.dropped["reading"] == 1
+    assert sampling.dropped["disease"] == 100 - passed
+
+    keep_all = SamplingFilter(sample_rates={"reading": 1.0})
+    assert all(keep_all.filter(make_record(category='reading')) for _ in range(100))
+
+
+def test_queue_pipeline():
+    """Records reach the stream via the listener thread; a full queue drops instead of blocking"""
+    stream = io.StringIO()
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    pipeline = configure_logging(logging.INFO, sample_rates={"reading": 0.0}, stream=stream, force=True)
+    try:
+        logger = logging.getLogger('structured_logging_test')
+        logger.info("Reading scored", extra={"category": "reading", "device_id": "a"})
+        logger.info("Disease analysis", extra={"category": "disease", "disease": "Tomato_healthy"})
+        logger.debug("Received sensor data: %s", {"soil_moisture": 600})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Error processing sensor data")
+        pipeline.stop()
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
+
+    output = stream.getvalue()
+    assert "Disease analysis category=disease disease=Tomato_healthy" in output
+    assert "Reading scored" not in output
+    assert "Received sensor data" not in output
+    assert "ValueError: boom" in output
+    assert pipeline.stats()["sampled_out"] == {"reading": 1}
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.overflowed == 1
+
+
+if __name__ == "__main__":
+    print("Structured Logging Test")
+    print("=" * 30)
+    test_formatter()
+    test_sampling_and_rate_limits()
+    test_queue_pipeline()
+    print("✅ Structured logging tests passed")
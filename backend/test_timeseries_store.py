@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Time-Series Store Test Script
+
+This script checks range scans, retention and compaction of the local
+SQLite history store.
+"""
+
+import os
+import tempfile
+
+from timeseries_store import TimeSeriesStore
+
+COLUMNS = ('timestamp', 'soil_moisture', 'anomaly_detected')
+DAY = 86400.0
+
+
+def make_store(directory, **kwargs):
+    """Open a store with hour-long partitions in a temporary directory"""
+    return TimeSeriesStore(os.path.join(directory, 'history.db'), COLUMNS, partition_seconds=3600, **kwargs)
+
+
+def test_range_scans_span_partitions():
+    """Scans return one device's rows in time order across partitions"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory)
+        base = 1_700_000_000.0
+        store.append_many([('a', (base + i * 600, 500 - i, 0)) for i in range(18)])
+        store.append_many([('b', (base + i * 600, 900, 0)) for i in range(18)])
+
+        rows = store.scan('a', base + 3000, base + 7200)
+        assert rows[:, 0].tolist() == [base + i * 600 for i in range(5, 13)]
+        assert store.scan('a', limit=4)[:, 1].tolist() == [500, 499, 498, 497]
+        assert store.latest('a', 3)[:, 0].tolist() == [base + i * 600 for i in range(15, 18)]
+        assert store.devices() == ['a', 'b'] or store.devices() == ['b', 'a']
+        assert len(store.partition_info()) >= 3
+        store.close()
+
+
+def test_retention_and_compaction():
+    """Old partitions are dropped, and older-but-retained ones are downsampled"""
+    with tempfile.TemporaryDirectory() as directory:
+        now = 1_699_999_800.0  # Multiple of the 300 s compaction bucket
+        store = make_store(directory, retention_seconds=30 * DAY,
+                           compact_after_seconds=7 * DAY, compact_bucket_seconds=300)
+        store.append_many([('a', (now - 40 * DAY + i, 1, 0)) for i in range(10)])
+        store.append_many([('a', (now - 10 * DAY + i * 60, 100 + i, i == 7)) for i in range(10)])
+        store.append_many([('a', (now - 60 + i, 7, 0)) for i in range(10)])
+
+        dropped, compacted = store.run_maintenance(now)
+        assert dropped == 1
+        assert compacted == 1
+
+        old = store.scan('a', now - 11 * DAY, now - 9 * DAY)
+        assert old[:, 1].tolist() == [102.0, 107.0]
+        assert old[:, 2].tolist() == [0.0, 1.0]
+        assert len(store.scan('a', now - 120, now)) == 10
+        store.close()
+
+        # Reopening keeps partitions and compaction state
+        store = make_store(directory, retention_seconds=30 * DAY, compact_after_seconds=7 * DAY)
+        assert store.run_maintenance(now) == (0, 0)
+        assert len(store.scan('a')) == 12
+        store.close()
+
+
+if __name__ == "__main__":
+    print("Time-Series Store Test")
+    print("=" * 30)
+    test_range_scans_span_partitions()
+    test_retention_and_compaction()
+    print("✅ Time-series store tests passed")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Worker Routing Test Script
+
+This script checks that workers claim distinct slots, that a device's
+readings are forwarded to the worker that owns it, and that a reading is
+scored where it arrived while its owner cannot be reached.
+"""
+
+import os
+import secrets
+import tempfile
+
+# Keep the test run off the on-disk history store and model registry
+os.environ.setdefault("HISTORY_DB_PATH", "")
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp())
+
+import app as backend
+from worker_routing import WorkerRouter, WorkerUnavailable, device_owner
+
+backend.wait_until_ready(120)
+
+READING = {
+    "soil_moisture": 600,
+    "temperature": 24.0,
+    "humidity": 55.0,
+    "light_intensity": 500
+}
+
+
+def make_routers(handlers=None):
+    """Two routers in this process, standing in for two workers sharing one state path"""
+    base = os.path.join(tempfile.mkdtemp(), 'shared_state.db')
+    key = secrets.token_bytes(16)
+    routers = [WorkerRouter(base, 2, key, handlers) for _ in range(2)]
+    for router in routers:
+        router.start()
+    return routers
+
+
+def device_of(slot, workers=2):
+    """A device ID owned by `slot`"""
+    return next(f"plant-{i}" for i in range(100) if device_owner(f"plant-{i}", workers) == slot)
+
+
+def test_slots_and_forwarded_calls():
+    """Each worker claims its own slot; calls run in the owner and errors come back"""
+    def fail():
+        raise ValueError("bad reading")
+
+    first, second = make_routers({'echo': lambda *args: (os.getpid(), args), 'fail': fail})
+    try:
+        assert {first.slot, second.slot} == {0, 1}
+        assert first.owner(device_of(first.slot)) is None
+        assert first.owner(device_of(second.slot)) == second.slot
+
+        assert first.call(second.slot, 'echo', 'plant-1', [1.0]) == (os.getpid(), ('plant-1', [1.0]))
+        try:
+            first.call(second.slot, 'fail')
+            raise AssertionError("the owner's error should be raised in the caller")
+        except RuntimeError as e:
+            assert "bad reading" in str(e)
+        assert first.stats()["forwarded"] == 2 and second.stats()["served"] == 2
+    finally:
+        first.close()
+        second.close()
+
+
+def test_restarted_owner_is_reached_again():
+    """A call fails while the owner is down, then reaches its replacement on a new connection"""
+    first, second = make_routers({'ping': lambda: 'pong'})
+    try:
+        slot = second.slot
+        assert first.call(slot, 'ping') == 'pong'
+        second.close()
+        try:
+            first.call(slot, 'ping')
+            raise AssertionError("a stopped owner should be unavailable")
+        except WorkerUnavailable:
+            pass
+
+        replacement = WorkerRouter(first.base_path, 2, first.authkey, {'ping': lambda: 'pong again'})
+        replacement.start()
+        assert replacement.slot == slot
+        assert first.call(slot, 'ping') == 'pong again'
+        replacement.close()
+    finally:
+        first.close()
+
+
+def test_readings_are_scored_by_their_owner():
+    """process_sensor_reading and score_readings send each device to its owner's handlers"""
+    scored = []
+
+    def score_remote(readings, X):
+        scored.extend(reading['device_id'] for reading in readings)
+        return [{"device_id": reading['device_id'], "remote": True} for reading in readings]
+
+    first, second = make_routers()
+    second.handlers.update(reading=lambda data: {"remote": True, "device_id": data['device_id']},
+                           batch=score_remote)
+    original = backend.worker_router
+    backend.worker_router = first
+    try:
+        local, remote = device_of(first.slot), device_of(second.slot)
+        assert backend.process_sensor_reading(dict(READING, device_id=remote)) == {"remote": True, "device_id": remote}
+        assert "remote" not in backend.process_sensor_reading(dict(READING, device_id=local))
+
+        readings = [dict(READING, device_id=device_id) for device_id in (remote, local, remote)]
+        readings, X, _ = backend.parse_batch_payload({"readings": readings})
+        results = backend.score_readings(readings, X)
+        assert [result["device_id"] for result in results] == [remote, local, remote]
+        assert [result.get("remote", False) for result in results] == [True, False, True]
+        assert scored == [remote, remote]
+
+        # With the owner gone, the reading is scored here instead of failing
+        second.close()
+        assert "remote" not in backend.process_sensor_reading(dict(READING, device_id=remote))
+    finally:
+        backend.worker_router = original
+        first.close()
+        second.close()
+
+
+if __name__ == "__main__":
+    print("Worker Routing Test")
+    print("=" * 30)
+    test_slots_and_forwarded_calls()
+    test_restarted_owner_is_reached_again()
+    test_readings_are_scored_by_their_owner()
+    print("✅ Worker routing tests passed")
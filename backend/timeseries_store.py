@@ -0,0 +1,260 @@
+"""
+Embedded time-series store for sensor history
+
+Readings and derived scores are kept in a local SQLite database, split into
+one table per time partition (a day by default). Each partition is a
+WITHOUT ROWID table clustered on (device_id, timestamp), so a time-range scan
+for one device is a single index range per partition. Retention drops whole
+partitions, and compaction rewrites old partitions as per-device bucket
+averages, which keeps months of high-frequency data small enough for one node.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from ring_buffer import HISTORY_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Columns where a compacted bucket keeps the maximum (any alert in the bucket) instead of the mean
+FLAG_COLUMNS = ('water_now', 'anomaly_detected')
+
+
+class TimeSeriesStore:
+    """Time-partitioned SQLite store of per-device readings"""
+
+    def __init__(self, path, columns=HISTORY_COLUMNS, partition_seconds=86400,
+                 retention_seconds=None, compact_after_seconds=None, compact_bucket_seconds=300, shared=False):
+        if columns[0] != 'timestamp':
+            raise ValueError("first column must be 'timestamp'")
+        self.path = path
+        self.columns = tuple(columns)
+        self.partition_seconds = partition_seconds
+        self.retention_seconds = retention_seconds
+        self.compact_after_seconds = compact_after_seconds
+        self.compact_bucket_seconds = compact_bucket_seconds
+        # Other processes write to the same file: re-read their partition changes before each read
+        self.shared = shared
+
+        self._lock = threading.RLock()
+        self._maintenance_stop = threading.Event()
+        self._maintenance_thread = None
+        self._conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS partitions ("
+            "name TEXT PRIMARY KEY, start REAL NOT NULL, end REAL NOT NULL, compacted INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._load_partitions()
+
+        value_columns = self.columns[1:]
+        self._insert_columns = ", ".join(('device_id', 'timestamp') + value_columns)
+        self._placeholders = ", ".join("?" * (len(value_columns) + 2))
+
+    # Partitions
+
+    def _load_partitions(self):
+        self._partitions = {
+            name: (start, end, bool(compacted))
+            for name, start, end, compacted in self._conn.execute(
+                "SELECT name, start, end, compacted FROM partitions ORDER BY start")
+        }
+
+    def _partition_for(self, timestamp):
+        start = timestamp - (timestamp % self.partition_seconds)
+        return f"readings_{int(start)}", start, start + self.partition_seconds
+
+    def _ensure_partition(self, timestamp):
+        name, start, end = self._partition_for(timestamp)
+        if name not in self._partitions:
+            value_columns = ", ".join(f"{column} REAL" for column in self.columns[1:])
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} ("
+                f"device_id TEXT NOT NULL, timestamp REAL NOT NULL, {value_columns}, "
+                f"PRIMARY KEY (device_id, timestamp)) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO partitions (name, start, end) VALUES (?, ?, ?)", (name, start, end))
+            self._partitions[name] = (start, end, False)
+        return name
+
+    def _overlapping(self, start, end, newest_first=False):
+        if self.shared:
+            self._load_partitions()
+        partitions = [
+            name for name, (p_start, p_end, _) in self._partitions.items()
+            if (end is None or p_start <= end) and (start is None or p_end > start)
+        ]
+        partitions.sort(key=lambda name: self._partitions[name][0], reverse=newest_first)
+        return partitions
+
+    # Writes
+
+    def append(self, device_id, row):
+        """Store one row of len(columns) values (timestamp first)"""
+        self.append_many([(device_id, row)])
+
+    def append_many(self, items):
+        """Store (device_id, row) pairs in a single transaction"""
+        by_partition = {}
+        with self._lock:
+            for device_id, row in items:
+                name = self._ensure_partition(float(row[0]))
+                by_partition.setdefault(name, []).append((device_id, *(float(value) for value in row)))
+            self._conn.execute("BEGIN")
+            try:
+                for name, rows in by_partition.items():
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO {name} ({self._insert_columns}) VALUES ({self._placeholders})",
+                        rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # Reads
+
+    def scan(self, device_id, start=None, end=None, limit=None):
+        """Rows for a device with start <= timestamp <= end, oldest first, as an (n, columns) array"""
+        clauses = ["device_id = ?"]
+        params = [device_id]
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(end)
+        where = " AND ".join(clauses)
+        select = ", ".join(self.columns)
+
+        rows = []
+        with self._lock:
+            for name in self._overlapping(start, end):
+                remaining = None if limit is None else limit - len(rows)
+                if remaining is not None and remaining <= 0:
+                    break
+                query = f"SELECT {select} FROM {name} WHERE {where} ORDER BY timestamp"
+                if remaining is not None:
+                    query += f" LIMIT {int(remaining)}"
+                rows.extend(self._conn.execute(query, params).fetchall())
+        return self._to_array(rows)
+
+    def latest(self, device_id, n):
+        """Last n rows for a device, oldest first"""
+        select = ", ".join(self.columns)
+        rows = []
+        with self._lock:
+            for name in self._overlapping(None, None, newest_first=True):
+                remaining = n - len(rows)
+                if remaining <= 0:
+                    break
+                rows.extend(self._conn.execute(
+                    f"SELECT {select} FROM {name} WHERE device_id = ? ORDER BY timestamp DESC LIMIT ?",
+                    (device_id, remaining)).fetchall())
+        return self._to_array(rows[::-1])
+
+    def devices(self):
+        """Device IDs with stored data, least recently reporting first"""
+        last_seen = {}
+        with self._lock:
+            for name in self._overlapping(None, None):
+                for device_id, timestamp in self._conn.execute(
+                        f"SELECT device_id, MAX(timestamp) FROM {name} GROUP BY device_id"):
+                    last_seen[device_id] = timestamp
+        return sorted(last_seen, key=last_seen.get)
+
+    def partition_info(self):
+        """(name, start, end, compacted) for every partition, oldest first"""
+        with self._lock:
+            return [(name, *self._partitions[name]) for name in self._overlapping(None, None)]
+
+    def _to_array(self, rows):
+        return np.array(rows, dtype=np.float64).reshape(len(rows), len(self.columns))
+
+    # Maintenance
+
+    def apply_retention(self, now=None):
+        """Drop partitions that end before the retention horizon. Returns the number dropped."""
+        if self.retention_seconds is None:
+            return 0
+        horizon = (now or time.time()) - self.retention_seconds
+        dropped = 0
+        with self._lock:
+            for name, (_, end, _) in list(self._partitions.items()):
+                if end <= horizon:
+                    self._conn.execute(f"DROP TABLE IF EXISTS {name}")
+                    self._conn.execute("DELETE FROM partitions WHERE name = ?", (name,))
+                    del self._partitions[name]
+                    dropped += 1
+            if dropped:
+                self._conn.execute("PRAGMA incremental_vacuum")
+        if dropped:
+            logger.info(f"Dropped {dropped} history partitions older than retention")
+        return dropped
+
+    def compact(self, now=None):
+        """Downsample old partitions to per-device bucket averages. Returns the number compacted."""
+        if self.compact_after_seconds is None:
+            return 0
+        horizon = (now or time.time()) - self.compact_after_seconds
+        bucket = float(self.compact_bucket_seconds)
+        aggregates = ", ".join(
+            f"{'MAX' if column in FLAG_COLUMNS else 'AVG'}({column})" for column in self.columns[1:])
+        compacted = 0
+        with self._lock:
+            for name, (_, end, done) in list(self._partitions.items()):
+                if done or end > horizon:
+                    continue
+                staging = f"{name}_compact"
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.execute(f"DROP TABLE IF EXISTS {staging}")
+                    self._conn.execute(f"CREATE TABLE {staging} AS SELECT * FROM {name} WHERE 0")
+                    self._conn.execute(
+                        f"INSERT INTO {staging} ({self._insert_columns}) "
+                        f"SELECT device_id, MIN(timestamp), {aggregates} FROM {name} "
+                        f"GROUP BY device_id, CAST(timestamp / ? AS INTEGER)", (bucket,))
+                    self._conn.execute(f"DELETE FROM {name}")
+                    self._conn.execute(f"INSERT INTO {name} SELECT * FROM {staging}")
+                    self._conn.execute(f"DROP TABLE {staging}")
+                    self._conn.execute("UPDATE partitions SET compacted = 1 WHERE name = ?", (name,))
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                start, end, _ = self._partitions[name]
+                self._partitions[name] = (start, end, True)
+                compacted += 1
+            if compacted:
+                self._conn.execute("PRAGMA incremental_vacuum")
+        if compacted:
+            logger.info(f"Compacted {compacted} history partitions")
+        return compacted
+
+    def run_maintenance(self, now=None):
+        """Apply retention, then compaction"""
+        return self.apply_retention(now), self.compact(now)
+
+    def start_maintenance(self, interval=3600.0):
+        """Run retention and compaction periodically on a background thread"""
+        def loop():
+            while not self._maintenance_stop.wait(interval):
+                try:
+                    self.run_maintenance()
+                except Exception as e:
+                    logger.error(f"History maintenance failed: {e}")
+
+        if self._maintenance_thread is None:
+            self._maintenance_thread = threading.Thread(target=loop, name="history-maintenance", daemon=True)
+            self._maintenance_thread.start()
+
+    def close(self):
+        self._maintenance_stop.set()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,190 @@
+"""
+Device affinity for a multi-worker server
+
+Anomaly baselines, drying forecasts, ring buffers and dashboard snapshots
+live in each worker's memory, and they are only right if every reading of a
+device is scored by the same worker. Gunicorn hands a connection to
+whichever worker accepts it first, so the worker that receives a reading
+forwards it to the device's owner: worker crc32(device_id) % workers.
+
+Each worker claims a slot number with a file lock when it starts, and
+listens on a Unix socket next to the shared state for calls from the other
+workers (multiprocessing.connection, authenticated with a key the gunicorn
+master generates). A call is one pickled request and reply over a
+connection that the calling thread keeps open. Calls are served by the
+router's own threads and never forwarded again, so two workers calling each
+other cannot deadlock. When the owner cannot be reached (it is restarting),
+call() raises WorkerUnavailable and the caller scores the reading itself.
+"""
+
+import logging
+import os
+import socket
+import threading
+import zlib
+from multiprocessing.connection import Client, Connection, answer_challenge, deliver_challenge
+
+from shared_state import hold_file_lock
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerUnavailable(Exception):
+    pass
+
+
+def device_owner(device_id, workers):
+    """Slot of the worker that owns a device"""
+    return zlib.crc32(str(device_id).encode()) % workers
+
+
+def claim_slot(base_path, workers):
+    """(slot, open lock file) for the first free slot, or (None, None) when every slot is taken"""
+    for slot in range(workers):
+        lock = hold_file_lock(f"{base_path}.worker-{slot}.lock")
+        if lock is not None:
+            return slot, lock
+    return None, None
+
+
+class WorkerRouter:
+    """Forwards calls to the worker that owns a device and serves the calls forwarded to this one"""
+
+    def __init__(self, base_path, workers, authkey, handlers=None):
+        self.base_path = base_path
+        self.workers = workers
+        self.authkey = authkey
+        self.handlers = dict(handlers or {})  # Call name -> function(*args)
+        # A worker started while every slot is held (e.g. during a reload) owns no devices
+        self.slot, self._slot_lock = claim_slot(base_path, workers)
+        self._listener = None
+        self._closed = False
+        self._served_connections = set()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.forwarded = 0
+        self.served = 0
+        self.unavailable = 0
+
+    def address(self, slot):
+        return f"{self.base_path}.worker-{slot}.sock"
+
+    def start(self):
+        """Listen for calls from the other workers"""
+        if self.slot is None:
+            return
+        address = self.address(self.slot)
+        if os.path.exists(address):
+            os.unlink(address)  # Left behind by the slot's previous worker
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(address)
+        self._listener.listen(64)
+        # accept() wakes up now and then to notice close(); closing the socket would not wake it
+        self._listener.settimeout(0.5)
+        threading.Thread(target=self._accept, name="worker-router", daemon=True).start()
+
+    def owner(self, device_id):
+        """Slot of the worker that owns device_id, or None when it is this one"""
+        owner = device_owner(device_id, self.workers)
+        return None if owner == self.slot else owner
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:  # Timed out, or closed
+                continue
+            sock.setblocking(True)
+            threading.Thread(target=self._serve, args=(sock,), name="worker-router-call", daemon=True).start()
+
+    def _serve(self, sock):
+        with self._lock:
+            self._served_connections.add(sock)
+        try:
+            # The handshake multiprocessing.connection.Listener.accept() does, on a second
+            # descriptor so close() can still shut the socket down
+            connection = Connection(os.dup(sock.fileno()))
+            try:
+                deliver_challenge(connection, self.authkey)
+                answer_challenge(connection, self.authkey)
+            except Exception as e:
+                logger.warning(f"Rejected worker connection: {e}")
+                connection.close()
+                return
+            with connection:
+                while not self._closed:
+                    try:
+                        name, args = connection.recv()
+                    except (EOFError, OSError):
+                        return
+                    try:
+                        reply = ('ok', self.handlers[name](*args))
+                    except Exception as e:
+                        reply = ('error', f"{type(e).__name__}: {e}")
+                    with self._lock:
+                        self.served += 1
+                    connection.send(reply)
+        finally:
+            with self._lock:
+                self._served_connections.discard(sock)
+            sock.close()
+
+    def _connection(self, slot):
+        connections = self._local.__dict__.setdefault('connections', {})
+        if slot not in connections:
+            connections[slot] = Client(self.address(slot), 'AF_UNIX', authkey=self.authkey)
+        return connections[slot]
+
+    def call(self, slot, name, *args):
+        """handlers[name](*args) run in the worker at slot"""
+        for attempt in range(2):
+            connections = self._local.__dict__.setdefault('connections', {})
+            reused = slot in connections
+            try:
+                connection = self._connection(slot)
+                connection.send((name, args))
+                status, result = connection.recv()
+                break
+            except (OSError, EOFError) as e:
+                stale = connections.pop(slot, None)
+                if stale is not None:
+                    stale.close()
+                # A kept connection may just be to the slot's previous worker; retry once on a new one
+                if reused and attempt == 0:
+                    continue
+                with self._lock:
+                    self.unavailable += 1
+                raise WorkerUnavailable(f"Worker {slot} unavailable: {e}")
+        with self._lock:
+            self.forwarded += 1
+        if status == 'error':
+            raise RuntimeError(f"Worker {slot} failed: {result}")
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "slot": self.slot,
+                "workers": self.workers,
+                "forwarded": self.forwarded,
+                "served": self.served,
+                "unavailable": self.unavailable
+            }
+
+    def close(self):
+        self._closed = True
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            os.unlink(self.address(self.slot))
+        with self._lock:
+            sockets, self._served_connections = self._served_connections, set()
+        for sock in sockets:
+            # Their threads are blocked in recv(); a shutdown ends it and they close the connection
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._slot_lock is not None:
+            self._slot_lock.close()
+            self._slot_lock = None
@@ -5,40 +5,57 @@ import DiseaseDetection from './components/DiseaseDetection';
 import Recommendations from './components/Recommendations';
 import './App.css';
 
+const API_URL = 'http://localhost:5000';
+
+// Convert snake_case point from backend to camelCase for frontend
+const transformPoint = (item) => ({
+  timestamp: item.timestamp ? (typeof item.timestamp === 'number' ? item.timestamp * 1000 : item.timestamp) : Date.now(),
+  soilMoisture: item.soil_moisture || item.soilMoisture || 0,
+  temperature: item.temperature || 0,
+  humidity: item.humidity || 0,
+  lightIntensity: item.light_intensity || item.lightIntensity || 0
+});
+
+// Convert the fields shared by /dashboard_data and live 'reading' events
+const transformSummary = (data) => ({
+  currentReadings: {
+    soilMoisture: data.current_readings?.soil_moisture || 0,
+    temperature: data.current_readings?.temperature || 0,
+    humidity: data.current_readings?.humidity || 0,
+    lightIntensity: data.current_readings?.light_intensity || 0
+  },
+  healthScore: data.health_score || 0,
+  wateringPrediction: {
+    waterNow: data.watering_prediction?.water_now || false,
+    confidence: data.watering_prediction?.confidence || 0,
+    nextWatering: data.watering_prediction?.next_watering ? data.watering_prediction.next_watering * 1000 : Date.now() + 7200000
+  },
+  anomalyDetected: data.anomaly_detected || false
+});
+
+const RECENT_POINTS = 10;
+
 function App() {
   const [activeTab, setActiveTab] = useState('dashboard');
   const [plantData, setPlantData] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
+    // The device this dashboard shows: whichever reported last, fixed by the first fetch
+    let deviceId = null;
+    
     // Function to fetch data from backend
     const fetchPlantData = async () => {
       try {
-        const response = await fetch('http://localhost:5000/dashboard_data');
+        const query = deviceId ? `?device_id=${encodeURIComponent(deviceId)}` : '';
+        const response = await fetch(`${API_URL}/dashboard_data${query}`);
         const data = await response.json();
+        deviceId = deviceId || data.device_id || null;
         
         // Convert snake_case from backend to camelCase for frontend
         const transformedData = {
-          currentReadings: {
-            soilMoisture: data.current_readings?.soil_moisture || 0,
-            temperature: data.current_readings?.temperature || 0,
-            humidity: data.current_readings?.humidity || 0,
-            lightIntensity: data.current_readings?.light_intensity || 0
-          },
-          healthScore: data.health_score || 0,
-          wateringPrediction: {
-            waterNow: data.watering_prediction?.water_now || false,
-            confidence: data.watering_prediction?.confidence || 0,
-            nextWatering: data.watering_prediction?.next_watering ? data.watering_prediction.next_watering * 1000 : Date.now() + 7200000
-          },
-          anomalyDetected: data.anomaly_detected || false,
-          recentData: (data.recent_data || []).map(item => ({
-            timestamp: item.timestamp ? (typeof item.timestamp === 'number' ? item.timestamp * 1000 : item.timestamp) : Date.now(),
-            soilMoisture: item.soil_moisture || item.soilMoisture || 0,
-            temperature: item.temperature || 0,
-            humidity: item.humidity || 0,
-            lightIntensity: item.light_intensity || item.lightIntensity || 0
-          }))
+          ...transformSummary(data),
+          recentData: (data.recent_data || []).map(transformPoint)
         };
         
         setPlantData(transformedData);
@@ -73,13 +90,66 @@ function App() {
       }
     };
 
-    // Fetch initial data
-    fetchPlantData();
+    // Poll only while the live stream is unavailable
+    let interval = null;
+    let source = null;
+    let closed = false;
+    const startPolling = () => {
+      if (!interval) {
+        interval = setInterval(fetchPlantData, 10000);
+      }
+    };
+    const stopPolling = () => {
+      clearInterval(interval);
+      interval = null;
+    };
     
-    // Set up polling for real-time data updates
-    const interval = setInterval(fetchPlantData, 10000);
+    // The backend pushes only what changed for each new reading of the displayed device
+    const connect = () => {
+      if (closed) {
+        return;
+      }
+      if (typeof EventSource === 'undefined') {
+        startPolling();
+        return;
+      }
+      const query = deviceId ? `?device_id=${encodeURIComponent(deviceId)}` : '';
+      source = new EventSource(`${API_URL}/stream${query}`);
+      source.onopen = stopPolling;
+      source.onerror = startPolling;
+      source.addEventListener('reading', (event) => {
+        const delta = JSON.parse(event.data);
+        // Subscribed before any device had reported: adopt the first one that does
+        if (!deviceId) {
+          deviceId = delta.device_id;
+          fetchPlantData();
+          return;
+        }
+        if (delta.device_id !== deviceId) {
+          return;
+        }
+        setPlantData(previous => ({
+          ...previous,
+          ...transformSummary(delta),
+          // A gateway batch sends all of a device's new points at once, newest first
+          recentData: [...delta.points.map(transformPoint), ...((previous && previous.recentData) || [])].slice(0, RECENT_POINTS)
+        }));
+        setLoading(false);
+      });
+      // Sent when this tab fell behind and missed updates
+      source.addEventListener('resync', fetchPlantData);
+    };
+    
+    // Fetch initial data, then subscribe to the device it came from
+    fetchPlantData().then(connect);
     
-    return () => clearInterval(interval);
+    return () => {
+      closed = true;
+      if (source) {
+        source.close();
+      }
+      stopPolling();
+    };
   }, []);
 
   const renderTabContent = () => {